@@ -10,7 +10,7 @@ a = Analysis(
     ['src\\main.py'],
     pathex=[str(python_path / 'Lib' / 'site-packages')],
     binaries=[],
-    datas=[('src/icons', 'src/icons')],
+    datas=[('src/icons', 'src/icons'), ('src/profiles', 'src/profiles')],
     hiddenimports=[
         'PyQt6',
         'PyQt6.QtCore',
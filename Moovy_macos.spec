@@ -8,12 +8,14 @@ import os
 src_main = os.path.join('src', 'main.py')
 icons_src = os.path.join('src', 'icons')
 icons_dest = os.path.join('src', 'icons')
+profiles_src = os.path.join('src', 'profiles')
+profiles_dest = os.path.join('src', 'profiles')
 
 a = Analysis(
     [src_main],
     pathex=[],
     binaries=[],
-    datas=[(icons_src, icons_dest)],
+    datas=[(icons_src, icons_dest), (profiles_src, profiles_dest)],
     hiddenimports=['PyQt6.QtSvg'],
     hookspath=[],
     hooksconfig={},
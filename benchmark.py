@@ -0,0 +1,910 @@
+#!/usr/bin/env python3
+"""Performance benchmarks for Moovy's scanning and analysis stages.
+
+Usage:
+    python benchmark.py probe-workers <folder> [--workers 1 4 8 16]
+    python benchmark.py probe-modes <folder>
+    python benchmark.py probe-backends <folder>
+    python benchmark.py pipeline <folder>
+    python benchmark.py locality <folder> [--workers 1 4]
+    python benchmark.py scan [--files 100000]
+    python benchmark.py compat [--files 200000]
+    python benchmark.py table [--rows 10000 100000 500000]
+    python benchmark.py ui-latency [--files 50000]
+    python benchmark.py convert <folder> [--jobs 2] [--light-jobs 2]
+    python benchmark.py segments <file> [--segments 2 4 8]
+    python benchmark.py profiles <file> [--folder <folder>] [--sample 30]
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from src.models.movie import Movie
+from src.utils.conversion_planner import ConversionPlanner, format_duration
+from src.utils.conversion_scheduler import ConversionJob, ConversionScheduler
+from src.utils.device_profiles import DeviceProfiles
+from src.utils.encoding_profiles import EncodingProfiles
+from src.utils.ffmpeg_analyzer import FFmpegAnalyzer
+from src.utils.file_scanner import FileScanner
+from src.utils.locality import LocalityOrder
+from src.utils.media_prober import MediaProber
+from src.utils.pipeline import PipelineQueue
+from src.utils.probe_pool import ProbePool
+from src.utils.samsung_compatibility import SamsungTVCompatibility
+from src.utils.settings import Settings
+
+
+def print_header(title: str):
+    """Print a section header."""
+    print("=" * 60)
+    print(title)
+    print("=" * 60)
+
+
+def percentile(values, pct: float) -> float:
+    """Get a percentile of a list of numbers (nearest-rank)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+def load_files(args):
+    """Scan the benchmark folder, honouring --limit."""
+    files = FileScanner.scan_folder(args.folder)
+    if args.limit:
+        files = files[:args.limit]
+    return files
+
+
+def bench_probe_workers(args):
+    """Compare probe throughput (files/sec) for different pool sizes."""
+    files = load_files(args)
+    if not files:
+        print(f"No video files found in {args.folder}")
+        return 1
+
+    print_header(f"Probe throughput: {len(files)} files")
+    baseline = None
+    for workers in args.workers:
+        pool = ProbePool(workers)
+        start = time.perf_counter()
+        failed = sum(1 for _, info in pool.imap_unordered(files) if info is None)
+        elapsed = time.perf_counter() - start
+
+        rate = len(files) / elapsed if elapsed > 0 else 0.0
+        baseline = baseline or rate
+        speedup = rate / baseline if baseline else 0.0
+        print(f"  workers={workers:<3d} {rate:8.1f} files/sec  "
+              f"{elapsed:7.2f}s  x{speedup:4.1f}  failed={failed}")
+    return 0
+
+
+def bench_probe_modes(args):
+    """Compare per-file latency of the regex (full) probe and the fast JSON probe."""
+    files = load_files(args)
+    ffprobe_path = FFmpegAnalyzer._find_ffprobe()
+    if not files or not ffprobe_path:
+        print("Need sample video files and ffprobe to run this benchmark")
+        return 1
+
+    modes = {
+        "full (regex)": lambda f: FFmpegAnalyzer.get_codec_info(f, fast=False),
+        "fast (json)": lambda f: FFmpegAnalyzer.get_codec_info(f, fast=True),
+    }
+    results = {}
+
+    print_header(f"Probe latency: {len(files)} files")
+    for name, probe in modes.items():
+        latencies = []
+        results[name] = {}
+        for filepath in files:
+            start = time.perf_counter()
+            results[name][filepath] = probe(filepath)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        print(f"  {name:14s} p50={percentile(latencies, 50):7.1f}ms  "
+              f"p90={percentile(latencies, 90):7.1f}ms  "
+              f"p99={percentile(latencies, 99):7.1f}ms  "
+              f"total={sum(latencies) / 1000:6.2f}s")
+
+    # Fast results must agree with the full probe on the codecs we report
+    fallbacks = sum(
+        1 for f in files
+        if FFmpegAnalyzer._fast_probe(ffprobe_path, f) is None
+    )
+    mismatches = [
+        f for f in files
+        if (results["full (regex)"][f] or {}).get("video_codec") !=
+           (results["fast (json)"][f] or {}).get("video_codec")
+        or (results["full (regex)"][f] or {}).get("audio_codec") !=
+           (results["fast (json)"][f] or {}).get("audio_codec")
+    ]
+    print(f"  fast probe fell back to full probe for {fallbacks} file(s)")
+    print(f"  codec mismatches between modes: {len(mismatches)}")
+    for filepath in mismatches[:10]:
+        print(f"    {filepath}")
+    return 0
+
+
+def bench_probe_backends(args):
+    """Report how many files each probe backend resolved and how fast."""
+    files = load_files(args)
+    if not files:
+        print(f"No video files found in {args.folder}")
+        return 1
+
+    print_header(f"Probe backends: {len(files)} files")
+    for label, native in (("ffprobe only", False), ("native + ffprobe", True)):
+        prober = MediaProber(native=native)
+        start = time.perf_counter()
+        failed = sum(1 for f in files if prober.probe(f) is None)
+        elapsed = time.perf_counter() - start
+
+        print(f"  {label}: {len(files) / elapsed:8.1f} files/sec  "
+              f"{elapsed:7.2f}s  failed={failed}")
+        for stats in prober.stats.values():
+            if stats.attempts:
+                print(f"    {stats}")
+    return 0
+
+
+def bench_pipeline(args):
+    """Compare scan-then-probe with the streaming scan/probe pipeline."""
+    prober = MediaProber(native=not args.ffprobe_only)
+
+    def run(label, results):
+        start = time.perf_counter()
+        first = None
+        count = 0
+        for _ in results:
+            count += 1
+            first = first or time.perf_counter() - start
+        total = time.perf_counter() - start
+        print(f"  {label:16s} first result {first or 0:7.3f}s  "
+              f"total {total:7.2f}s  files={count}")
+
+    def sequential():
+        files = FileScanner.scan_folder(args.folder)
+        return ProbePool(args.workers, prober.probe).imap_unordered(files)
+
+    def pipelined():
+        probe_queue = PipelineQueue(args.backlog)
+
+        def scan():
+            try:
+                FileScanner.scan_folder(args.folder, on_file_found=probe_queue.put)
+            finally:
+                probe_queue.close()
+
+        threading.Thread(target=scan, daemon=True).start()
+        return ProbePool(args.workers, prober.probe).imap_unordered(probe_queue)
+
+    print_header(f"Scan + probe pipeline: {args.folder}")
+    run("scan then probe", sequential())
+    run("pipelined", pipelined())
+    return 0
+
+
+def evict_page_cache(files) -> str:
+    """Drop cached file data so the next reads come from the disk.
+
+    Returns:
+        How the cache was dropped
+    """
+    try:
+        os.sync()
+        with open("/proc/sys/vm/drop_caches", "w") as f:
+            f.write("3\n")
+        return "drop_caches (data and metadata)"
+    except OSError:
+        pass
+    if not hasattr(os, "posix_fadvise"):
+        return "none (results are warm-cache)"
+    for filepath in files:
+        try:
+            fd = os.open(filepath, os.O_RDONLY)
+            try:
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+            finally:
+                os.close(fd)
+        except OSError:
+            pass
+    return "posix_fadvise (file data only)"
+
+
+def bench_locality(args):
+    """Compare cold-cache probe throughput for alphabetical and on-disk order."""
+    files = load_files(args)
+    if not files:
+        print(f"No video files found in {args.folder}")
+        return 1
+
+    prober = MediaProber(native=not args.ffprobe_only)
+    orders = {
+        "alphabetical": sorted(files),
+        "inode": sorted(files, key=lambda f: LocalityOrder.key(f, os.stat(f).st_ino,
+                                                                extents=False)),
+        "extent (FIEMAP)": sorted(files, key=lambda f: LocalityOrder.key(f)),
+    }
+    located = sum(1 for f in files
+                  if LocalityOrder.key(f)[0] == LocalityOrder.EXTENT)
+
+    print_header(f"Probe order on a cold cache: {len(files)} files")
+    print(f"  files with a physical extent: {located}/{len(files)}")
+    for workers in args.workers:
+        for label, ordered in orders.items():
+            method = evict_page_cache(files)
+            # One worker keeps the order exactly; more only roughly
+            pool = ProbePool(workers, prober.probe)
+            start = time.perf_counter()
+            failed = sum(1 for _, info in pool.imap_unordered(ordered) if info is None)
+            elapsed = time.perf_counter() - start
+            print(f"  workers={workers:<3d} {label:16s} {len(files) / elapsed:8.1f} files/sec  "
+                  f"{elapsed:7.2f}s  failed={failed}")
+    print(f"  cache eviction: {method}")
+    return 0
+
+
+def make_synthetic_tree(root: str, files: int, per_dir: int = 100) -> int:
+    """Create a tree of empty video files (plus some non-video files).
+
+    Returns:
+        Number of video files created
+    """
+    created = 0
+    dir_index = 0
+    while created < files:
+        # Three levels deep: a/b/c
+        directory = os.path.join(root, f"a{dir_index // 100}", f"b{dir_index // 10}", f"c{dir_index}")
+        os.makedirs(directory, exist_ok=True)
+        for i in range(min(per_dir, files - created)):
+            open(os.path.join(directory, f"movie_{i:04d}.mkv"), "wb").close()
+            created += 1
+        open(os.path.join(directory, "cover.jpg"), "wb").close()
+        dir_index += 1
+    return created
+
+
+def bench_scan(args):
+    """Compare entries/sec of os.walk + stat with the scandir-based scanner."""
+    root = args.folder or tempfile.mkdtemp(prefix="moovy-scan-")
+    try:
+        if not args.folder:
+            make_synthetic_tree(root, args.files)
+
+        def walk_and_stat():
+            # Equivalent of the old os.walk scanner plus the stat a cache needs
+            for dirpath, dirs, files in os.walk(root):
+                dirs[:] = [d for d in dirs if not d.startswith('.')]
+                for name in sorted(files):
+                    path = os.path.join(dirpath, name)
+                    if not name.startswith('._') and FFmpegAnalyzer.is_video_file(path):
+                        os.stat(path)
+                        yield path
+
+        scanners = [("os.walk + stat", walk_and_stat),
+                    ("scandir", lambda: FileScanner.iter_video_files(root))]
+        for threads in args.threads:
+            scanners.append((
+                f"parallel x{threads}",
+                lambda threads=threads: FileScanner.iter_video_files_parallel([root], threads)
+            ))
+
+        print_header(f"Scan throughput: {root}")
+        for label, scanner in scanners:
+            start = time.perf_counter()
+            count = sum(1 for _ in scanner())
+            elapsed = time.perf_counter() - start
+            print(f"  {label:16s} {count / elapsed:10.0f} entries/sec  "
+                  f"{elapsed:7.2f}s  entries={count}")
+    finally:
+        if not args.folder:
+            shutil.rmtree(root, ignore_errors=True)
+    return 0
+
+
+def synthetic_probe_results(count: int):
+    """Probe results of a mixed library (codecs, sizes, profiles, levels, bitrates)."""
+    streams = [
+        ("h264", "aac", "mov,mp4,m4a,3gp,3g2,mj2", 1920, 1080, "High", 41),
+        ("h264", "ac3", "matroska,webm", 3840, 2160, "High", 51),
+        ("hevc", "eac3", "matroska,webm", 3840, 2160, "Main 10", 153),
+        ("h264", "dts", "matroska,webm", 1280, 720, "Main", 31),
+        ("mpeg4", "mp3", "avi", 720, 480, "Simple Profile", 1),
+        ("vp9", "opus", "matroska,webm", 1920, 1080, "Profile 0", None),
+        ("h264", "pcm_s16le", "mov,mp4,m4a,3gp,3g2,mj2", 1920, 1080, "High 4:4:4 Predictive", 40),
+    ]
+    results = []
+    for i in range(count):
+        video, audio, container, width, height, profile, level = streams[i % len(streams)]
+        results.append({
+            "video_codec": video, "audio_codec": audio, "container": container,
+            "width": width, "height": height, "video_profile": profile, "video_level": level,
+            "bit_rate": 2_000_000 + (i * 7919) % 40_000_000, "duration": 5400.0,
+        })
+    return results
+
+
+def bench_compat(args):
+    """Compare per-call codec checks with compiled, memoized device profiles."""
+    infos = synthetic_probe_results(args.files)
+
+    def legacy(info):
+        # Equivalent of the old check: normalize both names on every call,
+        # then a substring scan over the video codecs
+        def normalize(codec):
+            codec = (codec or "").lower().strip()
+            for old, new in {"mpeg2video": "mpeg2", "libx264": "h264",
+                             "libx265": "h265", "libfdk_aac": "aac"}.items():
+                if codec.startswith(old):
+                    codec = codec.replace(old, new)
+            return codec
+        video = normalize(info["video_codec"])
+        return any(compat in video for compat in ("h264", "avc", "h.264", "h265", "hevc", "h.265")) \
+            and normalize(info["audio_codec"]) in {"aac", "mp3", "ac3", "eac3", "flac", "pcm"}
+
+    print_header(f"Compatibility checks: {len(infos)} files")
+    start = time.perf_counter()
+    compatible = sum(1 for info in infos if legacy(info))
+    elapsed = time.perf_counter() - start
+    print(f"  {'legacy (codecs)':24s} {len(infos) / elapsed:12.0f} files/sec  "
+          f"{elapsed * 1000:8.1f} ms  compatible={compatible}")
+
+    DeviceProfiles.load()  # Fresh profiles, so the first pass starts with empty memos
+    for name in DeviceProfiles.names():
+        profile = DeviceProfiles.get(name)
+        for label in ("cold", "memoized"):
+            start = time.perf_counter()
+            compatible = sum(1 for info in infos if profile.evaluate(info).compatible)
+            elapsed = time.perf_counter() - start
+            print(f"  {name + ' ' + label:24s} {len(infos) / elapsed:12.0f} files/sec  "
+                  f"{elapsed * 1000:8.1f} ms  compatible={compatible}")
+    return 0
+
+
+def rss_mb() -> float:
+    """Current resident memory of this process in MB (peak where unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+
+def synthetic_movies(count: int, analyzed: bool = True):
+    """Create Movie objects spread over folders, with mixed codecs if analyzed."""
+    codecs = [("h264", "aac"), ("hevc", "ac3"), ("vp9", "opus"), ("h264", "dts")]
+    movies = []
+    for i in range(count):
+        movie = Movie(f"/library/d{i // 100:05d}/movie_{i:07d}.mkv", 1 << 30, i, 1, i)
+        if not analyzed:
+            movies.append(movie)
+            continue
+        movie.video_codec, movie.audio_codec = codecs[i % len(codecs)]
+        movie.is_compatible = SamsungTVCompatibility.is_compatible(
+            movie.video_codec, movie.audio_codec
+        )
+        movies.append(movie)
+    return movies
+
+
+def use_offscreen_if_headless():
+    """Render Qt offscreen when there is no display (Linux servers, CI)."""
+    if sys.platform.startswith("linux") and not os.environ.get("DISPLAY") \
+            and not os.environ.get("WAYLAND_DISPLAY"):
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+
+def _table_trial(kind: str, rows: int, results):
+    """Build one table in a fresh process and report its cost (runs in a child)."""
+    use_offscreen_if_headless()
+
+    from PyQt6.QtCore import Qt
+    from PyQt6.QtGui import QFont
+    from PyQt6.QtWidgets import QApplication, QTableView, QTableWidget, QTableWidgetItem
+    from src.ui.movie_table_model import MovieTableModel
+
+    app = QApplication([])
+    movies = synthetic_movies(rows)
+    baseline = rss_mb()
+    start = time.perf_counter()
+
+    if kind == "QTableWidget":
+        # What MainWindow used to do: a row per found file, then items per result
+        view = QTableWidget()
+        view.setColumnCount(5)
+        for movie in movies:
+            row = view.rowCount()
+            view.insertRow(row)
+            view.setItem(row, 0, QTableWidgetItem(movie.filename))
+            for col in range(1, 5):
+                view.setItem(row, col, QTableWidgetItem("Analyzing..."))
+
+        def update(row, movie):
+            view.setItem(row, 1, QTableWidgetItem(movie.video_codec))
+            view.setItem(row, 2, QTableWidgetItem(movie.audio_codec))
+            item = QTableWidgetItem("✓" if movie.is_compatible else "✗")
+            item.setFont(QFont("Arial", 14, QFont.Weight.Bold))
+            item.setForeground(Qt.GlobalColor.green if movie.is_compatible else Qt.GlobalColor.red)
+            view.setItem(row, 3, item)
+            view.setItem(row, 4, QTableWidgetItem(
+                "Compatible" if movie.is_compatible else
+                SamsungTVCompatibility.get_incompatible_reason(movie.video_codec, movie.audio_codec)
+            ))
+    else:
+        model = MovieTableModel()
+        view = QTableView()
+        view.setModel(model)
+        for movie in movies:
+            model.append_movies([movie])
+
+        def update(row, movie):
+            model.rows_changed(row, row)
+
+    view.resize(1000, 700)
+    view.show()
+    app.processEvents()
+    build = time.perf_counter() - start
+
+    # Per-result update cost, as when analysis results arrive
+    timed = min(rows, 10000)
+    start = time.perf_counter()
+    for row in range(timed):
+        update(row, movies[row])
+    app.processEvents()
+    update_us = (time.perf_counter() - start) / timed * 1e6
+
+    # Every row analyzed, so both tables paint the same content
+    for row in range(timed, rows):
+        update(row, movies[row])
+    app.processEvents()
+    memory = rss_mb() - baseline
+
+    # Frame time while scrolling through the whole table
+    frames = []
+    scrollbar = view.verticalScrollBar()
+    for step in range(40):
+        scrollbar.setValue(scrollbar.maximum() * step // 39)
+        start = time.perf_counter()
+        view.viewport().repaint()
+        frames.append((time.perf_counter() - start) * 1000)
+
+    results.put((build, update_us, memory, percentile(frames, 50), percentile(frames, 99)))
+
+
+def bench_table(args):
+    """Compare QTableWidget items with the MovieTableModel view at several sizes."""
+    context = multiprocessing.get_context("spawn")
+    print_header("Movie table: build time, memory and frame time")
+    for rows in args.rows:
+        for kind in ("QTableWidget", "QTableView+model"):
+            if kind == "QTableWidget" and args.skip_widget_above and rows > args.skip_widget_above:
+                print(f"  {rows:>7d} rows  {kind:17s} skipped")
+                continue
+            results = context.Queue()
+            trial = context.Process(target=_table_trial, args=(kind, rows, results))
+            trial.start()
+            build, update_us, memory, p50, p99 = results.get()
+            trial.join()
+            print(f"  {rows:>7d} rows  {kind:17s} build {build:7.2f}s  "
+                  f"update {update_us:7.1f}us/row  memory +{memory:7.1f}MB  "
+                  f"frame p50={p50:6.2f}ms p99={p99:6.2f}ms")
+    return 0
+
+
+def bench_ui_latency(args):
+    """Measure event-loop latency while analysis results stream into the table."""
+    use_offscreen_if_headless()
+
+    from PyQt6.QtCore import QEventLoop, QThread, QTimer, Qt, pyqtSignal
+    from PyQt6.QtWidgets import QApplication, QTableView
+    from src.ui.main_window import CodecWorker
+    from src.ui.movie_table_model import MovieTableModel
+
+    app = QApplication.instance() or QApplication([])
+
+    class InstantProber:
+        """Stands in for ffprobe so the UI is the bottleneck."""
+
+        def probe(self, filepath):
+            if args.probe_ms:
+                time.sleep(args.probe_ms / 1000)
+            return {"video_codec": "h264", "audio_codec": "aac"}
+
+    class PerResultWorker(CodecWorker):
+        """CodecWorker reporting each result with its own queued signal."""
+
+        progress = pyqtSignal(Movie)
+
+        def _apply_codec_info(self, movie, codec_info):
+            super()._apply_codec_info(movie, codec_info)
+            self.results.pop()
+            self.progress.emit(movie)
+
+    def trial(batched: bool):
+        movies = synthetic_movies(args.files, analyzed=False)
+        model = MovieTableModel(movies)
+        view = QTableView()
+        view.setModel(model)
+        view.resize(1000, 700)
+        view.show()
+        app.processEvents()
+
+        worker_class = CodecWorker if batched else PerResultWorker
+        worker = worker_class(list(movies), workers=args.workers, prober=InstantProber())
+        thread = QThread()
+        worker.moveToThread(thread)
+        loop = QEventLoop()
+
+        if batched:
+            def apply_results():
+                taken = worker.take_results()
+                rows = [row for row in map(model.row_of, (m.filepath for m in taken))
+                        if row is not None]
+                if rows:
+                    model.rows_changed(min(rows), max(rows))
+
+            results_timer = QTimer()
+            results_timer.setInterval(50)
+            results_timer.timeout.connect(apply_results)
+            results_timer.start()
+            worker.finished.connect(apply_results)
+        else:
+            def on_result(movie):
+                # Row lookup used before the path index
+                for row, shown in enumerate(model.movies):
+                    if shown.filename == movie.filename:
+                        model.rows_changed(row, row)
+                        break
+
+            worker.progress.connect(on_result)
+        worker.finished.connect(loop.quit)
+
+        # A 10 ms heartbeat; lateness shows how long the loop was blocked
+        lateness = []
+        last = [time.perf_counter()]
+
+        def heartbeat():
+            now = time.perf_counter()
+            lateness.append(max(0.0, (now - last[0]) * 1000 - 10))
+            last[0] = now
+
+        probe_timer = QTimer()
+        probe_timer.setTimerType(Qt.TimerType.PreciseTimer)
+        probe_timer.setInterval(10)
+        probe_timer.timeout.connect(heartbeat)
+        probe_timer.start()
+
+        thread.started.connect(worker.run)
+        start = time.perf_counter()
+        thread.start()
+        loop.exec()
+        elapsed = time.perf_counter() - start
+        probe_timer.stop()
+        thread.quit()
+        thread.wait()
+        view.close()
+        return elapsed, lateness
+
+    print_header(f"Event loop latency while analyzing {args.files} files")
+    for label, batched in (("signal per result", False), ("batched (50 ms)", True)):
+        elapsed, lateness = trial(batched)
+        print(f"  {label:18s} total {elapsed:7.2f}s  "
+              f"latency p50={percentile(lateness, 50):7.1f}ms  "
+              f"p99={percentile(lateness, 99):7.1f}ms  "
+              f"max={max(lateness, default=0):7.1f}ms")
+    return 0
+
+
+def bench_convert(args):
+    """Compare one-at-a-time batch conversion with the parallel scheduler."""
+    files = load_files(args)
+    plans = []
+    for path in files:
+        info = FFmpegAnalyzer.get_codec_info(path)
+        if info and not SamsungTVCompatibility.is_compatible(
+                info.get("video_codec"), info.get("audio_codec")):
+            plans.append((path, ConversionPlanner.plan(info, os.path.getsize(path))))
+    if not plans:
+        print(f"No incompatible video files found in {args.folder}")
+        return 1
+
+    budget = args.threads or os.cpu_count() or 1
+    kinds = {}
+    for _, plan in plans:
+        kinds[plan.summary()] = kinds.get(plan.summary(), 0) + 1
+    print_header(f"Batch conversion: {len(plans)} files, {budget} threads")
+    print("  " + ", ".join(f"{count} {label}" for label, count in kinds.items()))
+
+    output_dir = tempfile.mkdtemp(prefix="moovy_convert_")
+    try:
+        trials = [
+            ("sequential", ConversionScheduler(budget, heavy_jobs=1, light_jobs=0)),
+            (f"{args.jobs}+{args.light_jobs} jobs",
+             ConversionScheduler(budget, args.jobs, args.light_jobs)),
+        ]
+        for label, scheduler in trials:
+            jobs = [
+                ConversionJob(path, os.path.join(output_dir, f"{index}{plan.extension}"), plan)
+                for index, (path, plan) in enumerate(plans)
+            ]
+            stats = scheduler.run(jobs)
+            for job in jobs:
+                if os.path.exists(job.output_path):
+                    os.remove(job.output_path)
+            print(f"  {label:14s} {stats.seconds:7.2f}s  {stats.fps:7.1f} fps  "
+                  f"{stats.jobs_per_hour:8.0f} jobs/hour  failed={stats.failed}")
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+    return 0
+
+
+def output_stats(path: str):
+    """Duration, video frame count and audio-minus-video start offset of a file."""
+    result = subprocess.run(
+        [
+            FFmpegAnalyzer._find_ffprobe() or "ffprobe", "-v", "error",
+            "-count_packets",
+            "-show_entries", "stream=codec_type,start_time,nb_read_packets:format=duration",
+            "-of", "json",
+            path
+        ],
+        capture_output=True,
+        text=True
+    )
+    data = json.loads(result.stdout or "{}")
+    starts = {}
+    frames = 0
+    for stream in data.get("streams", []):
+        kind = stream.get("codec_type")
+        if kind in ("video", "audio") and kind not in starts:
+            starts[kind] = float(stream.get("start_time") or 0)
+            if kind == "video":
+                frames = int(stream.get("nb_read_packets") or 0)
+    offset = starts["audio"] - starts["video"] if len(starts) == 2 else None
+    return float(data.get("format", {}).get("duration") or 0), frames, offset
+
+
+def bench_segments(args):
+    """Compare one ffmpeg process with segment-parallel encoding of one file."""
+    info = FFmpegAnalyzer.get_codec_info(args.file)
+    if not info or not info.get("duration"):
+        print(f"Could not probe {args.file}")
+        return 1
+    plan = ConversionPlanner.plan(info, os.path.getsize(args.file))
+    if plan.video != "transcode":
+        # The point is to measure the video encode, so force one
+        plan = plan._replace(video="transcode")
+
+    threads = args.threads or os.cpu_count() or 1
+    print_header(f"Segmented encoding: {os.path.basename(args.file)}, "
+                 f"{info['duration']:.0f} s, {threads} threads")
+    duration, frames, offset = output_stats(args.file)
+    print(f"  {'source':14s} {'':>8s}  {duration:8.2f}s  {frames:7d} frames  "
+          f"a/v offset {offset if offset is None else f'{offset * 1000:+.1f} ms'}")
+
+    output_dir = tempfile.mkdtemp(prefix="moovy_segments_")
+    try:
+        baseline = None
+        for segments in [1] + args.segments:
+            output = os.path.join(output_dir, f"{segments}{plan.extension}")
+            start = time.perf_counter()
+            ok = FFmpegAnalyzer.convert_to_compatible_format(
+                args.file, output, plan=plan, threads=threads, segments=segments
+            )
+            elapsed = time.perf_counter() - start
+            label = "one process" if segments == 1 else f"{segments} segments"
+            if not ok:
+                print(f"  {label:14s} failed")
+                continue
+            duration, frames, offset = output_stats(output)
+            baseline = baseline or elapsed
+            print(f"  {label:14s} {elapsed:7.2f}s  {duration:8.2f}s  {frames:7d} frames  "
+                  f"a/v offset {offset if offset is None else f'{offset * 1000:+.1f} ms'}  "
+                  f"{baseline / elapsed:5.2f}x")
+            os.remove(output)
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+    return 0
+
+
+def bench_profiles(args):
+    """Encode a sample cut with each encoding profile and project the batch time."""
+    info = FFmpegAnalyzer.get_codec_info(args.file)
+    if not info or not info.get("duration"):
+        print(f"Could not probe {args.file}")
+        return 1
+    ffmpeg_path = shutil.which("ffmpeg")
+    if not ffmpeg_path:
+        print("ffmpeg not found in PATH")
+        return 1
+
+    # Video the batch has to encode, in pixel-seconds, and the time of the
+    # stream copies and audio-only conversions around it
+    pixels = (info.get("width") or 0) * (info.get("height") or 0) or \
+        ConversionPlanner.PIXELS_1080P
+    batch_files = 1
+    video_work = info["duration"] * pixels
+    light_seconds = 0.0
+    if args.folder:
+        batch_files = 0
+        video_work = 0.0
+        for path in load_files(args):
+            file_info = FFmpegAnalyzer.get_codec_info(path)
+            if not file_info or SamsungTVCompatibility.is_compatible(
+                    file_info.get("video_codec"), file_info.get("audio_codec")):
+                continue
+            batch_files += 1
+            plan = ConversionPlanner.plan(file_info, os.path.getsize(path))
+            if plan.video == "transcode":
+                file_pixels = (file_info.get("width") or 0) * (file_info.get("height") or 0) or \
+                    ConversionPlanner.PIXELS_1080P
+                video_work += (file_info.get("duration") or 0) * file_pixels
+            else:
+                light_seconds += plan.estimated_seconds or 0
+        if not batch_files:
+            print(f"No incompatible video files found in {args.folder}")
+            return 1
+
+    settings = Settings.load()
+    profiles = [EncodingProfiles.from_settings(settings, name) for name in args.profiles]
+    sample_dir = tempfile.mkdtemp(prefix="moovy_profiles_")
+    try:
+        # A stream-copied cut from the middle, where the content is typical
+        length = min(args.sample, info["duration"])
+        sample = os.path.join(sample_dir, "sample.mkv")
+        subprocess.run(
+            [ffmpeg_path, "-v", "error", "-y",
+             "-ss", f"{max(0.0, (info['duration'] - length) / 2):.3f}",
+             "-i", args.file, "-t", f"{length:.3f}",
+             "-map", "0:v:0", "-map", "0:a:0?", "-c", "copy", sample],
+            check=True
+        )
+        sample_info = FFmpegAnalyzer.get_codec_info(sample) or info
+        length = sample_info.get("duration") or length
+
+        print_header(f"Encoding profiles: {length:.0f} s sample of "
+                     f"{os.path.basename(args.file)}")
+        print(f"  Projecting a batch of {batch_files} file(s) "
+              f"({format_duration(video_work / ConversionPlanner.PIXELS_1080P)} of 1080p-equivalent video)")
+        for profile in profiles:
+            # Always encode the video, even if this file could be copied
+            plan = ConversionPlanner.plan(sample_info, os.path.getsize(sample), profile)
+            plan = plan._replace(video="transcode", audio="transcode")
+            output = os.path.join(sample_dir, f"{profile.name}{plan.extension}")
+            updates = []
+            start = time.perf_counter()
+            ok = FFmpegAnalyzer.convert_to_compatible_format(
+                sample, output, on_progress=updates.append, plan=plan, threads=args.threads
+            )
+            elapsed = time.perf_counter() - start
+            if not ok:
+                print(f"  {profile.describe():50s} failed")
+                continue
+
+            frames = updates[-1].frame if updates else 0
+            bitrate = os.path.getsize(output) * 8 / length / 1000
+            # Pixel-seconds encoded per second of wall time
+            rate = length * pixels / elapsed
+            projected = video_work / rate + light_seconds
+            print(f"  {profile.describe():50s} {frames / elapsed:7.1f} fps  "
+                  f"{bitrate:7.0f} kb/s  batch {format_duration(projected)}")
+            os.remove(output)
+    finally:
+        shutil.rmtree(sample_dir, ignore_errors=True)
+    return 0
+
+
+def main(argv=None) -> int:
+    """Benchmark entry point."""
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    probe = subparsers.add_parser("probe-workers", help="ffprobe throughput by pool size")
+    probe.add_argument("folder", help="Folder of sample video files")
+    probe.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8, 16])
+    probe.add_argument("--limit", type=int, help="Only probe the first N files")
+    probe.set_defaults(func=bench_probe_workers)
+
+    modes = subparsers.add_parser("probe-modes", help="full vs fast probe latency")
+    modes.add_argument("folder", help="Folder of sample video files")
+    modes.add_argument("--limit", type=int, help="Only probe the first N files")
+    modes.set_defaults(func=bench_probe_modes)
+
+    backends = subparsers.add_parser("probe-backends", help="native parser vs ffprobe")
+    backends.add_argument("folder", help="Folder of sample video files")
+    backends.add_argument("--limit", type=int, help="Only probe the first N files")
+    backends.set_defaults(func=bench_probe_backends)
+
+    pipeline = subparsers.add_parser("pipeline", help="scan-then-probe vs pipelined")
+    pipeline.add_argument("folder", help="Folder (or drive) to scan")
+    pipeline.add_argument("--workers", type=int, default=8)
+    pipeline.add_argument("--backlog", type=int, default=256)
+    pipeline.add_argument("--ffprobe-only", action="store_true",
+                          help="Skip the native container parser")
+    pipeline.set_defaults(func=bench_pipeline)
+
+    locality = subparsers.add_parser("locality", help="cold-cache probes: name vs disk order")
+    locality.add_argument("folder", help="Folder of sample video files (on a spinning disk)")
+    locality.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    locality.add_argument("--limit", type=int, help="Only probe the first N files")
+    locality.add_argument("--ffprobe-only", action="store_true",
+                          help="Skip the native container parser")
+    locality.set_defaults(func=bench_locality)
+
+    scan = subparsers.add_parser("scan", help="scanner entries/sec on a synthetic tree")
+    scan.add_argument("--files", type=int, default=100000,
+                      help="Size of the synthetic tree (default: %(default)s)")
+    scan.add_argument("--folder", help="Scan an existing folder instead")
+    scan.add_argument("--threads", type=int, nargs="*", default=[4, 16],
+                      help="Thread counts for the parallel scanner")
+    scan.set_defaults(func=bench_scan)
+
+    compat = subparsers.add_parser("compat", help="compatibility checks per second by profile")
+    compat.add_argument("--files", type=int, default=200000,
+                        help="Synthetic probe results to check (default: %(default)s)")
+    compat.set_defaults(func=bench_compat)
+
+    table = subparsers.add_parser("table", help="QTableWidget vs model/view at scale")
+    table.add_argument("--rows", type=int, nargs="+", default=[10000, 100000, 500000])
+    table.add_argument("--skip-widget-above", type=int,
+                       help="Don't build QTableWidgets larger than this (they can take minutes)")
+    table.set_defaults(func=bench_table)
+
+    latency = subparsers.add_parser("ui-latency", help="event-loop latency during analysis")
+    latency.add_argument("--files", type=int, default=50000)
+    latency.add_argument("--workers", type=int, default=8)
+    latency.add_argument("--probe-ms", type=float, default=0.0,
+                         help="Simulated time per probe (default: instant)")
+    latency.set_defaults(func=bench_ui_latency)
+
+    convert = subparsers.add_parser("convert", help="sequential vs parallel batch conversion")
+    convert.add_argument("folder", help="Folder of sample video files")
+    convert.add_argument("--jobs", type=int, default=2, help="Concurrent video transcodes")
+    convert.add_argument("--light-jobs", type=int, default=2,
+                         help="Extra slots for remuxes and audio-only conversions")
+    convert.add_argument("--threads", type=int, help="Thread budget (default: CPUs)")
+    convert.add_argument("--limit", type=int, help="Only convert the first N files")
+    convert.set_defaults(func=bench_convert)
+
+    segments = subparsers.add_parser("segments", help="one ffmpeg vs segment-parallel encoding")
+    segments.add_argument("file", help="Long sample video file")
+    segments.add_argument("--segments", type=int, nargs="+", default=[2, 4, 8])
+    segments.add_argument("--threads", type=int, help="Thread budget (default: CPUs)")
+    segments.set_defaults(func=bench_segments)
+
+    profiles = subparsers.add_parser("profiles", help="encode speed and size of each profile")
+    profiles.add_argument("file", help="Sample video file")
+    profiles.add_argument("--folder", help="Project the batch time for this folder "
+                                           "(default: just the file)")
+    profiles.add_argument("--limit", type=int, help="Only project the first N files")
+    profiles.add_argument("--profiles", nargs="+", choices=EncodingProfiles.NAMES,
+                          default=list(EncodingProfiles.BUILTIN))
+    profiles.add_argument("--sample", type=float, default=30.0,
+                          help="Seconds of video to encode (default: %(default)s)")
+    profiles.add_argument("--threads", type=int, help="ffmpeg threads (default: automatic)")
+    profiles.set_defaults(func=bench_profiles)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -36,6 +36,7 @@ python -m PyInstaller \
     --name Moovy \
     --icon=src/icons/icon.ico \
     --add-data "src/icons:src/icons" \
+    --add-data "src/profiles:src/profiles" \
     --windowed \
     --osx-bundle-identifier "com.moovy.app" \
     --target-architecture universal2 \
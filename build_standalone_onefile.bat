@@ -36,6 +36,7 @@ REM Build using PyInstaller with --onefile and comprehensive dependencies
     --name Moovy ^
     --icon=src/icons/icon.ico ^
     --add-data "src/icons;src/icons" ^
+    --add-data "src/profiles;src/profiles" ^
     --windowed ^
     --noupx ^
     --collect-all PyQt6 ^
@@ -1,10 +1,13 @@
 """Main entry point for Moovy application."""
 
 import sys
+import argparse
 import logging
 
 from PyQt6.QtWidgets import QApplication
 from src.ui.main_window import MainWindow
+from src.utils.encoding_profiles import EncodingProfiles
+from src.utils.settings import Settings
 
 
 def setup_logging():
@@ -15,12 +18,81 @@ def setup_logging():
     )
 
 
+def parse_args(argv):
+    """Parse command line options.
+    
+    Args:
+        argv: Command line arguments (without the program name)
+        
+    Returns:
+        Tuple of (parsed options, remaining arguments for Qt)
+    """
+    parser = argparse.ArgumentParser(description="Moovy - Movie Codec Analyzer")
+    parser.add_argument(
+        "--settings",
+        help="Path to settings file (default: %(default)s)",
+        default=Settings.default_path()
+    )
+    parser.add_argument(
+        "--probe-workers",
+        type=int,
+        help="Number of ffprobe processes to run concurrently"
+    )
+    parser.add_argument(
+        "--scan-threads",
+        type=int,
+        help="Number of directory-reading threads (use more for network shares)"
+    )
+    parser.add_argument(
+        "--conversion-jobs",
+        type=int,
+        help="Number of video transcodes to run concurrently in batch conversion"
+    )
+    parser.add_argument(
+        "--encode-segments",
+        type=int,
+        help="Split each video transcode into this many segments encoded in parallel"
+    )
+    parser.add_argument(
+        "--encoding-profile",
+        choices=EncodingProfiles.NAMES,
+        help="Encoder settings for conversions (custom reads custom_encoding from the settings)"
+    )
+    return parser.parse_known_args(argv)
+
+
+def load_settings(args) -> Settings:
+    """Load settings and apply command line overrides.
+    
+    Args:
+        args: Parsed command line options
+        
+    Returns:
+        Settings object
+    """
+    settings = Settings.load(args.settings)
+    if args.probe_workers:
+        settings.set("probe_workers", args.probe_workers)
+    if args.scan_threads:
+        settings.set("scan_threads", args.scan_threads)
+    if args.conversion_jobs:
+        settings.set("conversion_jobs", args.conversion_jobs)
+    if args.encode_segments is not None:
+        settings.set("encode_segments", args.encode_segments)
+    if args.encoding_profile:
+        settings.set("encoding_profile", args.encoding_profile)
+    return settings
+
+
 def main():
     """Main application entry point."""
     setup_logging()
     
-    app = QApplication(sys.argv)
-    window = MainWindow()
+    args, qt_args = parse_args(sys.argv[1:])
+    settings = load_settings(args)
+    
+    app = QApplication(sys.argv[:1] + qt_args)
+    window = MainWindow(settings)
     window.show()
     
     sys.exit(app.exec())
@@ -1,23 +1,49 @@
 """Movie data model."""
 
+from typing import Optional, Tuple
+
 
 class Movie:
     """Represents a movie file with codec information."""
 
-    def __init__(self, filepath: str):
+    def __init__(self, filepath: str, size: Optional[int] = None,
+                 mtime_ns: Optional[int] = None, device: Optional[int] = None,
+                 inode: Optional[int] = None):
         """Initialize a movie object.
         
         Args:
             filepath: Full path to the movie file
+            size: File size in bytes, if known from the scan
+            mtime_ns: Modification time in nanoseconds, if known from the scan
+            device: Device ID (st_dev), if known from the scan
+            inode: Inode number (st_ino), if known from the scan
         """
         self.filepath = filepath
         self.filename = filepath.split("\\")[-1] if "\\" in filepath else filepath.split("/")[-1]
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.device = device
+        self.inode = inode
         self.video_codec = None
         self.audio_codec = None
+        self.media_info = None  # Full probe result (container, duration, ...)
+        self.integrity = None  # IntegrityResult, once the file has been decode-checked
+        self.duplicate_of = None  # Path of an identical file kept instead of this one
         self.is_compatible = False
         self.is_analyzing = False
         self.error = None
 
+    @property
+    def identity(self) -> Optional[Tuple[int, int, int, int]]:
+        """File identity (size, mtime_ns, device, inode) recorded by the scan.
+        
+        Returns:
+            Identity tuple, or None if the movie wasn't created from a scan entry
+        """
+        if self.size is None:
+            return None
+        return (self.size, self.mtime_ns, self.device, self.inode)
+    
     def __repr__(self) -> str:
         """String representation of the movie."""
         return f"Movie(filename='{self.filename}', video={self.video_codec}, audio={self.audio_codec})"
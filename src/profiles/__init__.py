@@ -0,0 +1 @@
+"""Device profiles (playback rules of TVs and players)."""
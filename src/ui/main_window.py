@@ -1,88 +1,328 @@
 """Main application window UI."""
 
+import logging
 import os
 import sys
 import threading
 import platform
 import subprocess
 import string
+import tempfile
+import uuid
+from collections import deque
 from pathlib import Path
-from typing import Optional, List
+from typing import Dict, Iterable, Optional, List
 
 from PyQt6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-    QPushButton, QTableWidget, QTableWidgetItem, QFileDialog,
+    QPushButton, QTableView, QFileDialog,
     QMenu, QMessageBox, QLabel, QProgressBar, QDialog,
-    QLineEdit, QMenuBar
+    QLineEdit, QMenuBar, QCheckBox, QDialogButtonBox
 )
-from PyQt6.QtCore import Qt, QThread, pyqtSignal, QObject, QSize
-from PyQt6.QtGui import QIcon, QFont, QAction
+from PyQt6.QtCore import Qt, QThread, pyqtSignal, QObject, QSize, QTimer
+from PyQt6.QtGui import QIcon, QFont, QAction, QActionGroup
 
 from src.models.movie import Movie
+from src.ui.movie_table_model import MovieTableModel
+from src.utils.conversion_planner import ConversionPlan, ConversionPlanner, format_duration
+from src.utils.conversion_journal import ConversionJournal
+from src.utils.conversion_scheduler import ConversionJob, ConversionScheduler
+from src.utils.device_limits import DeviceLimits
+from src.utils.device_profiles import DeviceProfiles
+from src.utils.duplicate_finder import DuplicateFinder
+from src.utils.encoding_profiles import EncodingProfile, EncodingProfiles
 from src.utils.ffmpeg_analyzer import FFmpegAnalyzer
 from src.utils.samsung_compatibility import SamsungTVCompatibility
-from src.utils.file_scanner import FileScanner
+from src.utils.file_scanner import FileScanner, ScanDelta
+from src.utils.integrity_checker import IntegrityChecker, IntegrityResult
+from src.utils.load_governor import LoadGovernor
+from src.utils.locality import LocalityOrder
+from src.utils.media_prober import MediaProber
+from src.utils.output_targets import OutputTarget, OutputTargets
+from src.utils.pipeline import PipelineQueue
+from src.utils.probe_cache import ProbeCache
+from src.utils.probe_pool import ProbePool
+from src.utils.process_output import RotatingLog, job_log_path
+from src.utils.scan_index import ScanIndex
+from src.utils.segmented_encoder import SegmentedEncoder
+from src.utils.staging_cache import StagingCache
+from src.utils.settings import Settings
+
+logger = logging.getLogger(__name__)
 
 
 class CodecWorker(QObject):
     """Worker thread for analyzing video codecs."""
     
     finished = pyqtSignal()
-    progress = pyqtSignal(Movie)
     error = pyqtSignal(str)
     
-    def __init__(self, movies: List[Movie]):
+    def __init__(self, movies: Iterable[Movie], workers: int = 1,
+                 cache: Optional[ProbeCache] = None,
+                 prober: Optional[MediaProber] = None,
+                 device_limits: Optional[DeviceLimits] = None,
+                 locality: bool = False):
         """Initialize worker.
         
         Args:
-            movies: List of Movie objects to analyze
+            movies: Movie objects to analyze - a list, or a PipelineQueue
+                that a running scan is still filling
+            workers: Number of ffprobe processes to run concurrently
+            cache: Optional probe cache; only new or modified files are probed
+            prober: Probe backends to use (defaults to native parser + fast ffprobe)
+            device_limits: Optional caps on concurrent probes per storage device
+            locality: Probe each device's files in on-disk order (see LocalityOrder)
         """
         super().__init__()
         self.movies = movies
+        self.cache = cache
+        self.prober = prober or MediaProber()
+        self.pool = ProbePool(
+            workers, probe_fn=self._probe, device_limits=device_limits,
+            device_of=lambda movie: movie.device,
+            order_key=(lambda movie: LocalityOrder.key(movie.filepath, movie.inode))
+            if locality else None
+        )
+        self.emitted = 0
+        # Cache hits are applied on the pool's feeder thread, probe results
+        # on this worker's thread; both count in emitted
+        self._lock = threading.Lock()
+        # Analyzed movies waiting for the UI; collected with take_results()
+        # rather than one queued signal per file
+        self.results = deque()
+    
+    def cancel(self):
+        """Stop starting new probes."""
+        self.pool.cancel()
+    
+    def take_results(self) -> List[Movie]:
+        """Remove and return the movies analyzed since the last call.
+        
+        Returns:
+            Analyzed movies in completion order
+        """
+        return [self.results.popleft() for _ in range(len(self.results))]
+    
+    def _probe(self, movie: Movie):
+        """Probe a movie's file and store the result in the cache."""
+        codec_info = self.prober.probe(movie.filepath)
+        if codec_info and self.cache:
+            self.cache.put(movie.filepath, codec_info, identity=movie.identity)
+        return codec_info
+    
+    def _apply_codec_info(self, movie: Movie, codec_info):
+        """Update a movie from probe results and report it.
+        
+        Args:
+            movie: Movie that was analyzed
+            codec_info: Result of the probe, or None if it failed
+        """
+        if codec_info:
+            movie.video_codec = codec_info["video_codec"]
+            movie.audio_codec = codec_info["audio_codec"]
+            movie.media_info = codec_info
+            movie.error = None
+            
+            # Check compatibility with the active device profile
+            movie.is_compatible = SamsungTVCompatibility.is_compatible(
+                movie.video_codec, movie.audio_codec, codec_info
+            )
+        else:
+            movie.error = "Failed to analyze codec information"
+        
+        movie.is_analyzing = False
+        with self._lock:
+            self.emitted += 1
+        self.results.append(movie)
+    
+    def _uncached_movies(self):
+        """Yield movies without a valid cached result, reporting cache hits directly."""
+        for movie in self.movies:
+            if self.pool.cancelled:
+                return
+            movie.is_analyzing = True
+            codec_info = None
+            if self.cache:
+                codec_info = self.cache.get(movie.filepath, identity=movie.identity)
+            if codec_info:
+                self._apply_codec_info(movie, codec_info)
+            else:
+                yield movie
     
     def run(self):
         """Run codec analysis for all movies."""
         try:
-            for movie in self.movies:
-                movie.is_analyzing = True
-                
-                # Get codec information
-                codec_info = FFmpegAnalyzer.get_codec_info(movie.filepath)
-                
-                if codec_info:
-                    movie.video_codec = codec_info["video_codec"]
-                    movie.audio_codec = codec_info["audio_codec"]
-                    
-                    # Check Samsung TV compatibility
-                    movie.is_compatible = SamsungTVCompatibility.is_compatible(
-                        movie.video_codec, movie.audio_codec
-                    )
-                else:
-                    movie.error = "Failed to analyze codec information"
-                
-                movie.is_analyzing = False
-                self.progress.emit(movie)
+            # Probes run concurrently; results arrive in completion order
+            results = self.pool.imap_unordered(self._uncached_movies())
+            for movie, codec_info in results:
+                self._apply_codec_info(movie, codec_info)
             
             self.finished.emit()
         except Exception as e:
             self.error.emit(f"Analysis error: {str(e)}")
 
 
+class IntegrityWorker(QObject):
+    """Worker thread for decode-checking movies in the background."""
+    
+    finished = pyqtSignal(int, int)  # (files checked, damaged files)
+    error = pyqtSignal(str)
+    
+    def __init__(self, movies: List[Movie], workers: int = 1,
+                 cache: Optional[ProbeCache] = None,
+                 device_limits: Optional[DeviceLimits] = None,
+                 locality: bool = False):
+        """Initialize worker.
+        
+        Args:
+            movies: Analyzed movies to check
+            workers: Number of files decoded at once
+            cache: Optional probe cache; files checked before and unchanged
+                since are not decoded again
+            device_limits: Optional caps on concurrent checks per storage device
+            locality: Check each device's files in on-disk order (see LocalityOrder)
+        """
+        super().__init__()
+        self.movies = movies
+        self.cache = cache
+        self.pool = ProbePool(
+            workers, probe_fn=self._check, device_limits=device_limits,
+            device_of=lambda movie: movie.device,
+            order_key=(lambda movie: LocalityOrder.key(movie.filepath, movie.inode))
+            if locality else None
+        )
+        self.checked = 0
+        self.damaged = 0
+        self.processes = set()
+        self._lock = threading.Lock()
+        # Checked movies waiting for the UI; collected with take_results()
+        self.results = deque()
+    
+    def cancel(self):
+        """Stop the pass, killing the checks in progress."""
+        self.pool.cancel()
+        with self._lock:
+            for process in self.processes:
+                if process.poll() is None:
+                    process.kill()
+    
+    def take_results(self) -> List[Movie]:
+        """Remove and return the movies checked since the last call."""
+        return [self.results.popleft() for _ in range(len(self.results))]
+    
+    def _add_process(self, process):
+        """Remember a running check, stopping it at once if already cancelled."""
+        with self._lock:
+            self.processes.add(process)
+            if self.pool.cancelled:
+                process.kill()
+    
+    def _check(self, movie: Movie) -> Optional[IntegrityResult]:
+        """Decode-check a movie's file and store the result in the cache."""
+        result = IntegrityChecker.check(movie.filepath, movie.media_info,
+                                        on_process=self._add_process)
+        with self._lock:
+            self.processes = {p for p in self.processes if p.poll() is None}
+        # A killed check says nothing about the file
+        if self.pool.cancelled:
+            return None
+        if result and self.cache:
+            self.cache.put_integrity(movie.filepath, result._asdict(), identity=movie.identity)
+        return result
+    
+    def _apply_result(self, movie: Movie, result: IntegrityResult):
+        """Record a movie's result and report it."""
+        movie.integrity = result
+        # Cached results are applied on the pool's feeder thread, new ones
+        # on this worker's thread
+        with self._lock:
+            self.checked += 1
+            if not result.ok:
+                self.damaged += 1
+        self.results.append(movie)
+    
+    def _unchecked_movies(self):
+        """Yield movies without a valid cached result, reporting cached ones directly."""
+        for movie in self.movies:
+            if self.pool.cancelled:
+                return
+            cached = None
+            if self.cache:
+                cached = self.cache.get_integrity(movie.filepath, identity=movie.identity)
+            if cached:
+                self._apply_result(movie, IntegrityResult(**cached))
+            else:
+                yield movie
+    
+    def run(self):
+        """Check all movies."""
+        try:
+            results = self.pool.imap_unordered(self._unchecked_movies())
+            for movie, result in results:
+                if result:
+                    self._apply_result(movie, result)
+            self.finished.emit(self.checked, self.damaged)
+        except Exception as e:
+            self.error.emit(f"Integrity check error: {str(e)}")
+
+
+class DuplicateWorker(QObject):
+    """Worker thread for finding identical copies among the scanned movies."""
+    
+    progress = pyqtSignal(int, int)  # (files hashed, files to hash)
+    finished = pyqtSignal(object)  # Groups of identical file paths
+    error = pyqtSignal(str)
+    
+    def __init__(self, movies: List[Movie]):
+        """Initialize worker.
+        
+        Args:
+            movies: Scanned movies to compare
+        """
+        super().__init__()
+        self.files = [(movie.filepath, movie.size) for movie in movies]
+        self.cancelled = False
+    
+    def cancel(self):
+        """Stop hashing."""
+        self.cancelled = True
+    
+    def run(self):
+        """Find the duplicates."""
+        try:
+            groups = DuplicateFinder.find(
+                self.files, self.progress.emit, lambda: self.cancelled
+            )
+            self.finished.emit(groups)
+        except Exception as e:
+            self.error.emit(f"Duplicate search error: {str(e)}")
+
+
 class ScanWorker(QObject):
     """Worker thread for scanning folders."""
     
-    file_found = pyqtSignal(str)
-    finished = pyqtSignal(list)
+    file_found = pyqtSignal(Movie)
+    finished = pyqtSignal(int)  # number of files found
     error = pyqtSignal(str)
     
-    def __init__(self, folder_path: str):
+    def __init__(self, roots: List[str], probe_queue: Optional[PipelineQueue] = None,
+                 threads: int = 1, index: Optional[ScanIndex] = None):
         """Initialize scanner.
         
         Args:
-            folder_path: Path to folder to scan
+            roots: Folders or drives to scan into one result stream
+            probe_queue: Optional queue feeding a running CodecWorker; each
+                movie is handed over as soon as it is found
+            threads: Number of directory-reading threads; more than one
+                scans in parallel (in no particular order)
+            index: Optional directory index, refreshed when the scan
+                completes so a later quick rescan can reuse the listings
         """
         super().__init__()
-        self.folder_path = folder_path
+        self.roots = roots
+        self.probe_queue = probe_queue
+        self.threads = threads
+        self.index = index
         self.cancelled = False
     
     def cancel(self):
@@ -92,89 +332,328 @@ class ScanWorker(QObject):
     def run(self):
         """Run folder scan."""
         try:
-            if self.cancelled:
-                self.finished.emit([])
-                return
+            found = 0
+            roots = FileScanner._distinct_roots(self.roots)
+            records = {} if self.index else None
+            if self.threads > 1 or len(roots) > 1:
+                entries = FileScanner.iter_video_files_parallel(
+                    roots, self.threads, is_cancelled=lambda: self.cancelled,
+                    records=records
+                )
+            else:
+                entries = FileScanner.iter_video_files(
+                    roots[0] if roots else "", is_cancelled=lambda: self.cancelled,
+                    records=records
+                )
+            for entry in entries:
+                if self.cancelled:
+                    break
+                
+                # Stat data from the walk travels with the movie
+                movie = Movie(entry.path, entry.size, entry.mtime_ns, entry.device, entry.inode)
+                found += 1
+                self.file_found.emit(movie)
+                
+                if self.probe_queue:
+                    # Blocks while the probe stage is behind (backpressure)
+                    self.probe_queue.put(movie, is_cancelled=lambda: self.cancelled)
             
-            video_files = FileScanner.scan_folder(
-                self.folder_path,
-                on_file_found=lambda f: self.file_found.emit(f) if not self.cancelled else None
-            )
+            # Only a complete walk is a valid baseline for quick rescans
+            if self.index and not self.cancelled:
+                try:
+                    self.index.replace(roots, records)
+                except Exception as e:
+                    logger.warning(f"Could not update scan index: {e}")
             
-            if not self.cancelled:
-                self.finished.emit(video_files)
-            else:
-                self.finished.emit([])
+            self.finished.emit(0 if self.cancelled else found)
         except Exception as e:
             if not self.cancelled:
                 self.error.emit(f"Scan error: {str(e)}")
+        finally:
+            # Closed after finished is emitted so the scan result is handled first
+            if self.probe_queue:
+                self.probe_queue.close()
+
+
+class RescanWorker(QObject):
+    """Worker thread for quick rescans against the directory index."""
+    
+    finished = pyqtSignal(object)  # ScanDelta, or None if cancelled
+    error = pyqtSignal(str)
+    
+    def __init__(self, roots: List[str], index: ScanIndex):
+        """Initialize rescanner.
+        
+        Args:
+            roots: Folders scanned previously
+            index: Directory index holding the previous listings
+        """
+        super().__init__()
+        self.roots = roots
+        self.index = index
+        self.cancelled = False
+    
+    def cancel(self):
+        """Cancel the rescan; the index is left unchanged."""
+        self.cancelled = True
+    
+    def run(self):
+        """Run quick rescan, combining the changes under every root."""
+        try:
+            deltas = []
+            for root in FileScanner._distinct_roots(self.roots):
+                delta = FileScanner.rescan_folder(
+                    root, self.index, is_cancelled=lambda: self.cancelled
+                )
+                if delta is None:
+                    self.finished.emit(None)
+                    return
+                deltas.append(delta)
+            
+            self.finished.emit(ScanDelta(
+                [entry for d in deltas for entry in d.added],
+                [entry for d in deltas for entry in d.changed],
+                [path for d in deltas for path in d.removed],
+                sum(d.total for d in deltas),
+                sum(d.directories_listed for d in deltas),
+                sum(d.directories_reused for d in deltas)
+            ))
+        except Exception as e:
+            self.error.emit(f"Rescan error: {str(e)}")
+
+
+class ConversionWorker(QObject):
+    """Worker thread for converting a single video."""
+    
+    progress = pyqtSignal(object)  # ConversionProgress
+    finished = pyqtSignal(bool)  # success
+    
+    def __init__(self, input_file: str, output_file: str, plan: ConversionPlan,
+                 segments: int = 0, log_path: Optional[str] = None):
+        """Initialize conversion worker.
+        
+        Args:
+            input_file: Path to input video file
+            output_file: Path to output video file
+            plan: Conversion plan
+            segments: Segments a video transcode is split into (0 = off)
+            log_path: Optional file for ffmpeg's full output
+        """
+        super().__init__()
+        self.input_file = input_file
+        self.output_file = output_file
+        self.plan = plan
+        self.segments = segments
+        self.log_path = log_path
+        self.processes = []
+        self.cancelled = False
+        self._lock = threading.Lock()
+    
+    def _add_process(self, process):
+        """Remember an ffmpeg process, stopping it at once if already cancelled."""
+        with self._lock:
+            self.processes.append(process)
+            if self.cancelled:
+                process.kill()
+    
+    def cancel(self):
+        """Terminate ffmpeg; its partial output is removed."""
+        with self._lock:
+            self.cancelled = True
+            for process in self.processes:
+                if process.poll() is None:
+                    process.kill()
+    
+    def run(self):
+        """Run the conversion."""
+        success = FFmpegAnalyzer.convert_to_compatible_format(
+            self.input_file,
+            self.output_file,
+            on_progress=self.progress.emit,
+            plan=self.plan,
+            on_process=self._add_process,
+            segments=self.segments,
+            log_path=self.log_path
+        )
+        self.finished.emit(success)
 
 
 class BatchConversionWorker(QObject):
     """Worker thread for batch converting multiple videos."""
     
-    progress = pyqtSignal(int, str)  # (current_file, total_files, filename)
+    progress = pyqtSignal(int, int, str, str)  # (started_files, total_files, filename, description)
     file_finished = pyqtSignal(str, bool)  # (filename, success)
+    job_progress = pyqtSignal(str, object)  # (filename, ConversionProgress)
+    batch_progress = pyqtSignal(float, object)  # (percent, seconds left or None)
+    throughput = pyqtSignal(float, float)  # (encode fps, jobs per hour), before finished
+    governor_state = pyqtSignal(bool, str)  # (held, status text) after each load check
     finished = pyqtSignal(int, int)  # (succeeded, failed)
     error = pyqtSignal(str)
     
-    def __init__(self, movies: List[Movie], output_dir: str):
+    def __init__(self, jobs: List[ConversionJob],
+                 journal: Optional[ConversionJournal] = None,
+                 thread_budget: Optional[int] = None, heavy_jobs: int = 1,
+                 light_jobs: int = 2, segments: int = 0, log_dir: Optional[str] = None,
+                 device_limits: Optional[DeviceLimits] = None,
+                 governor: Optional[LoadGovernor] = None,
+                 staging: Optional[StagingCache] = None):
         """Initialize batch conversion worker.
         
         Args:
-            movies: List of incompatible Movie objects to convert
-            output_dir: Directory to save converted files
+            jobs: Conversions to run (see make_jobs())
+            journal: Journal the jobs are recorded in, so unfinished ones can
+                be resumed after a restart
+            thread_budget: ffmpeg threads shared by the running conversions
+                (defaults to the number of CPUs)
+            heavy_jobs: Video transcodes to run at once
+            light_jobs: Extra slots for remuxes and audio-only conversions
+            segments: Segments each video transcode is split into (0 = off)
+            log_dir: Folder for a rotating ffmpeg log per job (None = no logs)
+            device_limits: Optional caps on concurrent jobs per storage device
+            governor: Optional load governor that runs the conversions at low
+                priority and holds them while the machine is busy
+            staging: Optional cache of local copies for files on slow storage
         """
         super().__init__()
-        self.movies = movies
-        self.output_dir = output_dir
+        self.jobs = jobs
+        self.journal = journal
+        self.scheduler = ConversionScheduler(thread_budget, heavy_jobs, light_jobs, segments,
+                                             log_dir, device_limits, governor=governor,
+                                             staging=staging)
         self.succeeded = 0
         self.failed = 0
     
+    @staticmethod
+    def make_jobs(movies: List[Movie], output_dir: str,
+                  plans: Optional[Dict[str, List[ConversionPlan]]] = None,
+                  profile: Optional[EncodingProfile] = None,
+                  targets: Optional[List[OutputTarget]] = None) -> List[ConversionJob]:
+        """Create a conversion job for each movie.
+        
+        Every target gets its own output file, but one job writes them all
+        so the source is read and decoded only once.
+        
+        Args:
+            movies: List of incompatible Movie objects to convert
+            output_dir: Directory to save converted files
+            plans: Conversion plan per target for each file path (planned
+                from each movie's probe results if not given)
+            profile: Encoder settings for files planned here
+            targets: Devices to convert for (defaults to OutputTargets.TV)
+            
+        Returns:
+            Jobs with unique output paths
+        """
+        plans = plans or {}
+        targets = targets or [OutputTargets.TV]
+        reserved = set()
+        jobs = []
+        for movie in movies:
+            movie_plans = plans.get(movie.filepath) or [
+                ConversionPlanner.plan(movie.media_info, movie.size, profile, target)
+                for target in targets
+            ]
+            outputs = [
+                (BatchConversionWorker._output_path(movie, output_dir, plan, reserved), plan)
+                for plan in movie_plans
+            ]
+            (output_path, plan), extra_outputs = outputs[0], outputs[1:]
+            jobs.append(ConversionJob(movie.filepath, output_path, plan,
+                                      extra_outputs=extra_outputs))
+        return jobs
+    
+    @staticmethod
+    def _output_path(movie: Movie, output_dir: str, plan: ConversionPlan,
+                     reserved: set) -> str:
+        """Pick an unused output path for a movie.
+        
+        Args:
+            movie: Movie to convert
+            output_dir: Directory to save converted files
+            plan: Its conversion plan (picks the container and, from its
+                target, the file name suffix)
+            reserved: Paths already given to other jobs in this batch
+            
+        Returns:
+            Output file path
+        """
+        suffix = OutputTargets.get(plan.target).suffix
+        input_path = Path(movie.filepath).with_suffix(plan.extension)
+        output_path = os.path.join(
+            output_dir, input_path.with_stem(input_path.stem + suffix).name
+        )
+        
+        # Handle duplicate filenames
+        counter = 1
+        while output_path in reserved or os.path.exists(output_path):
+            output_path = os.path.join(
+                output_dir,
+                input_path.with_stem(f"{input_path.stem}{suffix}_{counter}").name
+            )
+            counter += 1
+        reserved.add(output_path)
+        return output_path
+    
+    def cancel(self):
+        """Stop the batch, terminating running conversions."""
+        self.scheduler.cancel()
+    
+    def shutdown(self):
+        """Stop the batch because the app is closing; it resumes on next start."""
+        self.scheduler.shutdown()
+    
+    def pause(self):
+        """Pause the batch."""
+        self.scheduler.pause()
+    
+    def resume(self):
+        """Resume a paused batch."""
+        self.scheduler.resume()
+    
     def run(self):
         """Run batch conversion."""
         try:
-            total = len(self.movies)
+            jobs = self.jobs
+            total = len(jobs)
+            journal = self.journal
+            started = 0
             
-            for idx, movie in enumerate(self.movies):
-                current = idx + 1
-                self.progress.emit(current, total)
-                
-                try:
-                    # Generate output filename
-                    input_path = Path(movie.filepath)
-                    output_filename = input_path.with_stem(input_path.stem + "_converted").name
-                    output_path = os.path.join(self.output_dir, output_filename)
-                    
-                    # Handle duplicate filenames
-                    counter = 1
-                    base_output = output_path
-                    while os.path.exists(output_path):
-                        output_path = os.path.join(
-                            self.output_dir,
-                            input_path.with_stem(
-                                f"{input_path.stem}_converted_{counter}"
-                            ).name
-                        )
-                        counter += 1
-                    
-                    # Perform conversion
-                    success = FFmpegAnalyzer.convert_to_compatible_format(
-                        movie.filepath,
-                        output_path
-                    )
-                    
-                    if success:
-                        self.succeeded += 1
-                        self.file_finished.emit(movie.filename, True)
-                    else:
-                        self.failed += 1
-                        self.file_finished.emit(movie.filename, False)
-                
-                except Exception as e:
-                    self.failed += 1
-                    self.file_finished.emit(movie.filename, False)
+            def filename(job: ConversionJob) -> str:
+                return os.path.basename(job.input_path)
             
+            def on_started(job: ConversionJob):
+                nonlocal started
+                started += 1
+                if journal:
+                    journal.started(job)
+                self.progress.emit(
+                    started, total, filename(job),
+                    f"{job.summary()}, {job.threads} thread(s)"
+                )
+            
+            def on_finished(job: ConversionJob):
+                if job.cancelled:
+                    return
+                if journal:
+                    journal.finished(job)
+                self.file_finished.emit(filename(job), job.success)
+            
+            def on_progress(job: ConversionJob):
+                self.job_progress.emit(filename(job), job.progress)
+                self.batch_progress.emit(*self.scheduler.batch_progress(jobs))
+            
+            def on_governor(reason: Optional[str], status: str):
+                self.governor_state.emit(reason is not None, status)
+            
+            stats = self.scheduler.run(jobs, on_started, on_finished, on_progress, on_governor)
+            self.succeeded = stats.succeeded
+            self.failed = stats.failed
+            
+            # Cancelled jobs are dropped; interrupted ones stay pending
+            if journal and not self.scheduler.interrupted:
+                journal.cancelled(job for job in jobs if job.cancelled or job.success is None)
+            
+            self.throughput.emit(stats.fps, stats.jobs_per_hour)
             self.finished.emit(self.succeeded, self.failed)
         
         except Exception as e:
@@ -184,16 +663,24 @@ class BatchConversionWorker(QObject):
 class ConversionDialog(QDialog):
     """Dialog for converting video to compatible format."""
     
-    def __init__(self, parent, input_file: str):
+    def __init__(self, parent, input_file: str, plan: Optional[ConversionPlan] = None,
+                 segments: int = 0, log_dir: Optional[str] = None):
         """Initialize conversion dialog.
         
         Args:
             parent: Parent widget
             input_file: Path to input video file
+            plan: Conversion plan (defaults to transcoding both streams)
+            segments: Segments a video transcode is split into (0 = off)
+            log_dir: Optional folder for a log of ffmpeg's output
         """
         super().__init__(parent)
         self.input_file = input_file
+        self.plan = plan or ConversionPlanner.plan(None)
+        self.segments = segments
+        self.log_dir = log_dir
         self.output_file = None
+        self.conversion_thread = None
         self.init_ui()
     
     def init_ui(self):
@@ -207,6 +694,11 @@ class ConversionDialog(QDialog):
         input_label = QLabel(f"Input: {os.path.basename(self.input_file)}")
         layout.addWidget(input_label)
         
+        # What will be copied and what transcoded
+        plan_label = QLabel(f"Plan: {self.plan.describe()}")
+        plan_label.setWordWrap(True)
+        layout.addWidget(plan_label)
+        
         # Output file selection
         output_layout = QHBoxLayout()
         output_layout.addWidget(QLabel("Output file:"))
@@ -214,7 +706,9 @@ class ConversionDialog(QDialog):
         
         # Suggest output filename
         input_path = Path(self.input_file)
-        suggested_output = input_path.with_stem(input_path.stem + "_converted").with_suffix(".mp4")
+        suggested_output = input_path.with_stem(input_path.stem + "_converted").with_suffix(
+            self.plan.extension
+        )
         self.output_input.setText(str(suggested_output))
         
         browse_btn = QPushButton("Browse...")
@@ -224,17 +718,23 @@ class ConversionDialog(QDialog):
         output_layout.addWidget(browse_btn)
         layout.addLayout(output_layout)
         
-        # Progress bar
+        # Progress bar (percent of the source duration) and speed/time left
         self.progress_bar = QProgressBar()
+        self.progress_bar.setMaximum(100)
         self.progress_bar.setVisible(False)
         layout.addWidget(self.progress_bar)
+        self.progress_label = QLabel("")
+        self.progress_label.setVisible(False)
+        layout.addWidget(self.progress_label)
         
         # Buttons
         button_layout = QHBoxLayout()
         convert_btn = QPushButton("Convert")
         convert_btn.clicked.connect(self.start_conversion)
+        self.convert_btn = convert_btn
         cancel_btn = QPushButton("Cancel")
         cancel_btn.clicked.connect(self.reject)
+        self.cancel_btn = cancel_btn
         
         button_layout.addWidget(convert_btn)
         button_layout.addWidget(cancel_btn)
@@ -262,7 +762,8 @@ class ConversionDialog(QDialog):
             self,
             "Save Converted Video As",
             str(Path(self.input_file).parent),
-            "MP4 Files (*.mp4);;All Files (*)"
+            "Matroska Files (*.mkv);;All Files (*)" if self.plan.extension == ".mkv"
+            else "MP4 Files (*.mp4);;All Files (*)"
         )
         if file_path:
             self.output_input.setText(file_path)
@@ -287,31 +788,322 @@ class ConversionDialog(QDialog):
         
         self.progress_bar.setVisible(True)
         self.progress_bar.setValue(0)
+        # Without a probed duration there's no percentage; show a busy bar
+        self.progress_bar.setMaximum(100 if self.plan.duration else 0)
+        self.progress_label.setVisible(True)
+        self.progress_label.setText("Starting...")
+        self.convert_btn.setEnabled(False)
         
         # Run conversion in background thread
-        def convert():
-            success = FFmpegAnalyzer.convert_to_compatible_format(
-                self.input_file,
-                self.output_file
+        self.conversion_thread = QThread()
+        log_path = job_log_path(self.log_dir, self.input_file, uuid.uuid4().hex) \
+            if self.log_dir else None
+        self.conversion_worker = ConversionWorker(self.input_file, self.output_file, self.plan,
+                                                  self.segments, log_path)
+        self.conversion_worker.moveToThread(self.conversion_thread)
+        self.conversion_thread.started.connect(self.conversion_worker.run)
+        self.conversion_worker.progress.connect(self.on_progress)
+        self.conversion_worker.finished.connect(self.on_finished)
+        self.conversion_thread.start()
+    
+    def reject(self):
+        """Cancel the running conversion, or close the dialog if there is none."""
+        if self.conversion_thread is None:
+            super().reject()
+            return
+        self.conversion_worker.cancel()
+        self.cancel_btn.setEnabled(False)
+        self.progress_label.setText("Cancelling...")
+    
+    def on_progress(self, progress):
+        """Show conversion progress.
+        
+        Args:
+            progress: Latest ConversionProgress from ffmpeg
+        """
+        if progress.percent is not None:
+            self.progress_bar.setValue(int(progress.percent))
+        self.progress_label.setText(progress.describe())
+    
+    def on_finished(self, success: bool):
+        """Conversion finished.
+        
+        Args:
+            success: Whether ffmpeg succeeded
+        """
+        self.conversion_thread.quit()
+        self.conversion_thread.wait()
+        self.conversion_thread = None
+        self.convert_btn.setEnabled(True)
+        self.cancel_btn.setEnabled(True)
+        
+        if self.conversion_worker.cancelled:
+            super().reject()
+        elif success:
+            QMessageBox.information(
+                self,
+                "Success",
+                f"Video converted successfully!\n{self.output_file}"
             )
-            
-            if success:
-                QMessageBox.information(
-                    self,
-                    "Success",
-                    f"Video converted successfully!\n{self.output_file}"
-                )
-                self.accept()
-            else:
-                QMessageBox.critical(
-                    self,
-                    "Error",
-                    "Failed to convert video. Check that FFmpeg is installed and the file is valid."
-                )
+            self.accept()
+        else:
+            self.progress_bar.setVisible(False)
+            self.progress_label.setVisible(False)
+            QMessageBox.critical(
+                self,
+                "Error",
+                "Failed to convert video. Check that FFmpeg is installed and the file is valid."
+            )
+
+
+class BatchProgressDialog(QDialog):
+    """Shows a running batch conversion, with pause, resume and cancel."""
+    
+    def __init__(self, parent, worker: BatchConversionWorker, total: int,
+                 resumed: bool = False):
+        """Initialize batch progress dialog.
         
-        thread = threading.Thread(target=convert)
-        thread.daemon = True
-        thread.start()
+        Args:
+            parent: Parent widget
+            worker: Batch worker whose signals drive the dialog
+            total: Number of files in the batch
+            resumed: Whether the batch was resumed from an earlier session
+        """
+        super().__init__(parent)
+        self.worker = worker
+        self.total = total
+        self.busy = True
+        self.running = {}  # Filename -> status line, for files being converted
+        self.results_text = ""
+        self.throughput_text = ""
+        self.held = False  # Held by the load governor
+        if resumed:
+            self.title = f"Resuming {total} unfinished conversion(s)..."
+        else:
+            self.title = f"Converting {total} file(s)..."
+        self.init_ui()
+        
+        worker.progress.connect(self.on_progress)
+        worker.job_progress.connect(self.on_job_progress)
+        worker.batch_progress.connect(self.on_batch_progress)
+        worker.file_finished.connect(self.on_file_finished)
+        worker.throughput.connect(self.on_throughput)
+        worker.governor_state.connect(self.on_governor_state)
+        worker.finished.connect(self.on_finished)
+        worker.error.connect(self.on_error)
+    
+    def init_ui(self):
+        """Initialize UI elements."""
+        self.setWindowTitle("Batch Converting Files")
+        self.setGeometry(200, 200, 500, 250)
+        self.setModal(True)
+        
+        layout = QVBoxLayout()
+        
+        # Title
+        self.title_label = QLabel(self.title)
+        layout.addWidget(self.title_label)
+        
+        # Running files, one line each
+        self.current_file_label = QLabel("Starting conversion...")
+        layout.addWidget(self.current_file_label)
+        
+        # Progress bar (percent of the batch's planned work)
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setMaximum(100)
+        self.progress_bar.setValue(0)
+        layout.addWidget(self.progress_bar)
+        
+        # Load governor state (priority, or why the batch is held)
+        self.governor_label = QLabel("")
+        self.governor_label.setStyleSheet("color: #666;")
+        self.governor_label.setVisible(False)
+        layout.addWidget(self.governor_label)
+        
+        # Status list
+        self.status_text = QLabel("")
+        self.status_text.setStyleSheet("border: 1px solid #ccc; padding: 5px;")
+        self.status_text.setMinimumHeight(100)
+        self.status_text.setWordWrap(True)
+        layout.addWidget(self.status_text)
+        
+        # Buttons
+        button_layout = QHBoxLayout()
+        self.pause_btn = QPushButton("Pause")
+        self.pause_btn.setCheckable(True)
+        if not ConversionScheduler.can_suspend():
+            self.pause_btn.setToolTip("Files already converting finish; no new files start")
+        self.pause_btn.toggled.connect(self.toggle_pause)
+        button_layout.addWidget(self.pause_btn)
+        
+        self.cancel_btn = QPushButton("Cancel")
+        self.cancel_btn.clicked.connect(self.reject)
+        button_layout.addWidget(self.cancel_btn)
+        layout.addLayout(button_layout)
+        
+        self.setLayout(layout)
+    
+    def toggle_pause(self, paused: bool):
+        """Pause or resume the batch.
+        
+        Args:
+            paused: Whether the Pause button is now down
+        """
+        if paused:
+            self.worker.pause()
+            self.pause_btn.setText("Resume")
+        else:
+            self.worker.resume()
+            self.pause_btn.setText("Pause")
+        self.show_title()
+    
+    def show_title(self, seconds_left=None):
+        """Show the batch title, with its state or time left."""
+        if self.pause_btn.isChecked():
+            self.title_label.setText(f"{self.title} (paused)")
+        elif self.held:
+            self.title_label.setText(f"{self.title} (held)")
+        elif seconds_left is not None:
+            self.title_label.setText(f"{self.title} {format_duration(seconds_left)} left")
+        else:
+            self.title_label.setText(self.title)
+    
+    def reject(self):
+        """Cancel the batch if it's running, otherwise close the dialog."""
+        if not self.busy:
+            super().reject()
+            return
+        self.worker.cancel()
+        self.cancel_btn.setEnabled(False)
+        self.cancel_btn.setText("Cancelling...")
+        self.pause_btn.setEnabled(False)
+    
+    def show_running(self):
+        """List the files being converted."""
+        self.current_file_label.setText("\n".join(self.running.values()) or "Finishing...")
+    
+    def on_progress(self, current: int, total: int, filename: str, description: str):
+        """A file started (several files may be converting at once)."""
+        self.running[filename] = f"{filename}: starting {current}/{total} ({description})"
+        self.show_running()
+    
+    def on_job_progress(self, filename: str, progress):
+        """Show a running file's percent, speed and time left."""
+        if filename in self.running:
+            self.running[filename] = f"{filename}: {progress.describe()}"
+            self.show_running()
+    
+    def on_batch_progress(self, percent: float, seconds_left):
+        """Show the batch's overall progress and time left."""
+        self.progress_bar.setValue(int(percent))
+        if seconds_left is not None:
+            self.show_title(seconds_left)
+    
+    def on_governor_state(self, held: bool, status: str):
+        """Show whether the load governor holds the batch, and why."""
+        if held != self.held:
+            self.held = held
+            self.show_title()
+        self.governor_label.setText(status)
+        self.governor_label.setVisible(self.busy)
+    
+    def on_throughput(self, fps: float, jobs_per_hour: float):
+        """Remember the batch throughput for the results title."""
+        self.throughput_text = f"{jobs_per_hour:.0f} jobs/hour"
+        if fps:
+            self.throughput_text = f"{fps:.0f} fps encoded, " + self.throughput_text
+    
+    def on_file_finished(self, filename: str, success: bool):
+        """Update file status."""
+        status = "✓ Success" if success else "✗ Failed"
+        self.results_text += f"{filename}: {status}\n"
+        self.status_text.setText(self.results_text)
+        self.running.pop(filename, None)
+        self.show_running()
+    
+    def on_finished(self, succeeded: int, failed: int):
+        """Conversion finished (or was cancelled)."""
+        self.busy = False
+        self.running = {}
+        cancelled = self.total - succeeded - failed
+        
+        if cancelled:
+            self.current_file_label.setText("Conversion Cancelled")
+        else:
+            self.progress_bar.setValue(100)
+            self.current_file_label.setText("Conversion Complete!")
+        
+        results = f"Results: {succeeded} succeeded, {failed} failed"
+        if cancelled:
+            results += f", {cancelled} cancelled"
+        if succeeded or failed:
+            results += f" ({self.throughput_text})"
+        self.title_label.setText(results)
+        
+        self.pause_btn.setVisible(False)
+        self.governor_label.setVisible(False)
+        self.cancel_btn.setEnabled(True)
+        self.cancel_btn.setText("Close")
+    
+    def on_error(self, error_msg: str):
+        """Error occurred."""
+        self.busy = False
+        QMessageBox.critical(
+            self,
+            "Conversion Error",
+            f"Error during batch conversion:\n{error_msg}"
+        )
+        super().reject()
+
+
+class TargetSelectionDialog(QDialog):
+    """Dialog for choosing the devices a batch conversion makes copies for."""
+
+    def __init__(self, parent, selected: List[OutputTarget]):
+        """Initialize target selection dialog.
+
+        Args:
+            parent: Parent widget
+            selected: Targets checked initially
+        """
+        super().__init__(parent)
+        self.setWindowTitle("Conversion Targets")
+        self.setModal(True)
+
+        layout = QVBoxLayout()
+        layout.addWidget(QLabel(
+            "Make a copy of each file for:\n"
+            "(all copies are written while the file is decoded once)"
+        ))
+
+        self.checkboxes = {}
+        for target in OutputTargets.ALL.values():
+            checkbox = QCheckBox(target.label)
+            checkbox.setChecked(target in selected)
+            checkbox.toggled.connect(self.update_buttons)
+            layout.addWidget(checkbox)
+            self.checkboxes[target.name] = checkbox
+
+        self.buttons = QDialogButtonBox(
+            QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel
+        )
+        self.buttons.accepted.connect(self.accept)
+        self.buttons.rejected.connect(self.reject)
+        layout.addWidget(self.buttons)
+
+        self.setLayout(layout)
+        self.update_buttons()
+
+    def update_buttons(self):
+        """Allow OK only while at least one target is checked."""
+        self.buttons.button(QDialogButtonBox.StandardButton.Ok).setEnabled(
+            any(checkbox.isChecked() for checkbox in self.checkboxes.values())
+        )
+
+    def selected_targets(self) -> List[OutputTarget]:
+        """Get the checked targets."""
+        return [OutputTargets.ALL[name] for name, checkbox in self.checkboxes.items()
+                if checkbox.isChecked()]
 
 
 class AboutDialog(QDialog):
@@ -387,14 +1179,37 @@ class AboutDialog(QDialog):
 class MainWindow(QMainWindow):
     """Main application window."""
     
-    def __init__(self):
-        """Initialize main window."""
+    def __init__(self, settings: Optional[Settings] = None):
+        """Initialize main window.
+        
+        Args:
+            settings: Application settings (defaults to the saved settings)
+        """
         super().__init__()
+        self.settings = settings or Settings.load()
+        self._load_device_profiles()
         self.movies: List[Movie] = []
+        self.probe_cache = self._open_probe_cache()
+        self.scan_index = self._open_scan_index()
+        self.device_limits = DeviceLimits(self.settings.get("device_concurrency"))
+        self.prober = None
+        self.probe_queue = None
+        self.codec_worker = None
+        self.codec_thread = None
+        self.integrity_worker = None
+        self.integrity_thread = None
+        self.duplicate_worker = None
+        self.duplicate_thread = None
+        self.results_handled = 0
+        self.scan_roots = []
         self.ffmpeg_path = None
         self.ffmpeg_available = self._check_ffmpeg()
         self.scan_worker = None
         self.scan_thread = None
+        self.batch_worker = None
+        self.batch_thread = None
+        self.staging_cache = None  # Opened by the first batch that uses it
+        self.conversion_journal = self._open_conversion_journal()
         self.cancel_btn = None
         self.init_ui()
         
@@ -427,6 +1242,92 @@ class MainWindow(QMainWindow):
                 "  • Arch: sudo pacman -S ffmpeg\n\n"
                 "After installing, restart this application."
             )
+        else:
+            # Pick up conversions a crash or exit interrupted, once the window is up
+            QTimer.singleShot(0, self.resume_conversions)
+    
+    def _open_probe_cache(self) -> Optional[ProbeCache]:
+        """Open the persistent probe cache if enabled.
+        
+        Returns:
+            ProbeCache, or None if disabled or it could not be opened
+        """
+        if not self.settings.get("probe_cache_enabled"):
+            return None
+        try:
+            return ProbeCache(os.path.join(Settings.config_dir(), "probe_cache.db"))
+        except Exception as e:
+            logger.warning(f"Probe cache unavailable: {e}")
+            return None
+    
+    def _open_scan_index(self) -> Optional[ScanIndex]:
+        """Open the directory index used by quick rescans.
+        
+        Returns:
+            ScanIndex, or None if it could not be opened
+        """
+        try:
+            return ScanIndex(os.path.join(Settings.config_dir(), "scan_index.db"))
+        except Exception as e:
+            logger.warning(f"Scan index unavailable: {e}")
+            return None
+    
+    def _open_conversion_journal(self) -> Optional[ConversionJournal]:
+        """Open the journal of batch conversion jobs.
+        
+        Returns:
+            ConversionJournal, or None if it could not be opened
+        """
+        try:
+            return ConversionJournal(os.path.join(Settings.config_dir(), "conversion_queue.jsonl"))
+        except Exception as e:
+            logger.warning(f"Conversion journal unavailable: {e}")
+            return None
+    
+    def _conversion_log_dir(self) -> Optional[str]:
+        """Get the folder for per-conversion ffmpeg logs, pruning the oldest.
+        
+        Returns:
+            Folder path, or None if conversion logs are turned off
+        """
+        if not self.settings.get("conversion_logs"):
+            return None
+        log_dir = os.path.join(Settings.config_dir(), "logs")
+        if os.path.isdir(log_dir):
+            RotatingLog.prune(log_dir, self.settings.get("conversion_logs_kept"))
+        return log_dir
+    
+    def _load_governor(self) -> Optional[LoadGovernor]:
+        """Create the load governor for a batch.
+        
+        Returns:
+            LoadGovernor, or None if the load_governor setting is null
+        """
+        options = self.settings.get("load_governor")
+        if options is None:
+            return None
+        return LoadGovernor(options, self.settings.get("conversion_windows"))
+    
+    def _open_staging_cache(self) -> Optional[StagingCache]:
+        """Open the staging folder for conversions of files on slow storage.
+        
+        Returns:
+            StagingCache (kept for the session), or None if staging is off
+            or the folder could not be created
+        """
+        if not self.settings.get("staging"):
+            return None
+        if self.staging_cache is None:
+            try:
+                self.staging_cache = StagingCache(
+                    self.settings.get("staging_folder") or tempfile.gettempdir(),
+                    int(self.settings.get("staging_max_gb") * 1024 ** 3),
+                    self.device_limits,
+                    self.settings.get("staging_devices")
+                )
+            except (OSError, TypeError, ValueError) as e:
+                logger.warning(f"Staging folder unavailable: {e}")
+        return self.staging_cache
     
     def _check_ffmpeg(self) -> bool:
         """Check if FFmpeg/FFprobe is available in PATH.
@@ -470,6 +1371,12 @@ class MainWindow(QMainWindow):
         rescan_action.triggered.connect(self.reload_codecs)
         tools_menu.addAction(rescan_action)
         
+        # Scan Drive action
+        drive_action = QAction("Scan Drive...", self)
+        drive_action.setToolTip("Scan one or all drives for video files")
+        drive_action.triggered.connect(self.scan_drive)
+        tools_menu.addAction(drive_action)
+        
         # Batch Convert action
         batch_action = QAction("Batch Convert", self)
         batch_action.setToolTip("Batch convert all incompatible files")
@@ -479,6 +1386,47 @@ class MainWindow(QMainWindow):
         batch_action.triggered.connect(self.batch_convert_incompatible)
         tools_menu.addAction(batch_action)
         
+        # Integrity check action
+        integrity_action = QAction("Check File Integrity", self)
+        integrity_action.setToolTip("Decode every analyzed file to find corrupt or truncated ones")
+        integrity_action.triggered.connect(self.check_integrity)
+        tools_menu.addAction(integrity_action)
+        
+        # Duplicate search action
+        duplicates_action = QAction("Find Duplicates", self)
+        duplicates_action.setToolTip("Find identical copies of files stored under other names")
+        duplicates_action.triggered.connect(self.find_duplicates)
+        tools_menu.addAction(duplicates_action)
+        
+        # Encoding profile for conversions started from now on
+        profile_menu = tools_menu.addMenu("Encoding Profile")
+        profile_group = QActionGroup(self)
+        current_profile = self.encoding_profile().name
+        for name in EncodingProfiles.NAMES:
+            profile = EncodingProfiles.from_settings(self.settings, name)
+            profile_action = QAction(profile.describe(), self)
+            profile_action.setCheckable(True)
+            profile_action.setChecked(name == current_profile)
+            profile_action.triggered.connect(
+                lambda checked, name=name: self.settings.set("encoding_profile", name)
+            )
+            profile_group.addAction(profile_action)
+            profile_menu.addAction(profile_action)
+        
+        # Device the library is checked against (re-checked when changed)
+        device_menu = tools_menu.addMenu("Device Profile")
+        device_group = QActionGroup(self)
+        current_device = DeviceProfiles.active().name
+        for name in DeviceProfiles.names():
+            device_action = QAction(DeviceProfiles.get(name).label, self)
+            device_action.setCheckable(True)
+            device_action.setChecked(name == current_device)
+            device_action.triggered.connect(
+                lambda checked, name=name: self.set_device_profile(name)
+            )
+            device_group.addAction(device_action)
+            device_menu.addAction(device_action)
+        
         # About menu
         about_menu = menubar.addMenu("About")
         
@@ -522,6 +1470,33 @@ class MainWindow(QMainWindow):
         scan_folder_vbox.addWidget(scan_label)
         scan_folder_container.setLayout(scan_folder_vbox)
         
+        # Quick Rescan Button with text
+        rescan_container = QWidget()
+        rescan_vbox = QVBoxLayout()
+        rescan_vbox.setContentsMargins(0, 0, 0, 0)
+        rescan_vbox.setSpacing(2)
+        
+        rescan_btn = QPushButton()
+        rescan_icon_path = get_icon_path('btn_reload.png')
+        if os.path.exists(rescan_icon_path):
+            from PyQt6.QtGui import QIcon as PyQtIcon
+            rescan_btn.setIcon(PyQtIcon(rescan_icon_path))
+            rescan_btn.setIconSize(QSize(32, 32))
+        else:
+            rescan_btn.setText("Rescan")
+        rescan_btn.setToolTip("Quick rescan: re-read only folders that changed since the last scan")
+        rescan_btn.setFixedSize(40, 40)
+        rescan_btn.clicked.connect(self.quick_rescan)
+        rescan_btn.setFlat(True)
+        
+        rescan_label = QLabel("Quick Rescan")
+        rescan_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        rescan_label.setStyleSheet("font-size: 9px;")
+        
+        rescan_vbox.addWidget(rescan_btn)
+        rescan_vbox.addWidget(rescan_label)
+        rescan_container.setLayout(rescan_vbox)
+        
         # Status label with FFmpeg status
         ffmpeg_status = "✓ FFmpeg Ready" if self.ffmpeg_available else "❌ FFmpeg Not Found"
         self.status_label = QLabel(f"Ready - {ffmpeg_status}")
@@ -535,22 +1510,17 @@ class MainWindow(QMainWindow):
         self.cancel_btn.setStyleSheet("QPushButton { background-color: #ff6b6b; color: white; font-weight: bold; }")
         
         toolbar_layout.addWidget(scan_folder_container)
+        toolbar_layout.addWidget(rescan_container)
         toolbar_layout.addWidget(self.cancel_btn)
         toolbar_layout.addStretch()
         toolbar_layout.addWidget(self.status_label)
         
         layout.addLayout(toolbar_layout)
         
-        # Table widget
-        self.table = QTableWidget()
-        self.table.setColumnCount(5)
-        self.table.setHorizontalHeaderLabels([
-            "File Name",
-            "Video Codec",
-            "Audio Codec",
-            "Samsung TV Compatible",
-            "Details"
-        ])
+        # Table view; cells are drawn on demand from the movie list
+        self.table_model = MovieTableModel(self.movies, self)
+        self.table = QTableView()
+        self.table.setModel(self.table_model)
         
         self.table.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
         self.table.customContextMenuRequested.connect(self.show_context_menu)
@@ -567,6 +1537,30 @@ class MainWindow(QMainWindow):
         
         central_widget.setLayout(layout)
         
+        # Status bar with probe cache statistics
+        self.cache_label = QLabel("")
+        self.statusBar().addPermanentWidget(self.cache_label)
+        self.update_cache_stats()
+        
+        # Queue depths are polled while analysis runs
+        self.pipeline_label = QLabel("")
+        self.statusBar().addWidget(self.pipeline_label)
+        self.pipeline_timer = QTimer(self)
+        self.pipeline_timer.setInterval(500)
+        self.pipeline_timer.timeout.connect(self.update_pipeline_stats)
+        
+        # Analysis results are applied to the table in batches
+        self.results_timer = QTimer(self)
+        self.results_timer.setInterval(50)
+        self.results_timer.timeout.connect(self.apply_codec_results)
+        
+        # Integrity check progress, polled while a pass runs
+        self.integrity_label = QLabel("")
+        self.statusBar().addWidget(self.integrity_label)
+        self.integrity_timer = QTimer(self)
+        self.integrity_timer.setInterval(500)
+        self.integrity_timer.timeout.connect(self.apply_integrity_results)
+        
         # Add background to central widget
         bg_path = get_icon_path('bg.jpg')
         if os.path.exists(bg_path):
@@ -576,7 +1570,7 @@ class MainWindow(QMainWindow):
                     background-repeat: no-repeat;
                     background-attachment: fixed;
                 }}
-                QTableWidget {{
+                QTableView {{
                     background-color: rgba(255, 255, 255, 0.95);
                 }}
             """)
@@ -589,13 +1583,36 @@ class MainWindow(QMainWindow):
             return
         
         self.status_label.setText("Scanning folder...")
-        self.table.setRowCount(0)
         self.movies.clear()
+        self.table_model.set_movies(self.movies)
         self.cancel_btn.setVisible(True)
         
+        self.start_scan([folder])
+    
+    def start_scan(self, roots: List[str]):
+        """Start scanning folders, probing files as soon as they are found.
+        
+        Args:
+            roots: Folders or drives to scan
+        """
+        self.scan_roots = roots
+        self.stop_integrity_check()
+        self.stop_duplicate_search()
+        
+        # Found files stream straight into the probe stage through a
+        # bounded queue, so analysis starts without waiting for the walk
+        probe_queue = None
+        if self.ffmpeg_available:
+            probe_queue = PipelineQueue(self.settings.get("pipeline_backlog"))
+        
         # Create and run scanner thread
         self.scan_thread = QThread()
-        self.scan_worker = ScanWorker(folder)
+        self.scan_worker = ScanWorker(
+            roots,
+            probe_queue=probe_queue,
+            threads=self.settings.get("scan_threads"),
+            index=self.scan_index
+        )
         self.scan_worker.moveToThread(self.scan_thread)
         
         self.scan_thread.started.connect(self.scan_worker.run)
@@ -604,6 +1621,87 @@ class MainWindow(QMainWindow):
         self.scan_worker.error.connect(self.on_scan_error)
         
         self.scan_thread.start()
+        
+        if probe_queue:
+            self.analyze_codecs(source=probe_queue)
+    
+    def quick_rescan(self):
+        """Rescan the last scanned folders, updating only what changed."""
+        if not self.scan_roots:
+            self.scan_folder()
+            return
+        
+        busy = [t for t in (self.scan_thread, self.codec_thread) if t and t.isRunning()]
+        if busy:
+            self.status_label.setText("Wait for the current scan to finish before rescanning.")
+            return
+        
+        if not self.scan_index:
+            # No index to compare against - fall back to a full scan
+            self.movies.clear()
+            self.table_model.set_movies(self.movies)
+            self.cancel_btn.setVisible(True)
+            self.start_scan(self.scan_roots)
+            return
+        
+        self.status_label.setText("Checking folders for changes...")
+        self.cancel_btn.setVisible(True)
+        
+        self.scan_thread = QThread()
+        self.scan_worker = RescanWorker(self.scan_roots, self.scan_index)
+        self.scan_worker.moveToThread(self.scan_thread)
+        
+        self.scan_thread.started.connect(self.scan_worker.run)
+        self.scan_worker.finished.connect(self.on_rescan_finished)
+        self.scan_worker.error.connect(self.on_scan_error)
+        
+        self.scan_thread.start()
+    
+    def on_rescan_finished(self, delta: Optional[ScanDelta]):
+        """Apply a quick rescan's changes to the table and probe cache.
+        
+        Args:
+            delta: Changes since the last scan, or None if cancelled
+        """
+        self.scan_thread.quit()
+        self.scan_thread.wait()
+        self.cancel_btn.setVisible(False)
+        
+        if delta is None:
+            return
+        
+        removed = set(delta.removed)
+        if self.probe_cache and removed:
+            self.probe_cache.remove(removed)
+        
+        # Replace changed files' movies; skip files already shown unchanged
+        # (the first quick rescan after an unindexed scan reports everything)
+        positions = {movie.filepath: i for i, movie in enumerate(self.movies)}
+        to_analyze = []
+        for entry in delta.added + delta.changed:
+            movie = Movie(entry.path, entry.size, entry.mtime_ns, entry.device, entry.inode)
+            i = positions.get(entry.path)
+            if i is None:
+                self.movies.append(movie)
+            elif self.movies[i].identity != movie.identity:
+                self.movies[i] = movie
+            else:
+                continue
+            to_analyze.append(movie)
+        
+        if removed or to_analyze:
+            self.movies = [m for m in self.movies if m.filepath not in removed]
+            self.movies.sort(key=lambda movie: movie.filepath)
+            self.table_model.set_movies(self.movies)
+        
+        self.status_label.setText(
+            f"Quick rescan: {len(delta.added)} added, {len(delta.changed)} changed, "
+            f"{len(delta.removed)} removed ({delta.directories_listed} folders read, "
+            f"{delta.directories_reused} unchanged)"
+        )
+        
+        if to_analyze and self.ffmpeg_available:
+            self.analyze_codecs(source=to_analyze)
     
     def scan_drive(self):
         """Scan entire drive for video files."""
@@ -616,10 +1714,12 @@ class MainWindow(QMainWindow):
         
         # Create selection dialog
         if len(drives) == 1:
-            selected_drive = drives[0]
+            selected_drives = drives
         else:
             # Simple selection dialog
+            all_drives_item = "All drives (scanned together)"
             items = [f"{drive} ({self._get_drive_name(drive)})" for drive in drives]
+            items.append(all_drives_item)
             from PyQt6.QtWidgets import QInputDialog
             item, ok = QInputDialog.getItem(
                 self,
@@ -631,7 +1731,11 @@ class MainWindow(QMainWindow):
             )
             if not ok:
                 return
-            selected_drive = drives[items.index(item)]
+            if item == all_drives_item:
+                selected_drives = drives
+            else:
+                selected_drives = [drives[items.index(item)]]
+        selected_drive = ", ".join(selected_drives)
         
         # Warn user about scan time
         reply = QMessageBox.question(
@@ -647,21 +1751,11 @@ class MainWindow(QMainWindow):
             return
         
         self.status_label.setText(f"Scanning drive {selected_drive}...")
-        self.table.setRowCount(0)
         self.movies.clear()
+        self.table_model.set_movies(self.movies)
         self.cancel_btn.setVisible(True)
         
-        # Create and run scanner thread
-        self.scan_thread = QThread()
-        self.scan_worker = ScanWorker(selected_drive)
-        self.scan_worker.moveToThread(self.scan_thread)
-        
-        self.scan_thread.started.connect(self.scan_worker.run)
-        self.scan_worker.file_found.connect(self.on_file_found)
-        self.scan_worker.finished.connect(self.on_scan_finished)
-        self.scan_worker.error.connect(self.on_scan_error)
-        
-        self.scan_thread.start()
+        self.start_scan(selected_drives)
     
     def _get_available_drives(self) -> List[str]:
         """Get list of available drives on the system.
@@ -718,38 +1812,36 @@ class MainWindow(QMainWindow):
         except Exception:
             return drive
     
-    def on_file_found(self, filepath: str):
+    def on_file_found(self, movie: Movie):
         """Handle file found during scan.
         
         Args:
-            filepath: Path to found video file
+            movie: Movie for the found video file
         """
-        movie = Movie(filepath)
-        self.movies.append(movie)
-        
-        # Add row to table
-        row = self.table.rowCount()
-        self.table.insertRow(row)
-        
-        # File name
-        filename_item = QTableWidgetItem(movie.filename)
-        self.table.setItem(row, 0, filename_item)
-        
-        # Placeholder for other columns
-        for col in range(1, 5):
-            self.table.setItem(row, col, QTableWidgetItem("Analyzing..."))
+        self.table_model.append_movies([movie])
     
-    def on_scan_finished(self, video_files: List[str]):
+    def on_scan_finished(self, found: int):
         """Handle scan completion.
         
         Args:
-            video_files: List of found video files
+            found: Number of video files found
         """
         self.scan_thread.quit()
         self.scan_thread.wait()
         self.cancel_btn.setVisible(False)
         
-        if not video_files:
+        # Forget cached results for files deleted since the last scan
+        if self.probe_cache and not self.scan_worker.cancelled:
+            found_paths = {movie.filepath for movie in self.movies}
+            for root in self.scan_roots:
+                self.probe_cache.evict_missing(root, found_paths)
+        
+        # Parallel scans find files in no particular order
+        if self.scan_worker.threads > 1 or len(self.scan_roots) > 1:
+            self.movies.sort(key=lambda movie: movie.filepath)
+            self.table_model.set_movies(self.movies)
+        
+        if not found:
             self.status_label.setText("No video files found in the selected folder.")
             return
         
@@ -763,10 +1855,8 @@ class MainWindow(QMainWindow):
             self.status_label.setText("Ready (FFmpeg required)")
             return
         
-        self.status_label.setText(f"Found {len(video_files)} video files. Analyzing codecs...")
-        
-        # Start codec analysis
-        self.analyze_codecs()
+        # Analysis has been running since the scan started
+        self.status_label.setText(f"Found {found} video files. Analyzing codecs...")
     
     def on_scan_error(self, error_msg: str):
         """Handle scan error.
@@ -780,67 +1870,114 @@ class MainWindow(QMainWindow):
         QMessageBox.critical(self, "Scan Error", error_msg)
         self.status_label.setText("Ready")
     
-    def analyze_codecs(self):
-        """Analyze codecs for all movies."""
+    def analyze_codecs(self, source: Optional[Iterable[Movie]] = None):
+        """Analyze codecs for all movies.
+        
+        Args:
+            source: Movies to analyze - a queue filled by a running scan, or a
+                list such as the files a quick rescan found (defaults to the
+                loaded movies)
+        """
         # Create and run analyzer thread
         self.codec_thread = QThread()
-        self.codec_worker = CodecWorker(self.movies)
+        if self.probe_cache:
+            self.probe_cache.reset_counters()
+        self.prober = MediaProber(
+            native=self.settings.get("native_probe"),
+            fast=self.settings.get("fast_probe")
+        )
+        self.probe_queue = source if isinstance(source, PipelineQueue) else None
+        self.results_handled = 0
+        self.codec_worker = CodecWorker(
+            source if source is not None else list(self.movies),
+            workers=self.settings.get("probe_workers"),
+            cache=self.probe_cache,
+            prober=self.prober,
+            device_limits=self.device_limits,
+            locality=self.settings.get("locality_order")
+        )
         self.codec_worker.moveToThread(self.codec_thread)
         
         self.codec_thread.started.connect(self.codec_worker.run)
-        self.codec_worker.progress.connect(self.on_codec_analyzed)
         self.codec_worker.finished.connect(self.on_analysis_finished)
         self.codec_worker.error.connect(self.on_analysis_error)
         
         self.codec_thread.start()
+        self.pipeline_timer.start()
+        self.results_timer.start()
+    
+    def apply_codec_results(self):
+        """Show the analysis results that arrived since the last call."""
+        if not self.codec_worker:
+            return
+        movies = self.codec_worker.take_results()
+        if not movies:
+            return
+        self.results_handled += len(movies)
+        
+        # One dataChanged for the batch; the view only repaints visible rows
+        rows = [self.table_model.row_of(movie.filepath) for movie in movies]
+        rows = [row for row in rows if row is not None]
+        if rows:
+            self.table_model.rows_changed(min(rows), max(rows))
+        
+        self.update_cache_stats()
     
-    def on_codec_analyzed(self, movie: Movie):
-        """Handle codec analysis for a single movie.
+    def pipeline_depths(self) -> dict:
+        """Get the number of items waiting at each stage of the analysis pipeline.
         
-        Args:
-            movie: Analyzed Movie object
+        Returns:
+            Dictionary with 'scan' (found, waiting for a probe slot), 'probe'
+            (being probed) and 'ui' (analyzed, waiting for the table) counts
         """
-        # Find and update the row
-        for row in range(self.table.rowCount()):
-            if self.table.item(row, 0).text() == movie.filename:
-                # Video codec
-                self.table.setItem(row, 1, QTableWidgetItem(movie.video_codec or "N/A"))
-                
-                # Audio codec
-                self.table.setItem(row, 2, QTableWidgetItem(movie.audio_codec or "N/A"))
-                
-                # Compatibility icon
-                compat_symbol = SamsungTVCompatibility.get_compatibility_icon(movie.is_compatible)
-                compat_item = QTableWidgetItem(compat_symbol)
-                compat_item.setFont(QFont("Arial", 14, QFont.Weight.Bold))
-                
-                if movie.is_compatible:
-                    compat_item.setForeground(Qt.GlobalColor.green)
-                else:
-                    compat_item.setForeground(Qt.GlobalColor.red)
-                
-                self.table.setItem(row, 3, compat_item)
-                
-                # Details
-                if not movie.is_compatible:
-                    reason = SamsungTVCompatibility.get_incompatible_reason(
-                        movie.video_codec, movie.audio_codec
-                    )
-                    self.table.setItem(row, 4, QTableWidgetItem(reason))
-                else:
-                    self.table.setItem(row, 4, QTableWidgetItem("Compatible"))
-                
-                break
+        worker = self.codec_worker
+        return {
+            "scan": self.probe_queue.depth if self.probe_queue else 0,
+            "probe": worker.pool.in_flight if worker else 0,
+            "ui": worker.emitted - self.results_handled if worker else 0,
+        }
+    
+    def update_pipeline_stats(self):
+        """Show pipeline queue depths in the status bar."""
+        depths = self.pipeline_depths()
+        self.pipeline_label.setText(
+            f"Queued: scan {depths['scan']} · probe {depths['probe']} · ui {depths['ui']}"
+        )
+    
+    def update_cache_stats(self):
+        """Show probe cache and probe backend counters in the status bar."""
+        parts = []
+        if self.probe_cache:
+            parts.append(
+                f"Cache: {self.probe_cache.hits} hits / {self.probe_cache.misses} misses"
+            )
+        else:
+            parts.append("Cache: off")
+        if self.prober:
+            parts.append(f"Probes: {self.prober.summary()}")
+        self.cache_label.setText("   ".join(parts))
     
     def on_analysis_finished(self):
         """Handle analysis completion."""
         self.codec_thread.quit()
         self.codec_thread.wait()
+        self.results_timer.stop()
+        self.apply_codec_results()
+        self.pipeline_timer.stop()
+        self.pipeline_label.setText("")
+        self.probe_queue = None
+        self.update_cache_stats()
+        
+        if not self.movies:
+            return
         
         compatible_count = sum(1 for m in self.movies if m.is_compatible)
         self.status_label.setText(
             f"Analysis complete: {compatible_count}/{len(self.movies)} compatible"
         )
+        
+        if self.settings.get("integrity_check"):
+            self.check_integrity()
     
     def on_analysis_error(self, error_msg: str):
         """Handle analysis error.
@@ -850,20 +1987,188 @@ class MainWindow(QMainWindow):
         """
         self.codec_thread.quit()
         self.codec_thread.wait()
+        self.results_timer.stop()
+        self.apply_codec_results()
+        self.pipeline_timer.stop()
+        self.pipeline_label.setText("")
+        self.probe_queue = None
         QMessageBox.critical(self, "Analysis Error", error_msg)
         self.status_label.setText("Ready")
     
+    def check_integrity(self):
+        """Decode-check the analyzed movies at low priority in the background."""
+        if self.integrity_worker or not self.ffmpeg_available:
+            return
+        movies = [m for m in self.movies if m.media_info and m.integrity is None]
+        if not movies:
+            self.integrity_label.setText("Integrity: nothing new to check")
+            return
+        
+        self.integrity_thread = QThread()
+        self.integrity_worker = IntegrityWorker(
+            movies,
+            workers=self.settings.get("integrity_workers"),
+            cache=self.probe_cache,
+            device_limits=self.device_limits,
+            locality=self.settings.get("locality_order")
+        )
+        self.integrity_worker.moveToThread(self.integrity_thread)
+        
+        self.integrity_thread.started.connect(self.integrity_worker.run)
+        self.integrity_worker.finished.connect(self.on_integrity_finished)
+        self.integrity_worker.error.connect(self.on_integrity_error)
+        
+        self.integrity_label.setText(f"Integrity: checking 0/{len(movies)}")
+        self.integrity_thread.start()
+        self.integrity_timer.start()
+    
+    def apply_integrity_results(self):
+        """Show the integrity results that arrived since the last call."""
+        worker = self.integrity_worker
+        if not worker:
+            return
+        movies = worker.take_results()
+        rows = [self.table_model.row_of(movie.filepath) for movie in movies]
+        rows = [row for row in rows if row is not None]
+        if rows:
+            self.table_model.rows_changed(min(rows), max(rows))
+        self.integrity_label.setText(
+            f"Integrity: checking {worker.checked}/{len(worker.movies)}, "
+            f"{worker.damaged} damaged"
+        )
+    
+    def _stop_integrity_thread(self):
+        """Wait for the integrity worker's thread to exit."""
+        self.integrity_timer.stop()
+        if self.integrity_thread:
+            self.integrity_thread.quit()
+            self.integrity_thread.wait()
+        self.integrity_thread = None
+        self.integrity_worker = None
+    
+    def stop_integrity_check(self):
+        """Cancel a running integrity check."""
+        if self.integrity_worker:
+            self.integrity_worker.cancel()
+            self.integrity_label.setText("")
+            self._stop_integrity_thread()
+    
+    def on_integrity_finished(self, checked: int, damaged: int):
+        """Integrity check finished.
+        
+        Args:
+            checked: Number of files checked (or found in the cache)
+            damaged: Number of those that didn't decode cleanly
+        """
+        if not self.integrity_worker:
+            return
+        self.apply_integrity_results()
+        self._stop_integrity_thread()
+        self.integrity_label.setText(f"Integrity: {checked} checked, {damaged} damaged")
+    
+    def on_integrity_error(self, error_msg: str):
+        """Integrity check error.
+        
+        Args:
+            error_msg: Error message
+        """
+        if not self.integrity_worker:
+            return
+        self._stop_integrity_thread()
+        self.integrity_label.setText(error_msg)
+    
+    def find_duplicates(self):
+        """Flag movies that are identical copies of another scanned file."""
+        if self.duplicate_worker:
+            return
+        if not self.movies:
+            QMessageBox.information(self, "Info", "No movies loaded. Please scan a folder first.")
+            return
+        
+        self.duplicate_thread = QThread()
+        self.duplicate_worker = DuplicateWorker(self.movies)
+        self.duplicate_worker.moveToThread(self.duplicate_thread)
+        
+        self.duplicate_thread.started.connect(self.duplicate_worker.run)
+        self.duplicate_worker.progress.connect(self.on_duplicate_progress)
+        self.duplicate_worker.finished.connect(self.on_duplicates_found)
+        self.duplicate_worker.error.connect(self.on_duplicate_error)
+        
+        self.status_label.setText("Looking for duplicates...")
+        self.duplicate_thread.start()
+    
+    def _stop_duplicate_thread(self):
+        """Wait for the duplicate worker's thread to exit."""
+        if self.duplicate_thread:
+            self.duplicate_thread.quit()
+            self.duplicate_thread.wait()
+        self.duplicate_thread = None
+        self.duplicate_worker = None
+    
+    def stop_duplicate_search(self):
+        """Cancel a running duplicate search."""
+        if self.duplicate_worker:
+            self.duplicate_worker.cancel()
+            self._stop_duplicate_thread()
+    
+    def on_duplicate_progress(self, hashed: int, total: int):
+        """Show duplicate search progress.
+        
+        Args:
+            hashed: Files sampled so far
+            total: Files sharing their size with another file
+        """
+        if self.duplicate_worker:
+            self.status_label.setText(f"Looking for duplicates: {hashed}/{total} files compared")
+    
+    def on_duplicates_found(self, groups: List[List[str]]):
+        """Flag all but the first file of each group of identical files.
+        
+        Args:
+            groups: Sorted paths of identical files
+        """
+        if not self.duplicate_worker:
+            return
+        self._stop_duplicate_thread()
+        
+        for movie in self.movies:
+            movie.duplicate_of = None
+        by_path = {movie.filepath: movie for movie in self.movies}
+        flagged = 0
+        for group in groups:
+            for filepath in group[1:]:
+                movie = by_path.get(filepath)
+                if movie:
+                    movie.duplicate_of = group[0]
+                    flagged += 1
+        if self.movies:
+            self.table_model.rows_changed(0, len(self.movies) - 1)
+        self.status_label.setText(
+            f"Found {flagged} duplicate(s) in {len(groups)} group(s); "
+            "duplicates are skipped by batch conversion"
+        )
+    
+    def on_duplicate_error(self, error_msg: str):
+        """Duplicate search error.
+        
+        Args:
+            error_msg: Error message
+        """
+        self._stop_duplicate_thread()
+        QMessageBox.critical(self, "Duplicate Search Error", error_msg)
+        self.status_label.setText("Ready")
+    
     def show_context_menu(self, position):
         """Show context menu for table items.
         
         Args:
             position: Position where menu was requested
         """
-        item = self.table.itemAt(position)
-        if not item:
+        index = self.table.indexAt(position)
+        if not index.isValid():
             return
         
-        row = item.row()
+        row = index.row()
         if row < 0 or row >= len(self.movies):
             return
         
@@ -885,7 +2190,7 @@ class MainWindow(QMainWindow):
         info_action = menu.addAction("View Full Details")
         info_action.triggered.connect(lambda: self.show_movie_details(movie))
         
-        menu.exec(self.table.mapToGlobal(position))
+        menu.exec(self.table.viewport().mapToGlobal(position))
     
     def on_table_double_click(self, index):
         """Handle double-click on table row to launch movie.
@@ -935,7 +2240,10 @@ class MainWindow(QMainWindow):
         Args:
             movie: Movie to convert
         """
-        dialog = ConversionDialog(self, movie.filepath)
+        plan = ConversionPlanner.plan(movie.media_info, movie.size, self.encoding_profile())
+        dialog = ConversionDialog(self, movie.filepath, plan,
+                                  self.settings.get("encode_segments"),
+                                  self._conversion_log_dir())
         dialog.exec()
     
     def open_file_location(self, movie: Movie):
@@ -968,14 +2276,18 @@ Path: {movie.filepath}
 Video Codec: {movie.video_codec or 'N/A'}
 Audio Codec: {movie.audio_codec or 'N/A'}
 
-Samsung TV Compatible: {'Yes ✓' if movie.is_compatible else 'No ✗'}
+{DeviceProfiles.active().label} Compatible: {'Yes ✓' if movie.is_compatible else 'No ✗'}
 
 """
         if not movie.is_compatible:
             reason = SamsungTVCompatibility.get_incompatible_reason(
-                movie.video_codec, movie.audio_codec
+                movie.video_codec, movie.audio_codec, movie.media_info
             )
-            details += f"Issue: {reason}"
+            details += f"Issue: {reason}\n"
+        if movie.integrity is not None:
+            details += f"Integrity: {movie.integrity.describe()}\n"
+        if movie.duplicate_of:
+            details += f"Duplicate of: {movie.duplicate_of}"
         
         QMessageBox.information(self, "Movie Details", details)
     
@@ -990,17 +2302,28 @@ Samsung TV Compatible: {'Yes ✓' if movie.is_compatible else 'No ✗'}
     
     def batch_convert_incompatible(self):
         """Convert all incompatible files in batch."""
-        # Get incompatible movies
+        # Get incompatible movies; identical copies are converted once
         incompatible_movies = [m for m in self.movies if not m.is_compatible]
+        duplicates = sum(1 for m in incompatible_movies if m.duplicate_of)
+        incompatible_movies = [m for m in incompatible_movies if not m.duplicate_of]
         
         if not incompatible_movies:
             QMessageBox.information(
                 self,
                 "No Incompatible Files",
-                "All files in the current list are compatible with Samsung TV."
+                f"All files in the current list are compatible with {DeviceProfiles.active().label}."
             )
             return
         
+        # Ask which devices to make copies for
+        target_dialog = TargetSelectionDialog(
+            self, OutputTargets.from_names(self.settings.get("conversion_targets"))
+        )
+        if target_dialog.exec() != QDialog.DialogCode.Accepted:
+            return
+        targets = target_dialog.selected_targets()
+        self.settings.set("conversion_targets", [target.name for target in targets])
+        
         # Ask for output directory
         output_dir = QFileDialog.getExistingDirectory(
             self,
@@ -1011,13 +2334,28 @@ Samsung TV Compatible: {'Yes ✓' if movie.is_compatible else 'No ✗'}
         if not output_dir:
             return
         
+        # Plan each file and target: copy the streams that already play,
+        # transcode the rest
+        profile = self.encoding_profile()
+        plans = {
+            movie.filepath: [
+                ConversionPlanner.plan(movie.media_info, movie.size, profile, target)
+                for target in targets
+            ]
+            for movie in incompatible_movies
+        }
+        
         # Confirm batch conversion
+        skipped = f"Skipping {duplicates} duplicate file(s).\n\n" if duplicates else ""
         reply = QMessageBox.question(
             self,
             "Confirm Batch Conversion",
-            f"You are about to convert {len(incompatible_movies)} file(s) to Samsung TV compatible format.\n\n"
+            f"You are about to convert {len(incompatible_movies)} file(s) for: "
+            f"{', '.join(target.label for target in targets)}.\n\n"
             f"Output folder: {output_dir}\n\n"
-            "This may take a while depending on file sizes.\n\n"
+            f"{skipped}"
+            f"{self._describe_plans([plan for movie_plans in plans.values() for plan in movie_plans])}\n"
+            f"Encoding profile: {profile.describe()}\n\n"
             "Continue?",
             QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
         )
@@ -1025,107 +2363,180 @@ Samsung TV Compatible: {'Yes ✓' if movie.is_compatible else 'No ✗'}
         if reply != QMessageBox.StandardButton.Yes:
             return
         
-        # Show progress dialog
-        progress_dialog = QDialog(self)
-        progress_dialog.setWindowTitle("Batch Converting Files")
-        progress_dialog.setGeometry(200, 200, 500, 250)
-        progress_dialog.setModal(True)
-        
-        layout = QVBoxLayout()
-        
-        # Title
-        title_label = QLabel(f"Converting {len(incompatible_movies)} file(s)...")
-        layout.addWidget(title_label)
-        
-        # Current file label
-        current_file_label = QLabel("Starting conversion...")
-        layout.addWidget(current_file_label)
-        
-        # Progress bar
-        progress_bar = QProgressBar()
-        progress_bar.setMaximum(len(incompatible_movies))
-        progress_bar.setValue(0)
-        layout.addWidget(progress_bar)
-        
-        # Status list
-        status_text = QLabel("")
-        status_text.setStyleSheet("border: 1px solid #ccc; padding: 5px;")
-        status_text.setMinimumHeight(100)
-        status_text.setWordWrap(True)
-        layout.addWidget(status_text)
-        
-        # Cancel button
-        cancel_btn = QPushButton("Cancel")
-        cancel_btn.setEnabled(False)  # Disable during conversion
-        layout.addWidget(cancel_btn)
-        
-        progress_dialog.setLayout(layout)
+        jobs = BatchConversionWorker.make_jobs(incompatible_movies, output_dir, plans)
+        self.run_batch(jobs)
+    
+    def run_batch(self, jobs: List[ConversionJob], resumed: bool = False):
+        """Run conversion jobs, showing their progress in a dialog.
         
-        # Track results
-        results_text = ""
+        Args:
+            jobs: Conversions to run
+            resumed: Whether the jobs come from the journal of an earlier
+                session (they are already recorded in it)
+        """
+        if self.conversion_journal and not resumed:
+            self.conversion_journal.add(jobs)
         
         # Create and run batch conversion worker
         self.batch_thread = QThread()
-        self.batch_worker = BatchConversionWorker(incompatible_movies, output_dir)
+        self.batch_worker = BatchConversionWorker(
+            jobs,
+            self.conversion_journal,
+            thread_budget=self.settings.get("conversion_threads"),
+            heavy_jobs=self.settings.get("conversion_jobs"),
+            light_jobs=self.settings.get("conversion_light_jobs"),
+            segments=self.settings.get("encode_segments"),
+            log_dir=self._conversion_log_dir(),
+            device_limits=self.device_limits,
+            governor=self._load_governor(),
+            staging=self._open_staging_cache()
+        )
         self.batch_worker.moveToThread(self.batch_thread)
         
-        def on_progress(current, total):
-            """Update progress."""
-            progress_bar.setValue(current - 1)
-            current_file_label.setText(f"Converting file {current}/{total}...")
-        
-        def on_file_finished(filename, success):
-            """Update file status."""
-            nonlocal results_text
-            status = "✓ Success" if success else "✗ Failed"
-            results_text += f"{filename}: {status}\n"
-            status_text.setText(results_text)
-            progress_bar.setValue(progress_bar.value() + 1)
-        
-        def on_finished(succeeded, failed):
-            """Conversion finished."""
+        progress_dialog = BatchProgressDialog(self, self.batch_worker, len(jobs), resumed)
+        
+        self.batch_thread.started.connect(self.batch_worker.run)
+        self.batch_worker.finished.connect(self.on_batch_finished)
+        self.batch_worker.error.connect(self.on_batch_error)
+        
+        self.batch_thread.start()
+        progress_dialog.exec()
+    
+    def _stop_batch_thread(self):
+        """Wait for the finished batch worker's thread to exit."""
+        if self.batch_thread:
             self.batch_thread.quit()
             self.batch_thread.wait()
-            cancel_btn.setEnabled(True)
-            
-            current_file_label.setText("Conversion Complete!")
-            title_label.setText(f"Results: {succeeded} succeeded, {failed} failed")
-            
-            if failed == 0:
-                cancel_btn.setText("Close")
-            else:
-                cancel_btn.setText("Close")
-            
+            self.batch_thread = None
+            self.batch_worker = None
+    
+    def on_batch_finished(self, succeeded: int, failed: int):
+        """Batch conversion finished (or was cancelled).
+        
+        Args:
+            succeeded: Number of files converted
+            failed: Number of files that failed
+        """
+        cancelled = len(self.batch_worker.jobs) - succeeded - failed
+        self._stop_batch_thread()
+        if cancelled:
+            self.status_label.setText(
+                f"Batch conversion cancelled: {succeeded} succeeded, {failed} failed, "
+                f"{cancelled} cancelled"
+            )
+        else:
             self.status_label.setText(
                 f"Batch conversion complete: {succeeded} succeeded, {failed} failed"
             )
+    
+    def on_batch_error(self, error_msg: str):
+        """Batch conversion error.
         
-        def on_error(error_msg):
-            """Error occurred."""
-            self.batch_thread.quit()
-            self.batch_thread.wait()
-            cancel_btn.setEnabled(True)
-            QMessageBox.critical(
-                self,
-                "Conversion Error",
-                f"Error during batch conversion:\n{error_msg}"
-            )
-            progress_dialog.reject()
+        Args:
+            error_msg: Error message
+        """
+        self._stop_batch_thread()
+        self.status_label.setText("Batch conversion failed")
+    
+    def resume_conversions(self):
+        """Resume conversions left unfinished by a crash or by closing the app."""
+        if not self.conversion_journal or self.batch_worker:
+            return
+        jobs = self.conversion_journal.pending()
+        # Segments of encodes interrupted by a crash (none run right now)
+        SegmentedEncoder.remove_stale_work_dirs([
+            os.path.dirname(os.path.abspath(output_path))
+            for job in jobs for output_path, _ in job.outputs
+        ])
+        missing = [job for job in jobs if not os.path.exists(job.input_path)]
+        if missing:
+            self.conversion_journal.cancelled(missing)
+            # Partial output left by a crash; resumed jobs overwrite theirs
+            for job in missing:
+                for output_path, _ in job.outputs:
+                    partial = FFmpegAnalyzer.partial_output_path(output_path)
+                    try:
+                        if os.path.exists(partial):
+                            os.remove(partial)
+                    except OSError as e:
+                        logger.warning(f"Could not remove partial output {partial}: {e}")
+        jobs = [job for job in jobs if job not in missing]
+        if jobs:
+            self.status_label.setText(f"Resuming {len(jobs)} unfinished conversion(s)")
+            self.run_batch(jobs, resumed=True)
+    
+    def closeEvent(self, event):
+        """Stop running conversions before exiting (they resume on next start).
         
-        self.batch_thread.started.connect(self.batch_worker.run)
-        self.batch_worker.progress.connect(on_progress)
-        self.batch_worker.file_finished.connect(on_file_finished)
-        self.batch_worker.finished.connect(on_finished)
-        self.batch_worker.error.connect(on_error)
-        cancel_btn.clicked.connect(progress_dialog.reject)
+        Args:
+            event: Close event
+        """
+        if self.batch_worker:
+            self.batch_worker.shutdown()
+            self._stop_batch_thread()
+        self.stop_integrity_check()
+        self.stop_duplicate_search()
+        if self.staging_cache:
+            self.staging_cache.close()
+        super().closeEvent(event)
+    
+    def _load_device_profiles(self):
+        """Load the shipped and user device profiles and activate the chosen one."""
+        DeviceProfiles.load([
+            DeviceProfiles.BUILTIN_FOLDER,
+            os.path.join(Settings.config_dir(), "profiles")
+        ])
+        DeviceProfiles.set_active(self.settings.get("device_profile"))
+    
+    def set_device_profile(self, name: str):
+        """Check the library against another device, without probing again.
         
-        self.batch_thread.start()
-        progress_dialog.exec()
+        Args:
+            name: Device profile name
+        """
+        profile = DeviceProfiles.set_active(name)
+        self.settings.set("device_profile", profile.name)
+        for movie in self.movies:
+            if movie.media_info:
+                movie.is_compatible = profile.evaluate(movie.media_info).compatible
+        self.table_model.compatibility_changed()
+        
+        compatible_count = sum(1 for m in self.movies if m.is_compatible)
+        self.status_label.setText(
+            f"{profile.label}: {compatible_count}/{len(self.movies)} compatible"
+        )
+    
+    def encoding_profile(self) -> EncodingProfile:
+        """Get the encoder settings chosen for new conversions."""
+        return EncodingProfiles.from_settings(self.settings)
+    
+    def _describe_plans(self, plans: List[ConversionPlan]) -> str:
+        """Summarize a batch's conversion plans and estimated time.
+        
+        Args:
+            plans: Plan for each output in the batch
+            
+        Returns:
+            Text such as "Plan: 12 audio only, 2 full transcode"
+        """
+        counts = {}
+        for plan in plans:
+            counts[plan.summary()] = counts.get(plan.summary(), 0) + 1
+        known = [plan.estimated_seconds for plan in plans if plan.estimated_seconds is not None]
+        
+        text = "Plan: " + ", ".join(f"{count} {label}" for label, count in counts.items())
+        if known:
+            text += f"\nEstimated time: {format_duration(sum(known))}"
+            if len(known) < len(plans):
+                text += f" (plus {len(plans) - len(known)} file(s) of unknown length)"
+        return text
     
     def cancel_scan(self):
         """Cancel the current scan operation."""
         if self.scan_worker and not self.scan_worker.cancelled:
             self.scan_worker.cancel()
+            if self.probe_queue and self.codec_worker:
+                self.codec_worker.cancel()
             self.status_label.setText("Scan cancelled by user")
             self.cancel_btn.setVisible(False)
     
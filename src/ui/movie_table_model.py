@@ -0,0 +1,215 @@
+"""Table model presenting the movie list to a QTableView."""
+
+import os
+from typing import Any, Dict, List, Optional
+
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex
+from PyQt6.QtGui import QBrush, QColor, QFont
+
+from src.models.movie import Movie
+from src.utils.device_profiles import DeviceProfiles
+from src.utils.samsung_compatibility import SamsungTVCompatibility
+
+# data() runs for every role of every visible cell on each repaint, so the
+# roles are compared as plain ints and unused roles return immediately
+_DISPLAY = Qt.ItemDataRole.DisplayRole.value
+_FONT = Qt.ItemDataRole.FontRole.value
+_FOREGROUND = Qt.ItemDataRole.ForegroundRole.value
+_MOVIE = Qt.ItemDataRole.UserRole.value
+_HANDLED_ROLES = frozenset((_DISPLAY, _FONT, _FOREGROUND, _MOVIE))
+
+
+class MovieTableModel(QAbstractTableModel):
+    """Read-only table model backed directly by a list of Movie objects.
+
+    Cells are computed on demand in data(), so the view only ever touches
+    the rows it is painting and no per-cell objects are kept around.
+    """
+
+    HEADERS = [
+        "File Name",
+        "Video Codec",
+        "Audio Codec",
+        "{device} Compatible",  # Named after the active device profile
+        "Details"
+    ]
+
+    FILENAME_COLUMN = 0
+    COMPATIBLE_COLUMN = 3
+    DETAILS_COLUMN = 4
+
+    # Role returning the Movie behind a row
+    MovieRole = Qt.ItemDataRole.UserRole
+
+    def __init__(self, movies: Optional[List[Movie]] = None, parent=None):
+        """Initialize model.
+
+        Args:
+            movies: Movie list to present; the model shows this list object,
+                so changes must go through the model's methods
+            parent: Optional parent QObject
+        """
+        super().__init__(parent)
+        self.movies = movies if movies is not None else []
+        self._rows: Dict[str, int] = {}  # File path -> row
+        self._index_rows(0)
+
+        # Shared by every cell in the compatibility column
+        self._compat_font = QFont("Arial", 14, QFont.Weight.Bold)
+        self._compatible_brush = QBrush(QColor(Qt.GlobalColor.green))
+        self._incompatible_brush = QBrush(QColor(Qt.GlobalColor.red))
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        """Number of movies (the table has no child rows)."""
+        return 0 if parent.isValid() else len(self.movies)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        """Number of columns."""
+        return 0 if parent.isValid() else len(MovieTableModel.HEADERS)
+
+    def headerData(self, section: int, orientation: Qt.Orientation,
+                   role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        """Column titles for the horizontal header."""
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return MovieTableModel.HEADERS[section].format(device=DeviceProfiles.active().label)
+        return super().headerData(section, orientation, role)
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        """Cell text and styling for a movie.
+
+        Args:
+            index: Cell to describe
+            role: Kind of data requested (text, font, colour, movie)
+
+        Returns:
+            Value for the role, or None
+        """
+        role = int(role)
+        if role not in _HANDLED_ROLES or not index.isValid():
+            return None
+
+        row = index.row()
+        if row >= len(self.movies):
+            return None
+        movie = self.movies[row]
+
+        if role == _DISPLAY:
+            return self._display_text(movie, index.column())
+
+        if role == _MOVIE:
+            return movie
+
+        if index.column() == MovieTableModel.COMPATIBLE_COLUMN and self._is_analyzed(movie):
+            if role == _FONT:
+                return self._compat_font
+            return self._compatible_brush if movie.is_compatible else self._incompatible_brush
+
+        return None
+
+    @staticmethod
+    def _is_analyzed(movie: Movie) -> bool:
+        """Whether a movie has analysis results (or a probe error) to show."""
+        return movie.video_codec is not None or movie.error is not None
+
+    def _display_text(self, movie: Movie, column: int) -> str:
+        """Text shown in one cell of a movie's row."""
+        if column == MovieTableModel.FILENAME_COLUMN:
+            return movie.filename
+
+        if not self._is_analyzed(movie):
+            return "Analyzing..."
+
+        if column == 1:
+            return movie.video_codec or "N/A"
+        if column == 2:
+            return movie.audio_codec or "N/A"
+        if column == MovieTableModel.COMPATIBLE_COLUMN:
+            return SamsungTVCompatibility.get_compatibility_icon(movie.is_compatible)
+
+        if movie.is_compatible:
+            details = "Compatible"
+        else:
+            details = SamsungTVCompatibility.get_incompatible_reason(
+                movie.video_codec, movie.audio_codec, movie.media_info
+            )
+        if movie.integrity is not None and not movie.integrity.ok:
+            details = f"⚠ {movie.integrity.describe()} · {details}"
+        if movie.duplicate_of:
+            details = f"Duplicate of {os.path.basename(movie.duplicate_of)} · {details}"
+        return details
+
+    def _index_rows(self, first: int):
+        """Record the row of every movie from a given row onwards."""
+        for row in range(first, len(self.movies)):
+            self._rows[self.movies[row].filepath] = row
+
+    def row_of(self, filepath: str) -> Optional[int]:
+        """Get the row showing a file.
+
+        Args:
+            filepath: Full path of the movie file
+
+        Returns:
+            Row index, or None if the file isn't in the table
+        """
+        return self._rows.get(filepath)
+
+    def movie_at(self, row: int) -> Optional[Movie]:
+        """Get the movie shown in a row.
+
+        Args:
+            row: Table row
+
+        Returns:
+            Movie, or None if the row is out of range
+        """
+        if 0 <= row < len(self.movies):
+            return self.movies[row]
+        return None
+
+    def set_movies(self, movies: List[Movie]):
+        """Show a new (or re-sorted) movie list.
+
+        Args:
+            movies: Movie list to present
+        """
+        self.beginResetModel()
+        self.movies = movies
+        self._rows = {}
+        self._index_rows(0)
+        self.endResetModel()
+
+    def append_movies(self, movies: List[Movie]):
+        """Add movies to the end of the table.
+
+        Args:
+            movies: Movies to append to the model's list
+        """
+        if not movies:
+            return
+        first = len(self.movies)
+        self.beginInsertRows(QModelIndex(), first, first + len(movies) - 1)
+        self.movies.extend(movies)
+        self._index_rows(first)
+        self.endInsertRows()
+
+    def compatibility_changed(self):
+        """Repaint every row's verdict and the column title after the device profile changed."""
+        if self.movies:
+            self.rows_changed(0, len(self.movies) - 1)
+        self.headerDataChanged.emit(
+            Qt.Orientation.Horizontal,
+            MovieTableModel.COMPATIBLE_COLUMN, MovieTableModel.COMPATIBLE_COLUMN
+        )
+
+    def rows_changed(self, first: int, last: int):
+        """Repaint the analysis columns of a range of rows.
+
+        Args:
+            first: First changed row
+            last: Last changed row (inclusive)
+        """
+        self.dataChanged.emit(
+            self.index(first, 1),
+            self.index(last, MovieTableModel.DETAILS_COLUMN)
+        )
@@ -0,0 +1,615 @@
+"""Pure-Python codec detection from MP4/MOV and Matroska/WebM headers."""
+
+import logging
+import math
+import os
+import struct
+from typing import Any, BinaryIO, Dict, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class ContainerParseError(Exception):
+    """Raised when a container header is damaged or not understood."""
+
+
+class ContainerParser:
+    """Reads codec IDs straight from container headers without spawning ffprobe.
+
+    Only the header structures are read, with bounded seeks and reads.
+    Anything unknown or damaged returns None so the caller can fall back
+    to ffprobe. Codec names match what FFmpegAnalyzer reports.
+    """
+
+    MP4_EXTENSIONS = {".mp4", ".m4v", ".mov", ".3gp", ".f4v"}
+    MATROSKA_EXTENSIONS = {".mkv", ".webm"}
+
+    # Never read more than this much header data from one file
+    MAX_HEADER_BYTES = 16 * 1024 * 1024
+
+    # MP4 sample entry FourCC -> ffprobe codec name
+    MP4_CODECS = {
+        b"avc1": "h264", b"avc3": "h264",
+        b"hvc1": "hevc", b"hev1": "hevc",
+        b"mp4v": "mpeg4",
+        b"av01": "av1",
+        b"vp09": "vp9",
+        b"mp4a": "aac",  # refined from the esds object type
+        b".mp3": "mp3",
+        b"ac-3": "ac3",
+        b"ec-3": "eac3",
+        b"Opus": "opus",
+        b"fLaC": "flac",
+        b"alac": "alac",
+        b"sowt": "pcm_s16le",
+        b"twos": "pcm_s16be",
+    }
+
+    # MPEG-4 objectTypeIndication values seen in mp4a esds boxes
+    MP4A_OBJECT_TYPES = {
+        0x40: "aac", 0x66: "aac", 0x67: "aac", 0x68: "aac",
+        0x69: "mp3", 0x6B: "mp3",
+        0xA5: "ac3", 0xA6: "eac3",
+    }
+
+    # Matroska CodecID -> ffprobe codec name
+    MATROSKA_CODECS = {
+        "V_MPEG4/ISO/AVC": "h264",
+        "V_MPEGH/ISO/HEVC": "hevc",
+        "V_MPEG4/ISO/SP": "mpeg4",
+        "V_MPEG4/ISO/ASP": "mpeg4",
+        "V_MPEG4/ISO/AP": "mpeg4",
+        "V_MPEG1": "mpeg1video",
+        "V_MPEG2": "mpeg2video",
+        "V_VP8": "vp8",
+        "V_VP9": "vp9",
+        "V_AV1": "av1",
+        "V_THEORA": "theora",
+        "A_AAC": "aac",
+        "A_AC3": "ac3",
+        "A_EAC3": "eac3",
+        "A_DTS": "dts",
+        "A_MPEG/L3": "mp3",
+        "A_MPEG/L2": "mp2",
+        "A_VORBIS": "vorbis",
+        "A_OPUS": "opus",
+        "A_FLAC": "flac",
+        "A_TRUEHD": "truehd",
+    }
+
+    # H.264 profile_idc -> ffprobe profile name
+    H264_PROFILES = {
+        66: "Baseline", 77: "Main", 88: "Extended", 100: "High",
+        110: "High 10", 122: "High 4:2:2", 244: "High 4:4:4 Predictive",
+    }
+
+    # HEVC general_profile_idc -> ffprobe profile name
+    HEVC_PROFILES = {1: "Main", 2: "Main 10", 3: "Main Still Picture", 4: "Rext"}
+
+    @staticmethod
+    def can_parse(filepath: str) -> bool:
+        """Check if the file extension is handled by the native parser.
+
+        Args:
+            filepath: Path to the file
+
+        Returns:
+            True for MP4/MOV and Matroska/WebM extensions
+        """
+        extension = os.path.splitext(filepath)[1].lower()
+        return (extension in ContainerParser.MP4_EXTENSIONS or
+                extension in ContainerParser.MATROSKA_EXTENSIONS)
+
+    @staticmethod
+    def get_codec_info(filepath: str) -> Optional[Dict[str, Any]]:
+        """Extract codec information from the container header.
+
+        Args:
+            filepath: Path to the video file
+
+        Returns:
+            Codec info dictionary in the same format as
+            FFmpegAnalyzer.get_codec_info, or None if the file is not a
+            supported container, is damaged, or lacks a video/audio codec
+        """
+        try:
+            size = os.path.getsize(filepath)
+            with open(filepath, "rb") as f:
+                magic = f.read(12)
+                f.seek(0)
+                if magic[:4] == b"\x1a\x45\xdf\xa3":
+                    info = ContainerParser._parse_matroska(f, size)
+                elif magic[4:8] in (b"ftyp", b"moov", b"mdat", b"free", b"wide", b"skip"):
+                    info = ContainerParser._parse_mp4(f, size)
+                else:
+                    return None
+        except (OSError, ContainerParseError, struct.error, IndexError, UnicodeDecodeError) as e:
+            logger.debug(f"Native parse failed for {filepath}: {e}")
+            return None
+
+        if not info or not info.get("video_codec") or not info.get("audio_codec"):
+            return None
+
+        duration = info.get("duration")
+        if duration:
+            info["bit_rate"] = int(size * 8 / duration)
+        return info
+
+    # ------------------------------------------------------------------
+    # MP4 / MOV
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _iter_boxes(data: bytes, start: int = 0, end: Optional[int] = None
+                    ) -> Iterator[Tuple[bytes, int, int]]:
+        """Iterate over ISO BMFF boxes in an in-memory buffer.
+
+        Args:
+            data: Buffer holding the boxes
+            start: Offset of the first box
+            end: Offset where the boxes end (defaults to len(data))
+
+        Yields:
+            (box type, payload start, payload end) tuples
+        """
+        end = len(data) if end is None else end
+        pos = start
+        while pos + 8 <= end:
+            size, box_type = struct.unpack_from(">I4s", data, pos)
+            header = 8
+            if size == 1:
+                size = struct.unpack_from(">Q", data, pos + 8)[0]
+                header = 16
+            elif size == 0:
+                size = end - pos
+            if size < header or pos + size > end:
+                raise ContainerParseError(f"Bad box size for {box_type!r}")
+            yield box_type, pos + header, pos + size
+            pos += size
+
+    @staticmethod
+    def _find_box(data: bytes, start: int, end: int, box_type: bytes
+                  ) -> Optional[Tuple[int, int]]:
+        """Find the first child box of a given type.
+
+        Returns:
+            (payload start, payload end), or None if not found
+        """
+        for found_type, payload_start, payload_end in ContainerParser._iter_boxes(data, start, end):
+            if found_type == box_type:
+                return payload_start, payload_end
+        return None
+
+    @staticmethod
+    def _read_moov(f: BinaryIO, size: int) -> bytes:
+        """Locate the moov box by walking top-level box headers and read it.
+
+        Returns:
+            Contents of the moov box payload
+        """
+        pos = 0
+        while pos + 8 <= size:
+            f.seek(pos)
+            header = f.read(16)
+            if len(header) < 8:
+                break
+            box_size, box_type = struct.unpack_from(">I4s", header)
+            header_len = 8
+            if box_size == 1:
+                box_size = struct.unpack_from(">Q", header, 8)[0]
+                header_len = 16
+            elif box_size == 0:
+                box_size = size - pos
+            if box_size < header_len:
+                raise ContainerParseError("Bad top-level box size")
+
+            if box_type == b"moov":
+                payload = box_size - header_len
+                if payload > ContainerParser.MAX_HEADER_BYTES:
+                    raise ContainerParseError("moov box too large")
+                f.seek(pos + header_len)
+                data = f.read(payload)
+                if len(data) < payload:
+                    raise ContainerParseError("Truncated moov box")
+                return data
+            pos += box_size
+
+        raise ContainerParseError("No moov box")
+
+    @staticmethod
+    def _parse_mp4(f: BinaryIO, size: int) -> Dict[str, Any]:
+        """Parse codec information from an MP4/MOV file."""
+        moov = ContainerParser._read_moov(f, size)
+        info: Dict[str, Any] = {
+            "video_codec": None,
+            "audio_codec": None,
+            "container": "mov,mp4,m4a,3gp,3g2,mj2",
+            "duration": None,
+            "width": None,
+            "height": None,
+            "video_profile": None,
+            "video_level": None,
+        }
+
+        mvhd = ContainerParser._find_box(moov, 0, len(moov), b"mvhd")
+        if mvhd:
+            info["duration"] = ContainerParser._mp4_duration(moov, mvhd[0])
+
+        for box_type, start, end in ContainerParser._iter_boxes(moov):
+            if box_type != b"trak":
+                continue
+            mdia = ContainerParser._find_box(moov, start, end, b"mdia")
+            if not mdia:
+                continue
+            hdlr = ContainerParser._find_box(moov, mdia[0], mdia[1], b"hdlr")
+            handler = moov[hdlr[0] + 8:hdlr[0] + 12] if hdlr else b""
+
+            stsd = ContainerParser._find_path(moov, mdia, [b"minf", b"stbl", b"stsd"])
+            if not stsd:
+                continue
+            # stsd payload: version/flags (4), entry count (4), then sample entries
+            entries = list(ContainerParser._iter_boxes(moov, stsd[0] + 8, stsd[1]))
+            if not entries:
+                continue
+            fourcc, entry_start, entry_end = entries[0]
+
+            if handler == b"vide" and not info["video_codec"]:
+                codec = ContainerParser.MP4_CODECS.get(fourcc)
+                if not codec:
+                    raise ContainerParseError(f"Unknown video FourCC {fourcc!r}")
+                info["video_codec"] = codec
+                # VisualSampleEntry: width/height at offset 24, child boxes at 78
+                info["width"], info["height"] = struct.unpack_from(">HH", moov, entry_start + 24)
+                ContainerParser._mp4_video_profile(moov, entry_start + 78, entry_end, info)
+
+            elif handler == b"soun" and not info["audio_codec"]:
+                codec = ContainerParser.MP4_CODECS.get(fourcc)
+                if not codec:
+                    raise ContainerParseError(f"Unknown audio FourCC {fourcc!r}")
+                if fourcc == b"mp4a":
+                    codec = ContainerParser._mp4a_codec(moov, entry_start, entry_end)
+                info["audio_codec"] = codec
+
+        return info
+
+    @staticmethod
+    def _find_path(data: bytes, parent: Tuple[int, int], path) -> Optional[Tuple[int, int]]:
+        """Follow a chain of nested box types below a parent box."""
+        current = parent
+        for box_type in path:
+            current = ContainerParser._find_box(data, current[0], current[1], box_type)
+            if not current:
+                return None
+        return current
+
+    @staticmethod
+    def _mp4_duration(data: bytes, start: int) -> Optional[float]:
+        """Read the movie duration in seconds from an mvhd payload."""
+        version = data[start]
+        if version == 1:
+            timescale, duration = struct.unpack_from(">IQ", data, start + 20)
+        else:
+            timescale, duration = struct.unpack_from(">II", data, start + 12)
+        return duration / timescale if timescale else None
+
+    @staticmethod
+    def _mp4_video_profile(data: bytes, start: int, end: int, info: Dict[str, Any]):
+        """Fill in profile/level from an avcC or hvcC box in a sample entry."""
+        for box_type, payload_start, payload_end in ContainerParser._iter_boxes(data, start, end):
+            if box_type == b"avcC":
+                ContainerParser._avcc_profile(data[payload_start:payload_end], info)
+                return
+            if box_type == b"hvcC":
+                ContainerParser._hvcc_profile(data[payload_start:payload_end], info)
+                return
+
+    @staticmethod
+    def _mp4a_codec(data: bytes, start: int, end: int) -> str:
+        """Identify the codec inside an mp4a sample entry from its esds box."""
+        # AudioSampleEntry: version at offset 8; v0 children at 28, v1 at 44, v2 at 64
+        version = struct.unpack_from(">H", data, start + 8)[0]
+        children = start + {0: 28, 1: 44, 2: 64}.get(version, 28)
+        esds = ContainerParser._find_box(data, children, end, b"esds")
+        if not esds:
+            # QuickTime files wrap esds in a 'wave' box
+            wave = ContainerParser._find_box(data, children, end, b"wave")
+            if wave:
+                esds = ContainerParser._find_box(data, wave[0], wave[1], b"esds")
+        if not esds:
+            raise ContainerParseError("mp4a without esds")
+
+        # Walk descriptors: ES_Descriptor (0x03) -> DecoderConfigDescriptor (0x04)
+        pos = esds[0] + 4
+        while pos < esds[1]:
+            tag = data[pos]
+            pos += 1
+            length = 0
+            for _ in range(4):
+                byte = data[pos]
+                pos += 1
+                length = (length << 7) | (byte & 0x7F)
+                if not byte & 0x80:
+                    break
+            if tag == 0x03:
+                flags = data[pos + 2]
+                pos += 3
+                if flags & 0x80:
+                    pos += 2
+                if flags & 0x40:
+                    pos += 1 + data[pos]
+                if flags & 0x20:
+                    pos += 2
+            elif tag == 0x04:
+                object_type = data[pos]
+                codec = ContainerParser.MP4A_OBJECT_TYPES.get(object_type)
+                if not codec:
+                    raise ContainerParseError(f"Unknown mp4a object type {object_type:#x}")
+                return codec
+            else:
+                pos += length
+        raise ContainerParseError("No DecoderConfigDescriptor in esds")
+
+    # ------------------------------------------------------------------
+    # Matroska / WebM
+    # ------------------------------------------------------------------
+
+    EBML_SEGMENT = 0x18538067
+    EBML_INFO = 0x1549A966
+    EBML_TRACKS = 0x1654AE6B
+    EBML_CLUSTER = 0x1F43B675
+    EBML_TRACK_ENTRY = 0xAE
+    EBML_TRACK_TYPE = 0x83
+    EBML_CODEC_ID = 0x86
+    EBML_CODEC_PRIVATE = 0x63A2
+    EBML_VIDEO = 0xE0
+    EBML_AUDIO = 0xE1
+    EBML_PIXEL_WIDTH = 0xB0
+    EBML_PIXEL_HEIGHT = 0xBA
+    EBML_BIT_DEPTH = 0x6264
+    EBML_TIMECODE_SCALE = 0x2AD7B1
+    EBML_DURATION = 0x4489
+
+    @staticmethod
+    def _read_vint(f: BinaryIO, keep_marker: bool) -> Tuple[int, int]:
+        """Read an EBML variable-length integer from a file.
+
+        Args:
+            f: File positioned at the integer
+            keep_marker: Keep the length marker bit (element IDs keep it)
+
+        Returns:
+            (value, bytes read); value is -1 for the reserved "unknown size"
+        """
+        first = f.read(1)
+        if not first:
+            raise ContainerParseError("Unexpected end of file")
+        byte = first[0]
+        length = 1
+        mask = 0x80
+        while length <= 8 and not byte & mask:
+            mask >>= 1
+            length += 1
+        if length > 8:
+            raise ContainerParseError("Invalid EBML integer")
+
+        rest = f.read(length - 1)
+        if len(rest) < length - 1:
+            raise ContainerParseError("Unexpected end of file")
+        value = byte if keep_marker else byte & (mask - 1)
+        for b in rest:
+            value = (value << 8) | b
+
+        if not keep_marker and value == (1 << (7 * length)) - 1:
+            return -1, length
+        return value, length
+
+    @staticmethod
+    def _iter_ebml(f: BinaryIO, start: int, end: int) -> Iterator[Tuple[int, int, int]]:
+        """Iterate over EBML elements between two file offsets.
+
+        Yields:
+            (element id, data start, data size) tuples; size is -1 if unknown
+        """
+        pos = start
+        while pos < end:
+            f.seek(pos)
+            element_id, id_len = ContainerParser._read_vint(f, keep_marker=True)
+            size, size_len = ContainerParser._read_vint(f, keep_marker=False)
+            data_start = pos + id_len + size_len
+            yield element_id, data_start, size
+            if size < 0:
+                return
+            pos = data_start + size
+
+    @staticmethod
+    def _read_element(f: BinaryIO, start: int, size: int) -> bytes:
+        """Read an element's data, refusing oversized elements."""
+        if size < 0 or size > ContainerParser.MAX_HEADER_BYTES:
+            raise ContainerParseError("EBML element too large")
+        f.seek(start)
+        data = f.read(size)
+        if len(data) < size:
+            raise ContainerParseError("Truncated EBML element")
+        return data
+
+    @staticmethod
+    def _ebml_uint(data: bytes) -> int:
+        """Decode an EBML unsigned integer."""
+        return int.from_bytes(data, "big") if data else 0
+
+    @staticmethod
+    def _parse_matroska(f: BinaryIO, size: int) -> Dict[str, Any]:
+        """Parse codec information from a Matroska/WebM file."""
+        info: Dict[str, Any] = {
+            "video_codec": None,
+            "audio_codec": None,
+            "container": "matroska,webm",
+            "duration": None,
+            "width": None,
+            "height": None,
+            "video_profile": None,
+            "video_level": None,
+        }
+
+        segment = None
+        for element_id, start, length in ContainerParser._iter_ebml(f, 0, size):
+            if element_id == ContainerParser.EBML_SEGMENT:
+                segment = (start, size if length < 0 else min(size, start + length))
+                break
+        if not segment:
+            raise ContainerParseError("No Segment element")
+
+        # Info and Tracks precede the first Cluster in practice
+        found_tracks = False
+        for element_id, start, length in ContainerParser._iter_ebml(f, *segment):
+            if start > ContainerParser.MAX_HEADER_BYTES:
+                break
+            if element_id == ContainerParser.EBML_INFO:
+                ContainerParser._mkv_info(f, start, length, info)
+            elif element_id == ContainerParser.EBML_TRACKS:
+                ContainerParser._mkv_tracks(f, start, length, info)
+                found_tracks = True
+            elif element_id == ContainerParser.EBML_CLUSTER:
+                break
+            if found_tracks and info["duration"] is not None:
+                break
+
+        return info
+
+    @staticmethod
+    def _mkv_info(f: BinaryIO, start: int, length: int, info: Dict[str, Any]):
+        """Read the duration from a Segment Info element."""
+        data = ContainerParser._read_element(f, start, length)
+        scale = 1000000
+        duration = None
+        pos = 0
+        while pos < len(data):
+            element_id, element_size, header = ContainerParser._vint_header(data, pos)
+            value = data[pos + header:pos + header + element_size]
+            if element_id == ContainerParser.EBML_TIMECODE_SCALE:
+                scale = ContainerParser._ebml_uint(value)
+            elif element_id == ContainerParser.EBML_DURATION:
+                duration = struct.unpack(">f" if element_size == 4 else ">d", value)[0]
+            pos += header + element_size
+        # Damaged or unset files may hold NaN, infinity or zero here
+        if duration is not None and math.isfinite(duration) and duration > 0:
+            info["duration"] = duration * scale / 1e9
+
+    @staticmethod
+    def _mkv_tracks(f: BinaryIO, start: int, length: int, info: Dict[str, Any]):
+        """Read the first video and audio codec from a Tracks element."""
+        data = ContainerParser._read_element(f, start, length)
+        for element_id, entry in ContainerParser._iter_children(data, 0, len(data)):
+            if element_id != ContainerParser.EBML_TRACK_ENTRY:
+                continue
+            fields = dict(ContainerParser._iter_children(data, *entry))
+            track_type = ContainerParser._ebml_uint(
+                data[slice(*fields.get(ContainerParser.EBML_TRACK_TYPE, (0, 0)))]
+            )
+            codec_id = data[slice(*fields.get(ContainerParser.EBML_CODEC_ID, (0, 0)))]
+            codec_id = codec_id.rstrip(b"\x00").decode("ascii")
+
+            if track_type == 1 and not info["video_codec"]:
+                codec = ContainerParser.MATROSKA_CODECS.get(codec_id)
+                if not codec:
+                    raise ContainerParseError(f"Unknown video CodecID {codec_id}")
+                info["video_codec"] = codec
+                video = fields.get(ContainerParser.EBML_VIDEO)
+                if video:
+                    video_fields = dict(ContainerParser._iter_children(data, *video))
+                    for key, field in (("width", ContainerParser.EBML_PIXEL_WIDTH),
+                                       ("height", ContainerParser.EBML_PIXEL_HEIGHT)):
+                        if field in video_fields:
+                            info[key] = ContainerParser._ebml_uint(data[slice(*video_fields[field])])
+                private = fields.get(ContainerParser.EBML_CODEC_PRIVATE)
+                if private and codec == "h264":
+                    ContainerParser._avcc_profile(data[slice(*private)], info)
+                elif private and codec == "hevc":
+                    ContainerParser._hvcc_profile(data[slice(*private)], info)
+
+            elif track_type == 2 and not info["audio_codec"]:
+                codec = ContainerParser.MATROSKA_CODECS.get(codec_id)
+                if codec_id.startswith("A_AAC"):
+                    codec = "aac"
+                elif codec_id == "A_PCM/INT/LIT":
+                    codec = ContainerParser._mkv_pcm_codec(data, fields)
+                if not codec:
+                    raise ContainerParseError(f"Unknown audio CodecID {codec_id}")
+                info["audio_codec"] = codec
+
+    @staticmethod
+    def _mkv_pcm_codec(data: bytes, fields: Dict[int, Tuple[int, int]]) -> Optional[str]:
+        """Map little-endian integer PCM to an ffprobe codec name by bit depth."""
+        audio = fields.get(ContainerParser.EBML_AUDIO)
+        if not audio:
+            return None
+        audio_fields = dict(ContainerParser._iter_children(data, *audio))
+        depth_range = audio_fields.get(ContainerParser.EBML_BIT_DEPTH)
+        if not depth_range:
+            return None
+        depth = ContainerParser._ebml_uint(data[slice(*depth_range)])
+        return {16: "pcm_s16le", 24: "pcm_s24le", 32: "pcm_s32le"}.get(depth)
+
+    @staticmethod
+    def _vint_header(data: bytes, pos: int) -> Tuple[int, int, int]:
+        """Decode an in-memory element header.
+
+        Returns:
+            (element id, data size, header length)
+        """
+        def vint(offset: int, keep_marker: bool) -> Tuple[int, int]:
+            byte = data[offset]
+            length = 1
+            mask = 0x80
+            while length <= 8 and not byte & mask:
+                mask >>= 1
+                length += 1
+            if length > 8 or offset + length > len(data):
+                raise ContainerParseError("Invalid EBML integer")
+            value = byte if keep_marker else byte & (mask - 1)
+            for b in data[offset + 1:offset + length]:
+                value = (value << 8) | b
+            return value, length
+
+        element_id, id_len = vint(pos, keep_marker=True)
+        size, size_len = vint(pos + id_len, keep_marker=False)
+        if pos + id_len + size_len + size > len(data):
+            raise ContainerParseError("EBML element overruns its parent")
+        return element_id, size, id_len + size_len
+
+    @staticmethod
+    def _iter_children(data: bytes, start: int, end: int) -> Iterator[Tuple[int, Tuple[int, int]]]:
+        """Iterate over in-memory child elements.
+
+        Yields:
+            (element id, (data start, data end)) tuples
+        """
+        pos = start
+        while pos < end:
+            element_id, size, header = ContainerParser._vint_header(data, pos)
+            yield element_id, (pos + header, pos + header + size)
+            pos += header + size
+
+    # ------------------------------------------------------------------
+    # Codec configuration records (shared by MP4 and Matroska)
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _avcc_profile(record: bytes, info: Dict[str, Any]):
+        """Read profile/level from an AVCDecoderConfigurationRecord."""
+        if len(record) < 4 or record[0] != 1:
+            return
+        profile_idc, constraints, level = record[1], record[2], record[3]
+        profile = ContainerParser.H264_PROFILES.get(profile_idc)
+        if profile_idc == 66 and constraints & 0x40:
+            profile = "Constrained Baseline"
+        info["video_profile"] = profile
+        info["video_level"] = level
+
+    @staticmethod
+    def _hvcc_profile(record: bytes, info: Dict[str, Any]):
+        """Read profile/level from an HEVCDecoderConfigurationRecord."""
+        if len(record) < 13 or record[0] != 1:
+            return
+        info["video_profile"] = ContainerParser.HEVC_PROFILES.get(record[1] & 0x1F)
+        info["video_level"] = record[12]
@@ -0,0 +1,145 @@
+"""Append-only journal of batch conversion jobs, for resuming after a crash."""
+
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, Iterable, List
+
+from .conversion_planner import ConversionPlan
+from .conversion_scheduler import ConversionJob
+
+logger = logging.getLogger(__name__)
+
+
+class ConversionJournal:
+    """Records every queued job and what became of it in a JSON-lines file.
+
+    Each line is one event: "queued" (with the job's paths and plan),
+    "started", "finished" (with success) or "cancelled". Lines are only ever
+    appended and flushed to disk straight away, so after a crash or restart
+    replaying the file tells which jobs still have to run: every queued job
+    without a "finished" or "cancelled" event, including jobs that were
+    running at the time.
+    """
+
+    def __init__(self, path: str):
+        """Open (or create) the journal, dropping the events of finished jobs.
+
+        Args:
+            path: Path to the journal file
+        """
+        self.path = path
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._compact()
+
+    def _read(self) -> List[Dict[str, Any]]:
+        """Read every event in the journal, skipping damaged lines."""
+        events = []
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        events.append(json.loads(line))
+                    except ValueError:
+                        # A line cut short by a crash mid-write
+                        continue
+        except FileNotFoundError:
+            pass
+        return events
+
+    def _pending_records(self) -> List[Dict[str, Any]]:
+        """Replay the journal into the "queued" events of unfinished jobs."""
+        queued: Dict[str, Dict[str, Any]] = {}
+        for event in self._read():
+            kind = event.get("event")
+            if kind == "queued":
+                queued[event["id"]] = event
+            elif kind in ("finished", "cancelled"):
+                queued.pop(event.get("id"), None)
+        return list(queued.values())
+
+    def _compact(self):
+        """Rewrite the journal with only the jobs that still have to run."""
+        with self._lock:
+            records = self._pending_records()
+            temp_path = self.path + ".tmp"
+            try:
+                with open(temp_path, "w", encoding="utf-8") as f:
+                    for record in records:
+                        f.write(json.dumps(record) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temp_path, self.path)
+            except OSError as e:
+                logger.warning(f"Could not compact conversion journal {self.path}: {e}")
+
+    def _append(self, events: Iterable[Dict[str, Any]]):
+        """Append events and flush them to disk."""
+        lines = "".join(json.dumps(event) + "\n" for event in events)
+        if not lines:
+            return
+        with self._lock:
+            try:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(lines)
+                    f.flush()
+                    os.fsync(f.fileno())
+            except OSError as e:
+                logger.warning(f"Could not write conversion journal {self.path}: {e}")
+
+    def add(self, jobs: Iterable[ConversionJob]):
+        """Record newly queued jobs.
+
+        Args:
+            jobs: Jobs about to be run
+        """
+        self._append(
+            {
+                "event": "queued",
+                "id": job.job_id,
+                "input": job.input_path,
+                "output": job.output_path,
+                "plan": job.plan._asdict(),
+                "extra": [{"output": path, "plan": plan._asdict()}
+                          for path, plan in job.extra_outputs],
+            }
+            for job in jobs
+        )
+
+    def started(self, job: ConversionJob):
+        """Record that a job's ffmpeg process is starting."""
+        self._append([{"event": "started", "id": job.job_id}])
+
+    def finished(self, job: ConversionJob):
+        """Record that a job ran to completion (successfully or not)."""
+        self._append([{"event": "finished", "id": job.job_id, "success": bool(job.success)}])
+
+    def cancelled(self, jobs: Iterable[ConversionJob]):
+        """Record that jobs were cancelled and must not be resumed."""
+        self._append({"event": "cancelled", "id": job.job_id} for job in jobs)
+
+    def pending(self) -> List[ConversionJob]:
+        """Get the jobs that were queued but never finished or cancelled.
+
+        Returns:
+            Jobs in the order they were queued
+        """
+        with self._lock:
+            records = self._pending_records()
+
+        jobs = []
+        for record in records:
+            try:
+                plan = ConversionPlan(**record["plan"])
+                extra = [(output["output"], ConversionPlan(**output["plan"]))
+                         for output in record.get("extra", [])]
+                jobs.append(ConversionJob(record["input"], record["output"], plan, record["id"],
+                                          extra))
+            except (KeyError, TypeError) as e:
+                logger.warning(f"Skipping unreadable conversion journal entry: {e}")
+        return jobs
@@ -0,0 +1,264 @@
+"""Per-stream conversion planning: copy what already plays, transcode the rest."""
+
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from .encoding_profiles import EncodingProfile, EncodingProfiles
+from .output_targets import OutputTarget, OutputTargets
+from .device_profiles import DeviceProfile, DeviceProfiles
+
+
+class ConversionPlan(NamedTuple):
+    """What a conversion does to each stream, and roughly how long it takes."""
+
+    video: str  # "copy" or "transcode"
+    audio: str  # "copy", "transcode" or "none" (no audio stream)
+    container: str  # ffmpeg muxer name: "mp4" or "matroska"
+    extension: str  # Output file suffix, including the dot
+    kind: str  # One of the ConversionPlanner kinds
+    video_codec: Optional[str] = None  # Source codecs, for descriptions
+    audio_codec: Optional[str] = None
+    estimated_seconds: Optional[float] = None
+    duration: Optional[float] = None  # Source duration in seconds, for progress
+    # Encoder options from the EncodingProfile the plan was made with
+    preset: str = EncodingProfiles.BALANCED.preset
+    crf: int = EncodingProfiles.BALANCED.crf
+    tune: Optional[str] = None
+    audio_bitrate: str = EncodingProfiles.BALANCED.audio_bitrate
+    threads: Optional[int] = None  # ffmpeg -threads for a video transcode (None = automatic)
+    target: str = OutputTargets.DEFAULT  # OutputTarget name
+    max_height: Optional[int] = None  # Transcoded video taller than this is scaled down
+
+    def ffmpeg_args(self) -> List[str]:
+        """ffmpeg output options (between the input and the output path)."""
+        args = self.video_args() + self.audio_args()
+        if self.container == "matroska":
+            # Keep subtitle tracks; Matroska can hold any of them
+            args += ["-c:s", "copy"]
+        return args + ["-f", self.container]
+
+    def video_args(self) -> List[str]:
+        """ffmpeg options for the video stream."""
+        video_filter = self.video_filter()
+        return self.video_codec_args() + (["-vf", video_filter] if video_filter else [])
+
+    def video_codec_args(self) -> List[str]:
+        """ffmpeg codec options for the video stream, without filters."""
+        if self.video == "copy":
+            return ["-c:v", "copy"]
+        args = ["-c:v", "libx264", "-preset", self.preset, "-crf", str(self.crf),
+                # 8-bit 4:2:0 keeps the output within the High profile that
+                # device profiles allow, whatever the source's format
+                "-pix_fmt", "yuv420p"]
+        if self.tune:
+            args += ["-tune", self.tune]
+        return args
+
+    def video_filter(self) -> Optional[str]:
+        """ffmpeg filter applied to transcoded video (None if there's nothing to do)."""
+        if self.video == "copy" or not self.max_height:
+            return None
+        # Never upscale; -2 keeps the width even, as libx264 needs
+        return f"scale=-2:'min(ih,{self.max_height})'"
+
+    def audio_args(self) -> List[str]:
+        """ffmpeg options for the audio stream (none if there is no audio)."""
+        if self.audio == "copy":
+            return ["-c:a", "copy"]
+        if self.audio == "transcode":
+            return ["-c:a", "aac", "-b:a", self.audio_bitrate]
+        return []
+
+    def summary(self) -> str:
+        """Short label such as "audio only", for lists and progress text."""
+        label = ConversionPlanner.KIND_LABELS[self.kind]
+        if self.target != OutputTargets.DEFAULT:
+            label += f" ({self.target})"
+        return label
+
+    def describe(self) -> str:
+        """One-line description of every step and the estimated time."""
+        steps = []
+        if self.video == "copy":
+            steps.append(f"copy video ({self.video_codec})")
+        else:
+            scale = f", max {self.max_height}p" if self.max_height else ""
+            steps.append(f"transcode video ({self.video_codec or 'unknown'} → H.264, "
+                         f"{self.preset} CRF {self.crf}{scale})")
+
+        if self.audio == "copy":
+            steps.append(f"copy audio ({self.audio_codec})")
+        elif self.audio == "transcode":
+            steps.append(f"transcode audio ({self.audio_codec or 'unknown'} → AAC)")
+
+        steps.append(f"{self.extension[1:].upper()} container")
+        text = ", ".join(steps)
+        return text[0].upper() + text[1:] + f" · est. {format_duration(self.estimated_seconds)}"
+
+
+class ConversionPlanner:
+    """Chooses the cheapest conversion that makes a file Samsung TV compatible."""
+
+    # Plan kinds, cheapest first
+    REMUX = "remux"  # Every stream copied; only the container changes
+    AUDIO = "audio"  # Audio transcoded, video copied
+    VIDEO = "video"  # Video transcoded, audio copied
+    FULL = "full"  # Both transcoded
+
+    KIND_LABELS = {
+        REMUX: "remux",
+        AUDIO: "audio only",
+        VIDEO: "video only",
+        FULL: "full transcode",
+    }
+
+    # Audio codecs the MP4 muxer accepts as a stream copy (FLAC and PCM
+    # need experimental or QuickTime-only support, so they're transcoded)
+    MP4_AUDIO_COPY = {"aac", "mp3", "ac3", "eac3"}
+
+    # Rough throughput used for time estimates
+    COPY_BYTES_PER_SEC = 150e6  # Read + write of a stream copy
+    AUDIO_REALTIME_FACTOR = 100.0  # AAC encode, times realtime
+    VIDEO_REALTIME_FACTOR_1080P = 1.5  # libx264 -preset medium, times realtime
+    # (other presets scale this by EncodingProfile.speed)
+    PIXELS_1080P = 1920 * 1080
+
+    @staticmethod
+    def plan(info: Optional[Dict[str, Any]], size: Optional[int] = None,
+             profile: Optional[EncodingProfile] = None,
+             target: Optional[OutputTarget] = None) -> ConversionPlan:
+        """Plan a conversion from probe results.
+
+        Args:
+            info: Codec info from the probe (None plans a full transcode)
+            size: File size in bytes, for the time estimate
+            profile: Encoder settings for transcoded streams (defaults to
+                EncodingProfiles.BALANCED)
+            target: Device the output is for (defaults to OutputTargets.TV)
+
+        Returns:
+            ConversionPlan
+        """
+        info = info or {}
+        profile = profile or EncodingProfiles.BALANCED
+        target = target or OutputTargets.TV
+        video_codec = info.get("video_codec")
+        audio_codec = info.get("audio_codec")
+
+        normalize = DeviceProfile.normalize_codec_name
+
+        # Targets without codec lists play what the active device profile
+        # plays, including its profile, level, size and bitrate limits
+        device = DeviceProfiles.active()
+        max_height = target.max_height
+        if target.video_codecs is None:
+            def video_playable(codec):
+                return device.evaluate(info).video_ok if info else \
+                    device.is_video_compatible(codec)
+            # Transcodes produce H.264, which must fit the device too
+            max_height = max_height or device.max_height("h264")
+        else:
+            def video_playable(codec):
+                return normalize(codec) in target.video_codecs
+        too_tall = bool(max_height and (info.get("height") or 0) > max_height)
+        video = "copy" if video_codec and video_playable(video_codec) and not too_tall \
+            else "transcode"
+
+        # Matroska sources stay Matroska (it holds any codec) if the device
+        # plays it; everything else becomes MP4
+        keep_matroska = "matroska" in (info.get("container") or "") and \
+            device.container_ok("matroska")
+        container = target.container or ("matroska" if keep_matroska else "mp4")
+        extension = ".mkv" if container == "matroska" else ".mp4"
+        if target.audio_codecs is not None:
+            def audio_copyable(codec):
+                return normalize(codec) in target.audio_codecs
+        elif container == "matroska":
+            audio_copyable = device.is_audio_compatible
+        else:
+            def audio_copyable(codec):
+                return device.is_audio_compatible(codec) and \
+                    normalize(codec) in ConversionPlanner.MP4_AUDIO_COPY
+
+        if not audio_codec:
+            audio = "none" if info else "transcode"
+        else:
+            audio = "copy" if audio_copyable(audio_codec) else "transcode"
+
+        if video == "transcode":
+            kind = ConversionPlanner.FULL if audio == "transcode" else ConversionPlanner.VIDEO
+        else:
+            kind = ConversionPlanner.AUDIO if audio == "transcode" else ConversionPlanner.REMUX
+
+        return ConversionPlan(
+            video, audio, container, extension, kind, video_codec, audio_codec,
+            ConversionPlanner.estimate_seconds(video, audio, info, size, profile.speed,
+                                               max_height),
+            info.get("duration"),
+            profile.preset,
+            target.crf if target.crf is not None else profile.crf,
+            profile.tune,
+            target.audio_bitrate or profile.audio_bitrate,
+            profile.threads,
+            target.name,
+            # Only scale what is (or may be) too tall
+            max_height if too_tall or not info.get("height") else None
+        )
+
+    @staticmethod
+    def estimate_seconds(video: str, audio: str, info: Dict[str, Any],
+                         size: Optional[int], video_speed: float = 1.0,
+                         max_height: Optional[int] = None) -> Optional[float]:
+        """Estimate how long a conversion takes.
+
+        Args:
+            video: Video action
+            audio: Audio action
+            info: Codec info from the probe
+            size: File size in bytes
+            video_speed: Encoder speed relative to libx264 -preset medium
+            max_height: Height transcoded video is scaled down to, if any
+
+        Returns:
+            Estimated seconds, or None if the duration or size is unknown
+        """
+        duration = info.get("duration")
+        if video == "transcode":
+            if not duration:
+                return None
+            pixels = (info.get("width") or 0) * (info.get("height") or 0) or \
+                ConversionPlanner.PIXELS_1080P
+            height = info.get("height")
+            if max_height and height and height > max_height:
+                # Encoding cost follows the output size
+                pixels *= (max_height / height) ** 2
+            speed = ConversionPlanner.VIDEO_REALTIME_FACTOR_1080P * video_speed * \
+                ConversionPlanner.PIXELS_1080P / pixels
+            return duration / speed
+
+        if not size:
+            return None
+        seconds = size / ConversionPlanner.COPY_BYTES_PER_SEC
+        if audio == "transcode":
+            if not duration:
+                return None
+            seconds += duration / ConversionPlanner.AUDIO_REALTIME_FACTOR
+        return seconds
+
+
+def format_duration(seconds: Optional[float]) -> str:
+    """Format an estimated duration, e.g. "~45 s" or "~1 h 20 min".
+
+    Args:
+        seconds: Duration in seconds, or None if unknown
+
+    Returns:
+        Human-readable duration
+    """
+    if seconds is None:
+        return "unknown"
+    if seconds < 60:
+        return f"~{max(1, round(seconds))} s"
+    minutes = round(seconds / 60)
+    if minutes < 60:
+        return f"~{minutes} min"
+    return f"~{minutes // 60} h {minutes % 60} min"
@@ -0,0 +1,532 @@
+"""Runs several conversions at once within a CPU thread budget."""
+
+import logging
+import os
+import signal
+import threading
+import time
+import uuid
+from collections import deque
+from itertools import islice
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from .conversion_planner import ConversionPlan
+from .device_limits import DeviceLimits
+from .ffmpeg_analyzer import ConversionProgress, FFmpegAnalyzer
+from .load_governor import LoadGovernor
+from .process_output import job_log_path
+from .staging_cache import StagingCache
+
+logger = logging.getLogger(__name__)
+
+
+class ConversionJob:
+    """One file to convert, and how its conversion went."""
+
+    def __init__(self, input_path: str, output_path: str, plan: ConversionPlan,
+                 job_id: Optional[str] = None,
+                 extra_outputs: Optional[List[Tuple[str, ConversionPlan]]] = None):
+        """Initialize job.
+
+        Args:
+            input_path: File to convert
+            output_path: Where to write the converted file
+            plan: What to copy and what to transcode
+            job_id: Identifier in the conversion journal (generated if not given)
+            extra_outputs: (output path, plan) of more copies made for other
+                targets from the same decode
+        """
+        self.job_id = job_id or uuid.uuid4().hex
+        self.input_path = input_path
+        self.output_path = output_path
+        self.plan = plan
+        self.extra_outputs = list(extra_outputs or [])
+        self.threads = 0  # ffmpeg -threads, set when the job starts
+        # Storage devices (st_dev) the job reads and writes, with their caps
+        self.devices: Dict[int, int] = {}
+        self.success: Optional[bool] = None
+        self.cancelled = False  # Stopped by cancel() or shutdown()
+        self.processes = []  # ffmpeg Popens started while the job runs
+        self.log_path: Optional[str] = None  # ffmpeg output log, if logging is on
+        self.frames = 0
+        self.progress: Optional[ConversionProgress] = None  # Latest ffmpeg update
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+
+    @property
+    def outputs(self) -> List[Tuple[str, ConversionPlan]]:
+        """(output path, plan) of every file the job writes, the main one first."""
+        return [(self.output_path, self.plan)] + self.extra_outputs
+
+    @property
+    def heavy(self) -> bool:
+        """Whether the job encodes video (CPU bound) rather than copying it."""
+        return any(plan.video == "transcode" for _, plan in self.outputs)
+
+    @property
+    def estimated_seconds(self) -> Optional[float]:
+        """Planned time for all of the job's outputs (None if not known)."""
+        estimates = [plan.estimated_seconds for _, plan in self.outputs]
+        if None in estimates:
+            return None
+        return sum(estimates)
+
+    def summary(self) -> str:
+        """Short label such as "remux + video only (mobile)"."""
+        return " + ".join(plan.summary() for _, plan in self.outputs)
+
+    @property
+    def seconds(self) -> float:
+        """Wall time the job took (or has taken so far)."""
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.monotonic()) - self.started
+
+    @property
+    def fraction_done(self) -> float:
+        """How much of the job is done, from 0 to 1 (0 while the duration is unknown)."""
+        if self.success is not None:
+            return 1.0
+        if self.progress and self.progress.percent is not None:
+            return self.progress.percent / 100
+        return 0.0
+
+
+class BatchStats(NamedTuple):
+    """Throughput of a finished batch."""
+
+    succeeded: int
+    failed: int
+    encoded_frames: int  # Frames of video-transcoding jobs
+    seconds: float  # Wall time of the whole batch
+    cancelled: int = 0  # Jobs stopped while running, or never started
+
+    @property
+    def fps(self) -> float:
+        """Aggregate video encode rate across all parallel jobs."""
+        return self.encoded_frames / self.seconds if self.seconds > 0 else 0.0
+
+    @property
+    def jobs_per_hour(self) -> float:
+        """Completed jobs per hour of wall time."""
+        done = self.succeeded + self.failed
+        return done * 3600 / self.seconds if self.seconds > 0 else 0.0
+
+
+class ConversionScheduler:
+    """Runs conversion jobs concurrently without oversubscribing the CPU.
+
+    Video transcodes ("heavy" jobs) share the thread budget: each one is
+    started with -threads set to its share, so a few encoders together use
+    about one thread per core. Stream copies and audio-only transcodes
+    ("light" jobs) barely use the CPU, so they get their own extra slots
+    with a single thread each, and also take over idle heavy slots once no
+    video transcodes are left.
+
+    With device limits, a job also waits while the disk it reads from or
+    writes to already serves its cap of jobs; later jobs on other disks
+    start ahead of it, so all disks stay busy without being thrashed.
+
+    A run can be paused (no new jobs start and running ffmpeg processes are
+    suspended where the platform allows it) and cancelled (running ffmpeg
+    processes are terminated; their partial output is removed by the
+    conversion function). With a load governor, the run is also held the
+    same way while the machine is busy or outside the conversion windows,
+    and its ffmpeg processes run at a lower priority.
+
+    With a staging cache, files on slow storage are converted from and to
+    local copies, and the sources of the next jobs in line are copied while
+    the running ones encode.
+    """
+
+    # Jobs at the head of each queue whose sources are staged ahead of time
+    PREFETCH_JOBS = 1
+
+    def __init__(self, thread_budget: Optional[int] = None, heavy_jobs: int = 1,
+                 light_jobs: int = 2, segments: int = 0,
+                 log_dir: Optional[str] = None,
+                 device_limits: Optional[DeviceLimits] = None,
+                 convert_fn: Optional[Callable[..., bool]] = None,
+                 governor: Optional[LoadGovernor] = None,
+                 staging: Optional[StagingCache] = None):
+        """Initialize scheduler.
+
+        Args:
+            thread_budget: Total ffmpeg threads across running jobs
+                (defaults to the number of CPUs)
+            heavy_jobs: Video transcodes to run at once
+            light_jobs: Extra slots for copy and audio-only jobs
+            segments: Split each video transcode into this many segments
+                encoded in parallel within its threads (0 or 1 = off)
+            log_dir: Folder for a rotating ffmpeg log per job (None = no logs)
+            device_limits: Optional caps on concurrent jobs per storage device
+            convert_fn: Conversion function with the signature of
+                FFmpegAnalyzer.convert_to_compatible_format
+            governor: Optional load governor that lowers the priority of
+                the conversions and holds them while the machine is busy
+            staging: Optional cache of local copies for files on slow storage
+        """
+        self.thread_budget = max(1, int(thread_budget or os.cpu_count() or 1))
+        self.heavy_jobs = max(1, int(heavy_jobs))
+        self.light_jobs = max(0, int(light_jobs))
+        self.segments = max(0, int(segments))
+        self.log_dir = log_dir
+        self.device_limits = device_limits
+        self._device_jobs: Dict[int, int] = {}  # Running jobs per device
+        self.convert_fn = convert_fn or FFmpegAnalyzer.convert_to_compatible_format
+        self._cancelled = threading.Event()
+        self._condition = threading.Condition()
+        self._running: List[ConversionJob] = []
+        self.governor = governor
+        self.staging = staging
+        self.paused = False
+        self.held: Optional[str] = None  # Why the governor holds the run, if it does
+        self.interrupted = False  # Stopped by shutdown() rather than cancel()
+        self.started: Optional[float] = None  # When the current run began
+
+    def cancel(self):
+        """Stop the run: terminate running conversions and start no new ones."""
+        self._cancelled.set()
+        with self._condition:
+            for job in self._running:
+                self._terminate(job)
+            self._condition.notify_all()
+
+    def shutdown(self):
+        """Terminate running conversions because the application is exiting.
+
+        Unlike cancel(), the jobs are meant to run again later (see
+        ConversionJournal.pending()).
+        """
+        self.interrupted = True
+        self.cancel()
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether cancel() has been called."""
+        return self._cancelled.is_set()
+
+    @staticmethod
+    def can_suspend() -> bool:
+        """Whether pause() suspends running ffmpeg processes (POSIX only).
+
+        Elsewhere pausing only holds back jobs that haven't started.
+        """
+        return hasattr(signal, "SIGSTOP")
+
+    @property
+    def suspended(self) -> bool:
+        """Whether the run is paused or held by the governor."""
+        return self.paused or self.held is not None
+
+    def pause(self):
+        """Start no new jobs and suspend the running ones until resume()."""
+        with self._condition:
+            was_suspended = self.suspended
+            self.paused = True
+            self._suspension_changed(was_suspended)
+
+    def resume(self):
+        """Continue a paused run (it stays held if the governor holds it)."""
+        with self._condition:
+            was_suspended = self.suspended
+            self.paused = False
+            self._suspension_changed(was_suspended)
+
+    def hold(self, reason: Optional[str]):
+        """Hold the run for the governor, or release it.
+
+        Args:
+            reason: Why the run is held, or None to let it continue
+        """
+        with self._condition:
+            was_suspended = self.suspended
+            self.held = reason
+            self._suspension_changed(was_suspended)
+
+    def _suspension_changed(self, was_suspended: bool):
+        """Suspend or continue running ffmpeg processes after a pause or hold change (lock held)."""
+        if self.suspended != was_suspended:
+            for job in self._running:
+                self._signal(job, "SIGSTOP" if self.suspended else "SIGCONT")
+        self._condition.notify_all()
+
+    def _running_threads(self) -> int:
+        """Threads of the running conversions, or 0 while they are suspended."""
+        with self._condition:
+            if self.suspended and self.can_suspend():
+                return 0
+            return min(os.cpu_count() or 1, sum(job.threads for job in self._running))
+
+    @staticmethod
+    def _signal(job: ConversionJob, name: str):
+        """Send a job's running ffmpeg processes a signal, if the platform has it."""
+        sig = getattr(signal, name, None)
+        if sig is None:
+            return
+        for process in job.processes:
+            if process.poll() is not None:
+                continue
+            try:
+                os.kill(process.pid, sig)
+            except OSError as e:
+                logger.warning(f"Could not send {name} to ffmpeg for {job.input_path}: {e}")
+
+    def _terminate(self, job: ConversionJob):
+        """Stop a running job's ffmpeg processes (called with the lock held)."""
+        job.cancelled = True
+        for process in job.processes:
+            if process.poll() is not None:
+                continue
+            try:
+                # Killed rather than asked to stop: a graceful exit would first
+                # flush the encoder into an output that's discarded anyway
+                process.kill()
+            except OSError as e:
+                logger.warning(f"Could not stop ffmpeg for {job.input_path}: {e}")
+
+    def run(self, jobs: List[ConversionJob],
+            on_started: Optional[Callable[[ConversionJob], None]] = None,
+            on_finished: Optional[Callable[[ConversionJob], None]] = None,
+            on_progress: Optional[Callable[[ConversionJob], None]] = None,
+            on_governor: Optional[Callable[[Optional[str], str], None]] = None) -> BatchStats:
+        """Run jobs until all are done (or the batch is cancelled).
+
+        Callbacks are called from the job threads.
+
+        Args:
+            jobs: Jobs to run; video transcodes start in the given order
+            on_started: Called when a job starts, after its threads are set
+            on_finished: Called when a job ends, after success is set
+            on_progress: Called after each ffmpeg update to a job's progress
+            on_governor: Called after each governor check with (reason the
+                run is held or None, status text)
+
+        Returns:
+            BatchStats for the jobs that ran
+        """
+        pending: Dict[bool, deque] = {
+            True: deque(job for job in jobs if job.heavy),
+            False: deque(job for job in jobs if not job.heavy),
+        }
+        running = {True: 0, False: 0}
+        self.started = start = time.monotonic()
+        callbacks = (on_started, on_finished, on_progress)
+        if self.device_limits:
+            for job in jobs:
+                job.devices = self._job_devices(job)
+
+        def finish(job: ConversionJob):
+            with self._condition:
+                running[job.heavy] -= 1
+                for device in job.devices:
+                    self._device_jobs[device] -= 1
+                self._running.remove(job)
+                job.processes = []
+                self._condition.notify_all()
+
+        stop_governor = threading.Event()
+        if self.governor:
+            def on_check(reason: Optional[str], status: str):
+                self.hold(reason)
+                if on_governor:
+                    on_governor(reason, status)
+
+            threading.Thread(
+                target=self.governor.watch, args=(self._running_threads, on_check, stop_governor),
+                name="load-governor", daemon=True
+            ).start()
+
+        try:
+            with self._condition:
+                while True:
+                    if not (self.cancelled or self.suspended):
+                        self._start_ready(pending, running, callbacks, finish)
+                    if not (running[True] or running[False]):
+                        if self.cancelled or not (pending[True] or pending[False]):
+                            break
+                    self._condition.wait()
+        finally:
+            stop_governor.set()
+
+        finished = [job for job in jobs if job.success is not None and not job.cancelled]
+        return BatchStats(
+            succeeded=sum(1 for job in finished if job.success),
+            failed=sum(1 for job in finished if not job.success),
+            encoded_frames=sum(job.frames for job in finished if job.heavy),
+            seconds=time.monotonic() - start,
+            cancelled=len(jobs) - len(finished)
+        )
+
+    def _job_devices(self, job: ConversionJob) -> Dict[int, int]:
+        """Find the devices a job reads and writes, with their caps."""
+        devices = {}
+        for path in (job.input_path, os.path.dirname(os.path.abspath(job.output_path))):
+            device = DeviceLimits.device_of(path)
+            if device is not None:
+                devices[device] = self.device_limits.limit(device, path)
+        return devices
+
+    def _take(self, queue: deque) -> Optional[ConversionJob]:
+        """Remove the first queued job whose devices have room (lock held)."""
+        for index, job in enumerate(queue):
+            if all(self._device_jobs.get(device, 0) < limit
+                   for device, limit in job.devices.items()):
+                del queue[index]
+                for device in job.devices:
+                    self._device_jobs[device] = self._device_jobs.get(device, 0) + 1
+                return job
+        return None
+
+    def _start_ready(self, pending, running, callbacks, finish):
+        """Start every job that fits in a free slot (called with the lock held)."""
+        while pending[True] and running[True] < self.heavy_jobs:
+            job = self._take(pending[True])
+            if job is None:
+                break
+            # A thread count fixed by the encoding profile wins over the share
+            job.threads = job.plan.threads or self._heavy_threads(
+                len(pending[True]) + running[True] + 1,
+                light_active=bool(pending[False] or running[False])
+            )
+            running[True] += 1
+            self._running.append(job)
+            self._launch(job, callbacks, finish)
+
+        # Light jobs borrow heavy slots once no video transcodes are left
+        light_slots = self.light_jobs
+        if not pending[True]:
+            light_slots += self.heavy_jobs - running[True]
+        while pending[False] and running[False] < light_slots:
+            job = self._take(pending[False])
+            if job is None:
+                break
+            job.threads = 1
+            running[False] += 1
+            self._running.append(job)
+            self._launch(job, callbacks, finish)
+
+        if self.staging:
+            # Copy the next sources in line while these jobs run
+            for queue in (pending[True], pending[False]):
+                for job in islice(queue, self.PREFETCH_JOBS):
+                    self.staging.prefetch(job.input_path)
+
+    def _heavy_threads(self, heavy_active: int, light_active: bool) -> int:
+        """Threads for a new video transcode.
+
+        Args:
+            heavy_active: Video transcodes that will share the budget,
+                including the new one
+            light_active: Whether light jobs are running or waiting (they
+                keep one thread per slot)
+
+        Returns:
+            Thread count (at least 1)
+        """
+        budget = self.thread_budget
+        if light_active:
+            budget -= self.light_jobs
+        return max(1, budget // min(self.heavy_jobs, heavy_active))
+
+    def _launch(self, job, callbacks, finish):
+        """Run a job on its own thread."""
+        on_started, on_finished, on_progress = callbacks
+
+        def work():
+            job.started = time.monotonic()
+
+            def on_process(process):
+                if self.governor:
+                    self.governor.apply_priority(process)
+                with self._condition:
+                    job.processes.append(process)
+                    if self.cancelled:
+                        self._terminate(job)
+                    elif self.suspended:
+                        self._signal(job, "SIGSTOP")
+
+            def update(progress: ConversionProgress):
+                job.progress = progress
+                job.frames = progress.frame
+                if on_progress:
+                    on_progress(job)
+
+            try:
+                # Inside the try, so a failing journal write (e.g. a full
+                # disk) fails the job instead of leaving its slot taken
+                if self.log_dir:
+                    job.log_path = job_log_path(self.log_dir, job.input_path, job.job_id)
+                if on_started:
+                    on_started(job)
+                options = dict(
+                    on_progress=update, plan=job.plan, threads=job.threads,
+                    on_process=on_process, segments=self.segments if job.heavy else 0,
+                    log_path=job.log_path, extra_outputs=job.extra_outputs
+                )
+                if self.staging:
+                    job.success = self.staging.convert(
+                        self.convert_fn, job.input_path, job.output_path,
+                        cancelled=lambda: job.cancelled, **options
+                    )
+                else:
+                    job.success = bool(self.convert_fn(job.input_path, job.output_path,
+                                                       **options))
+            except Exception as e:
+                logger.error(f"Error converting {job.input_path}: {e}")
+                job.success = False
+            job.finished = time.monotonic()
+
+            try:
+                if on_finished:
+                    on_finished(job)
+            except Exception as e:
+                logger.error(f"Error finishing {job.input_path}: {e}")
+            finally:
+                finish(job)
+
+        threading.Thread(target=work, name="convert", daemon=True).start()
+
+    def batch_progress(self, jobs: List[ConversionJob]) -> Tuple[float, Optional[float]]:
+        """Estimate how far the current run has got.
+
+        Each job counts in proportion to its planned duration, so a finished
+        remux moves the batch less than a finished transcode. Running jobs
+        use ffmpeg's own time left; waiting jobs use their planned time,
+        corrected by how the started jobs compare with their plans.
+
+        Args:
+            jobs: Jobs passed to run()
+
+        Returns:
+            (percent done, estimated seconds left or None if not known yet)
+        """
+        known = [job.estimated_seconds for job in jobs if job.estimated_seconds]
+        fallback = sum(known) / len(known) if known else 1.0
+        weights = [job.estimated_seconds or fallback for job in jobs]
+        total = sum(weights)
+        if not total:
+            return 0.0, None
+        percent = 100.0 * sum(
+            weight * job.fraction_done for weight, job in zip(weights, jobs)
+        ) / total
+
+        # Actual time per planned second, from jobs far enough along to tell
+        measured = [(job.seconds / job.fraction_done, weight)
+                    for weight, job in zip(weights, jobs) if job.fraction_done >= 0.05]
+        if not measured:
+            return percent, None
+        ratio = sum(actual for actual, _ in measured) / sum(weight for _, weight in measured)
+
+        seconds_left = 0.0
+        running = 0
+        for weight, job in zip(weights, jobs):
+            if job.success is not None:
+                continue
+            if job.started is not None:
+                running += 1
+                if job.progress and job.progress.eta_seconds is not None:
+                    seconds_left += job.progress.eta_seconds
+                    continue
+            seconds_left += weight * ratio * (1 - job.fraction_done)
+        return percent, seconds_left / max(1, running)
@@ -0,0 +1,255 @@
+"""Concurrency limits per storage device, so parallel work doesn't thrash disks."""
+
+import heapq
+import itertools
+import logging
+import os
+import queue
+import sys
+import threading
+from collections import deque
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class DeviceLimits:
+    """Caps how many probes or conversions use one storage device at a time.
+
+    Devices are identified by st_dev and classified once as a spinning disk,
+    a solid-state disk or a network mount; each kind has its own cap. A
+    spinning disk serving many readers spends its time seeking, so it is
+    faster with two than with eight, while SSDs and most network shares
+    keep up with more.
+    """
+
+    HDD = "hdd"
+    SSD = "ssd"
+    NETWORK = "network"
+    UNKNOWN = "unknown"  # Not detectable on this platform
+
+    DEFAULT_LIMITS = {HDD: 2, SSD: 8, NETWORK: 4, UNKNOWN: 8}
+
+    NETWORK_FILESYSTEMS = frozenset({
+        "nfs", "nfs4", "cifs", "smb3", "smbfs", "afpfs", "9p", "ceph",
+        "glusterfs", "davfs", "fuse.sshfs", "fuse.rclone", "fuse.davfs2",
+    })
+
+    def __init__(self, limits: Optional[Dict[str, int]] = None):
+        """Initialize limits.
+
+        Args:
+            limits: Cap per device kind ("hdd", "ssd", "network", "unknown");
+                missing kinds use DEFAULT_LIMITS
+        """
+        self.limits = dict(DeviceLimits.DEFAULT_LIMITS)
+        for kind, limit in (limits or {}).items():
+            try:
+                self.limits[kind] = max(1, int(limit))
+            except (TypeError, ValueError):
+                logger.warning(f"Invalid device limit for {kind!r}: {limit!r}")
+        self._kinds: Dict[int, str] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def device_of(path: str) -> Optional[int]:
+        """Get the device (st_dev) a file or folder is on, or None if it can't be read."""
+        try:
+            return os.stat(path).st_dev
+        except OSError:
+            return None
+
+    def kind(self, device: Optional[int], path: Optional[str] = None) -> str:
+        """Classify a device, remembering the answer.
+
+        Args:
+            device: st_dev of a file on the device
+            path: A file on the device (used where st_dev alone isn't enough)
+
+        Returns:
+            HDD, SSD, NETWORK or UNKNOWN
+        """
+        if device is None:
+            return DeviceLimits.UNKNOWN
+        with self._lock:
+            kind = self._kinds.get(device)
+        if kind is None:
+            try:
+                if sys.platform.startswith("linux"):
+                    kind = DeviceLimits._linux_kind(device)
+                elif sys.platform == "win32" and path:
+                    kind = DeviceLimits._windows_kind(path)
+            except Exception as e:
+                logger.debug(f"Could not classify device {device}: {e}")
+            kind = kind or DeviceLimits.UNKNOWN
+            with self._lock:
+                self._kinds[device] = kind
+            logger.info(f"Device {device} ({path or 'unknown path'}) classified as {kind}")
+        return kind
+
+    def limit(self, device: Optional[int], path: Optional[str] = None) -> int:
+        """Get the number of concurrent users allowed on a device.
+
+        Args:
+            device: st_dev of a file on the device
+            path: A file on the device
+        """
+        return self.limits[self.kind(device, path)]
+
+    @staticmethod
+    def _linux_kind(device: int) -> Optional[str]:
+        """Classify a device from /proc/self/mountinfo and /sys/dev/block."""
+        major_minor = f"{os.major(device)}:{os.minor(device)}"
+        source = None
+        with open("/proc/self/mountinfo", "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                fields, _, rest = line.partition(" - ")
+                if fields.split()[2:3] != [major_minor]:
+                    continue
+                fstype, _, source = (rest.split() + [""])[:3]
+                if fstype in DeviceLimits.NETWORK_FILESYSTEMS:
+                    return DeviceLimits.NETWORK
+                break
+
+        # Filesystems such as btrfs report an anonymous st_dev; their mount
+        # source names the real block device
+        candidates = [major_minor]
+        if source and source.startswith("/dev/"):
+            try:
+                rdev = os.stat(source).st_rdev
+                candidates.append(f"{os.major(rdev)}:{os.minor(rdev)}")
+            except OSError:
+                pass
+
+        for candidate in candidates:
+            block = os.path.realpath(f"/sys/dev/block/{candidate}")
+            # Partitions have no queue of their own; their disk is the parent
+            for folder in (block, os.path.dirname(block)):
+                rotational = os.path.join(folder, "queue", "rotational")
+                if os.path.exists(rotational):
+                    with open(rotational, "r") as f:
+                        return DeviceLimits.HDD if f.read().strip() == "1" else DeviceLimits.SSD
+        return None
+
+    @staticmethod
+    def _windows_kind(path: str) -> Optional[str]:
+        """Recognize network drives and UNC paths on Windows."""
+        import ctypes
+
+        drive = os.path.splitdrive(os.path.abspath(path))[0]
+        if drive.startswith("\\\\"):
+            return DeviceLimits.NETWORK
+        DRIVE_REMOTE = 4
+        if ctypes.windll.kernel32.GetDriveTypeW(drive + "\\") == DRIVE_REMOTE:
+            return DeviceLimits.NETWORK
+        return None
+
+
+class DeviceQueue:
+    """Hands out queued work round-robin across devices, each within its cap.
+
+    Items are queued per device; get() returns the next item from the next
+    device (in turn) that is below its cap, so a saturated disk never holds
+    back work for an idle one. Each item handed out must be returned with
+    done() when finished.
+
+    A device's items are handed out in order of their sort keys (such as
+    LocalityOrder keys), or first in, first out without keys.
+    """
+
+    def __init__(self, max_pending: int = 256):
+        """Initialize queue.
+
+        Args:
+            max_pending: Items held before put() blocks (bounds how far ahead
+                of the running work the queue looks for other devices)
+        """
+        self.max_pending = max(1, max_pending)
+        self._condition = threading.Condition()
+        self._pending: Dict[Hashable, list] = {}  # Device -> heap of (key, seq, item)
+        self._sequence = itertools.count()
+        self._order: deque = deque()  # Devices with pending items, in turn
+        self._limits: Dict[Hashable, int] = {}
+        self._running: Dict[Hashable, int] = {}
+        self._size = 0
+        self._closed = False
+
+    def put(self, device: Hashable, item: Any, limit: int, timeout: Optional[float] = None,
+            key: Optional[tuple] = None):
+        """Queue an item, waiting while the queue is full.
+
+        Args:
+            device: Device the item uses
+            item: Work item
+            limit: Concurrent items allowed on the device
+            timeout: Seconds to wait for room (None = no limit)
+            key: Optional sort key; the device's pending item with the
+                lowest key goes first
+
+        Raises:
+            queue.Full: If there was no room within the timeout
+        """
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._size < self.max_pending, timeout):
+                raise queue.Full
+            if device not in self._pending:
+                self._pending[device] = []
+                self._order.append(device)
+            heapq.heappush(self._pending[device],
+                           (key if key is not None else (), next(self._sequence), item))
+            self._limits[device] = max(1, limit)
+            self._size += 1
+            self._condition.notify_all()
+
+    def close(self):
+        """Mark the end of the items; get() returns None once all are handed out."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def _take(self) -> Optional[Tuple[Hashable, Any]]:
+        """Take the next item a device has room for (lock held)."""
+        for _ in range(len(self._order)):
+            device = self._order[0]
+            self._order.rotate(-1)
+            if self._running.get(device, 0) < self._limits[device]:
+                items = self._pending[device]
+                item = heapq.heappop(items)[2]
+                if not items:
+                    del self._pending[device]
+                    self._order.pop()  # The device just rotated to the end
+                self._running[device] = self._running.get(device, 0) + 1
+                self._size -= 1
+                self._condition.notify_all()
+                return device, item
+        return None
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Tuple[Hashable, Any]]:
+        """Wait for an item a device has room for.
+
+        Args:
+            timeout: Seconds to wait (None = no limit)
+
+        Returns:
+            (device, item), or None once the queue is closed and empty
+
+        Raises:
+            queue.Empty: If nothing could be handed out within the timeout
+        """
+        with self._condition:
+            entry = None
+
+            def ready():
+                nonlocal entry
+                entry = self._take()
+                return entry is not None or (self._closed and not self._size)
+
+            if not self._condition.wait_for(ready, timeout):
+                raise queue.Empty
+            return entry
+
+    def done(self, device: Hashable):
+        """Report that an item handed out for a device has finished."""
+        with self._condition:
+            self._running[device] -= 1
+            self._condition.notify_all()
@@ -0,0 +1,431 @@
+"""Declarative playback rules for TVs and players, compiled for fast checks."""
+
+import glob
+import json
+import logging
+import os
+from typing import Any, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Tuple
+
+try:
+    import tomllib  # Python 3.11+
+except ImportError:
+    tomllib = None
+
+logger = logging.getLogger(__name__)
+
+
+class Verdict(NamedTuple):
+    """Whether a file plays on a device as it is, and what stops it."""
+
+    video_ok: bool  # The video stream plays as is (codec, profile, level, size, bitrate)
+    audio_ok: bool  # The audio stream plays as is
+    container_ok: bool  # The container is supported
+    reasons: Tuple[str, ...]  # One message per broken rule
+
+    @property
+    def compatible(self) -> bool:
+        """Whether the whole file plays as is."""
+        return self.video_ok and self.audio_ok and self.container_ok
+
+
+class VideoRule(NamedTuple):
+    """Limits on one video codec, as compiled from a profile."""
+
+    profiles: Optional[FrozenSet[str]] = None  # Lowercase profile names (None = any)
+    max_level: Optional[int] = None  # In ffprobe's units (e.g. 41 for H.264 4.1)
+    max_width: Optional[int] = None
+    max_height: Optional[int] = None
+
+
+class DeviceProfile:
+    """A device's playback rules, compiled into lookup tables.
+
+    Checking a file only needs set and dict lookups: codec names are
+    mapped to their canonical names once per distinct name, and verdicts
+    are remembered per distinct stream signature (the probe fields the
+    rules look at), so a library of thousands of files with a few dozen
+    kinds of streams is checked in a few dozen evaluations.
+    """
+
+    # ffprobe reports H.264 levels times 10 and HEVC levels times 30
+    LEVEL_SCALE = {"h264": 10, "hevc": 30}
+
+    # Codecs a WebM file may hold; ffmpeg names every Matroska file
+    # "matroska,webm", so only these make one count as WebM
+    WEBM_CODECS = frozenset({"vp8", "vp9", "av1", "vorbis", "opus"})
+
+    # Encoder and decoder names that stand for a codec
+    CODEC_REPLACEMENTS = {
+        "mpeg2video": "mpeg2",
+        "libx264": "h264",
+        "libx265": "h265",
+        "libfdk_aac": "aac",
+    }
+
+    def __init__(self, name: str, label: str, video_codecs: Dict[str, VideoRule],
+                 audio_codecs: FrozenSet[str], containers: Optional[FrozenSet[str]] = None,
+                 max_bitrate: Optional[int] = None,
+                 aliases: Optional[Dict[str, str]] = None,
+                 video_match: str = "exact"):
+        """Initialize profile (see compile() for building one from a file's data).
+
+        Args:
+            name: Identifier used in settings
+            label: Shown in the profile menu
+            video_codecs: Canonical video codec name -> its limits
+            audio_codecs: Canonical audio codec names that play
+            containers: ffmpeg format names that play (None = any)
+            max_bitrate: Highest overall bitrate in bits per second (None = any)
+            aliases: Normalized codec name -> canonical name
+            video_match: "exact", or "substring" to accept any video codec
+                name containing a listed codec or alias (e.g. "avc1")
+        """
+        self.name = name
+        self.label = label
+        self.video_codecs = video_codecs
+        self.audio_codecs = audio_codecs
+        self.containers = containers
+        self.max_bitrate = max_bitrate
+        self.aliases = aliases or {}
+        self.video_match = video_match
+        # Names searched for in substring mode, longest first
+        self._video_needles = sorted(
+            list(video_codecs)
+            + [alias for alias, codec in self.aliases.items() if codec in video_codecs],
+            key=len, reverse=True,
+        )
+        self._canonical: Dict[Optional[str], str] = {}
+        self._video_canonical: Dict[Optional[str], str] = {}
+        self._containers_ok: Dict[tuple, bool] = {}
+        self._verdicts: Dict[tuple, Verdict] = {}
+
+    @staticmethod
+    def normalize_codec_name(codec: Optional[str]) -> str:
+        """Normalize an ffmpeg codec name (lowercase, encoder names mapped to codecs).
+
+        Args:
+            codec: Codec name from FFmpeg
+
+        Returns:
+            Normalized codec name ("" for none)
+        """
+        if not codec:
+            return ""
+        codec_lower = codec.lower().strip()
+        for old, new in DeviceProfile.CODEC_REPLACEMENTS.items():
+            if codec_lower.startswith(old):
+                codec_lower = codec_lower.replace(old, new)
+        return codec_lower
+
+    @staticmethod
+    def compile(data: Dict[str, Any], name: Optional[str] = None) -> "DeviceProfile":
+        """Build a profile from the data of a profile file.
+
+        Args:
+            data: Parsed JSON or TOML (see src/profiles/samsung_tv.json)
+            name: Name to use if the data has none (e.g. the file name)
+
+        Returns:
+            DeviceProfile
+
+        Raises:
+            ValueError: If the data is not a valid profile
+        """
+        if not isinstance(data, dict):
+            raise ValueError("a profile must be an object")
+        name = data.get("name") or name
+        if not name:
+            raise ValueError("profile has no name")
+        video = data.get("video") or {}
+        audio = data.get("audio") or {}
+
+        def number(value, scale=1):
+            return int(round(float(value) * scale)) if value is not None else None
+
+        normalize = DeviceProfile.normalize_codec_name
+        aliases = {normalize(alias): normalize(codec)
+                   for alias, codec in (data.get("codec_aliases") or {}).items()}
+
+        def canonical(codec):
+            codec = normalize(codec)
+            return aliases.get(codec, codec)
+
+        codecs = video.get("codecs") or {}
+        if isinstance(codecs, list):
+            codecs = {codec: {} for codec in codecs}
+        video_codecs = {}
+        try:
+            for codec, rule in codecs.items():
+                codec = canonical(codec)
+                rule = rule or {}
+                profiles = rule.get("profiles")
+                video_codecs[codec] = VideoRule(
+                    frozenset(profile.lower() for profile in profiles) if profiles else None,
+                    number(rule.get("max_level"), DeviceProfile.LEVEL_SCALE.get(codec, 1)),
+                    number(rule.get("max_width", video.get("max_width"))),
+                    number(rule.get("max_height", video.get("max_height"))),
+                )
+            containers = data.get("containers")
+            kbps = data.get("max_bitrate_kbps")
+            video_match = data.get("video_match") or "exact"
+            if video_match not in ("exact", "substring"):
+                raise ValueError(f"video_match must be 'exact' or 'substring', not {video_match!r}")
+            return DeviceProfile(
+                name,
+                data.get("label") or name,
+                video_codecs,
+                frozenset(canonical(codec) for codec in audio.get("codecs") or []),
+                frozenset(container.lower() for container in containers) if containers else None,
+                number(kbps, 1000),
+                aliases,
+                video_match,
+            )
+        except (AttributeError, TypeError, ValueError) as e:
+            raise ValueError(f"invalid rule in profile {name!r}: {e}") from e
+
+    def canonical_codec(self, codec: Optional[str]) -> str:
+        """Map an ffmpeg codec name to the name the profile's rules use."""
+        canonical = self._canonical.get(codec)
+        if canonical is None:
+            normalized = DeviceProfile.normalize_codec_name(codec)
+            canonical = self._canonical[codec] = self.aliases.get(normalized, normalized)
+        return canonical
+
+    def video_codec(self, codec: Optional[str]) -> str:
+        """Map an ffmpeg video codec name to the name the profile's video rules use."""
+        canonical = self._video_canonical.get(codec)
+        if canonical is None:
+            canonical = self.canonical_codec(codec)
+            if self.video_match == "substring" and canonical not in self.video_codecs:
+                normalized = DeviceProfile.normalize_codec_name(codec)
+                for needle in self._video_needles:
+                    if needle in normalized:
+                        canonical = self.aliases.get(needle, needle)
+                        break
+            self._video_canonical[codec] = canonical
+        return canonical
+
+    def container_ok(self, container: Optional[str], video_codec: Optional[str] = None,
+                     audio_codec: Optional[str] = None) -> bool:
+        """Whether an ffmpeg format name (e.g. "matroska,webm") is supported.
+
+        Unknown containers pass, since only the codecs may have been probed.
+        A "matroska,webm" file only counts as WebM if it has codecs and they
+        are all ones WebM allows.
+
+        Args:
+            container: ffmpeg format name
+            video_codec: The file's video codec, if known
+            audio_codec: The file's audio codec, if known
+        """
+        if self.containers is None or not container:
+            return True
+        key = (container, video_codec, audio_codec)
+        ok = self._containers_ok.get(key)
+        if ok is None:
+            parts = {part.strip() for part in container.lower().split(",")}
+            if "matroska" in parts and "webm" in parts:
+                codecs = [self.video_codec(video_codec) if video_codec else None,
+                          self.canonical_codec(audio_codec) if audio_codec else None]
+                codecs = [codec for codec in codecs if codec]
+                if not codecs or not all(codec in DeviceProfile.WEBM_CODECS for codec in codecs):
+                    parts.discard("webm")
+            ok = self._containers_ok[key] = bool(parts & self.containers)
+        return ok
+
+    def is_video_compatible(self, video_codec: Optional[str]) -> bool:
+        """Whether a video codec plays (ignoring profile, level and size)."""
+        return self.video_codec(video_codec) in self.video_codecs
+
+    def is_audio_compatible(self, audio_codec: Optional[str]) -> bool:
+        """Whether an audio codec plays."""
+        return self.canonical_codec(audio_codec) in self.audio_codecs
+
+    def evaluate(self, info: Optional[Dict[str, Any]]) -> Verdict:
+        """Check probe results against the profile.
+
+        Rules whose fields the probe didn't report are skipped.
+
+        Args:
+            info: Probe result (video_codec, audio_codec, container, width,
+                height, video_profile, video_level, bit_rate)
+
+        Returns:
+            Verdict, shared by every file with the same stream signature
+        """
+        info = info or {}
+        bit_rate = info.get("bit_rate")
+        signature = (
+            info.get("video_codec"), info.get("audio_codec"), info.get("container"),
+            info.get("width"), info.get("height"),
+            info.get("video_profile"), info.get("video_level"),
+            # Only whether the bitrate is over the limit matters, which keeps
+            # the number of distinct signatures small
+            bool(self.max_bitrate and bit_rate and bit_rate > self.max_bitrate),
+        )
+        verdict = self._verdicts.get(signature)
+        if verdict is None:
+            verdict = self._verdicts[signature] = self._evaluate(*signature)
+        return verdict
+
+    def _evaluate(self, video_codec, audio_codec, container, width, height,
+                  video_profile, video_level, over_bitrate) -> Verdict:
+        """Check one stream signature against the rules."""
+        reasons = []
+        video_ok = True
+        canonical = self.video_codec(video_codec)
+        rule = self.video_codecs.get(canonical)
+        if rule is None:
+            video_ok = False
+            reasons.append(f"Video codec '{video_codec}' not compatible")
+        else:
+            if rule.profiles is not None and video_profile \
+                    and video_profile.lower() not in rule.profiles:
+                video_ok = False
+                reasons.append(f"Video profile '{video_profile}' not supported")
+            if rule.max_level is not None and video_level and video_level > rule.max_level:
+                video_ok = False
+                scale = DeviceProfile.LEVEL_SCALE.get(canonical, 1)
+                reasons.append(f"Video level {video_level / scale:g} above {rule.max_level / scale:g}")
+            if (rule.max_width and width and width > rule.max_width) or \
+                    (rule.max_height and height and height > rule.max_height):
+                video_ok = False
+                reasons.append(
+                    f"Resolution {width or '?'}x{height or '?'} above "
+                    f"{rule.max_width or '?'}x{rule.max_height or '?'}"
+                )
+        if over_bitrate:
+            video_ok = False
+            reasons.append(f"Bitrate above {self.max_bitrate / 1e6:g} Mb/s")
+
+        audio_ok = self.is_audio_compatible(audio_codec)
+        if not audio_ok:
+            reasons.append(f"Audio codec '{audio_codec}' not compatible")
+
+        container_ok = self.container_ok(container, video_codec, audio_codec)
+        if not container_ok:
+            reasons.append(f"Container '{container}' not supported")
+        return Verdict(video_ok, audio_ok, container_ok, tuple(reasons))
+
+    def max_height(self, video_codec: Optional[str]) -> Optional[int]:
+        """Tallest video the device plays with a codec (None = no limit or codec unknown)."""
+        rule = self.video_codecs.get(self.video_codec(video_codec))
+        return rule.max_height if rule else None
+
+
+class DeviceProfiles:
+    """Device profiles shipped in src/profiles or added by the user.
+
+    Each profile is a JSON (or, on Python 3.11+, TOML) file; one whose
+    name matches a shipped profile replaces it. One profile is active at
+    a time; compatibility checks (see SamsungTVCompatibility) use it.
+    """
+
+    BUILTIN_FOLDER = os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "profiles"
+    )
+    DEFAULT = "samsung_tv"
+
+    _profiles: Dict[str, DeviceProfile] = {}
+    _active: Optional[DeviceProfile] = None
+
+    @staticmethod
+    def read(path: str) -> DeviceProfile:
+        """Read and compile a profile file.
+
+        Args:
+            path: .json or .toml file
+
+        Returns:
+            DeviceProfile (named after the file if it has no name)
+
+        Raises:
+            OSError: If the file can't be read
+            ValueError: If it isn't a valid profile, or is TOML without tomllib
+        """
+        stem, extension = os.path.splitext(os.path.basename(path))
+        if extension.lower() == ".toml":
+            if tomllib is None:
+                raise ValueError("TOML profiles need Python 3.11 or newer")
+            with open(path, "rb") as f:
+                data = tomllib.load(f)
+        else:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        return DeviceProfile.compile(data, stem)
+
+    @staticmethod
+    def load(folders: Optional[Iterable[str]] = None) -> Dict[str, DeviceProfile]:
+        """Load every profile, replacing the ones loaded before.
+
+        Args:
+            folders: Folders to read, later ones overriding earlier ones
+                (defaults to BUILTIN_FOLDER)
+
+        Returns:
+            Profiles by name
+        """
+        profiles = {}
+        for folder in folders or [DeviceProfiles.BUILTIN_FOLDER]:
+            paths = glob.glob(os.path.join(folder, "*.json")) + \
+                glob.glob(os.path.join(folder, "*.toml"))
+            for path in sorted(paths):
+                try:
+                    profile = DeviceProfiles.read(path)
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Skipping device profile {path}: {e}")
+                    continue
+                profiles[profile.name] = profile
+        DeviceProfiles._profiles = profiles
+        active = DeviceProfiles._active
+        DeviceProfiles._active = profiles.get(active.name) if active else None
+        return profiles
+
+    @staticmethod
+    def all() -> Dict[str, DeviceProfile]:
+        """Get the loaded profiles by name (loading the shipped ones on first use)."""
+        if not DeviceProfiles._profiles:
+            DeviceProfiles.load()
+        return DeviceProfiles._profiles
+
+    @staticmethod
+    def names() -> List[str]:
+        """Get the profile names, the default first."""
+        return sorted(DeviceProfiles.all(), key=lambda name: (name != DeviceProfiles.DEFAULT, name))
+
+    @staticmethod
+    def get(name: Optional[str]) -> DeviceProfile:
+        """Get a profile by name (the default profile if unknown).
+
+        Raises:
+            LookupError: If no profiles could be loaded at all
+        """
+        profiles = DeviceProfiles.all()
+        profile = profiles.get(name) or profiles.get(DeviceProfiles.DEFAULT)
+        if profile is None:
+            if not profiles:
+                raise LookupError(f"No device profiles found in {DeviceProfiles.BUILTIN_FOLDER}")
+            profile = profiles[sorted(profiles)[0]]
+        if name and profile.name != name:
+            logger.warning(f"Unknown device profile {name!r}, using {profile.name}")
+        return profile
+
+    @staticmethod
+    def active() -> DeviceProfile:
+        """Get the profile compatibility checks use."""
+        if DeviceProfiles._active is None:
+            DeviceProfiles._active = DeviceProfiles.get(DeviceProfiles.DEFAULT)
+        return DeviceProfiles._active
+
+    @staticmethod
+    def set_active(name: Optional[str]) -> DeviceProfile:
+        """Make a profile the one compatibility checks use.
+
+        Args:
+            name: Profile name (the default profile if unknown)
+
+        Returns:
+            The now active profile
+        """
+        DeviceProfiles._active = DeviceProfiles.get(name)
+        return DeviceProfiles._active
@@ -0,0 +1,138 @@
+"""Detection of identical media files stored under different names."""
+
+import hashlib
+import logging
+import os
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class DuplicateFinder:
+    """Finds byte-identical copies among scanned files without reading them all.
+
+    Files can only be identical if their sizes match, so most of a library
+    is ruled out by the sizes the scan already recorded. Files sharing a
+    size are compared by hashing a few samples (start, middle and end);
+    only files whose samples also match are hashed in full to confirm it.
+    """
+
+    # Bytes hashed at each sample position
+    SAMPLE_BYTES = 1024 * 1024
+
+    # Read size for full hashes
+    BLOCK_BYTES = 4 * 1024 * 1024
+
+    @staticmethod
+    def sample_hash(filepath: str, size: int) -> str:
+        """Hash the start, middle and end of a file.
+
+        Files no bigger than the samples together are hashed whole, so for
+        them a matching sample hash already proves they are identical.
+
+        Args:
+            filepath: File to hash
+            size: Its size in bytes
+
+        Returns:
+            Hex digest
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        sample = DuplicateFinder.SAMPLE_BYTES
+        with open(filepath, "rb") as f:
+            if size <= 3 * sample:
+                digest.update(f.read())
+            else:
+                for offset in (0, (size - sample) // 2, size - sample):
+                    f.seek(offset)
+                    digest.update(f.read(sample))
+        return digest.hexdigest()
+
+    @staticmethod
+    def full_hash(filepath: str, cancelled: Callable[[], bool] = lambda: False
+                  ) -> Optional[str]:
+        """Hash a whole file.
+
+        Args:
+            filepath: File to hash
+            cancelled: Checked between blocks; hashing stops if it returns True
+
+        Returns:
+            Hex digest, or None if cancelled
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        with open(filepath, "rb") as f:
+            for block in iter(lambda: f.read(DuplicateFinder.BLOCK_BYTES), b""):
+                if cancelled():
+                    return None
+                digest.update(block)
+        return digest.hexdigest()
+
+    @staticmethod
+    def find(files: Iterable[Tuple[str, Optional[int]]],
+             on_progress: Optional[Callable[[int, int], None]] = None,
+             cancelled: Callable[[], bool] = lambda: False) -> List[List[str]]:
+        """Group identical files.
+
+        Args:
+            files: (path, size) of each file; a size of None is read from disk
+            on_progress: Optional callback taking (files hashed, files to hash)
+            cancelled: Checked between files; the search stops early if it
+                returns True
+
+        Returns:
+            Groups of two or more identical file paths, each sorted
+        """
+        by_size: Dict[int, List[str]] = {}
+        for filepath, size in files:
+            if size is None:
+                try:
+                    size = os.path.getsize(filepath)
+                except OSError:
+                    continue
+            if size:
+                by_size.setdefault(size, []).append(filepath)
+
+        candidates = {size: paths for size, paths in by_size.items() if len(paths) > 1}
+        total = sum(len(paths) for paths in candidates.values())
+        hashed = 0
+        groups = []
+
+        for size, paths in candidates.items():
+            by_sample: Dict[str, List[str]] = {}
+            for filepath in paths:
+                if cancelled():
+                    return groups
+                try:
+                    key = DuplicateFinder.sample_hash(filepath, size)
+                except OSError as e:
+                    logger.warning(f"Could not read {filepath}: {e}")
+                    continue
+                by_sample.setdefault(key, []).append(filepath)
+                hashed += 1
+                if on_progress:
+                    on_progress(hashed, total)
+
+            for matches in by_sample.values():
+                if len(matches) < 2:
+                    continue
+                if size <= 3 * DuplicateFinder.SAMPLE_BYTES:
+                    groups.append(sorted(matches))
+                    continue
+
+                # Samples can match by chance (e.g. files differing only in
+                # a few bytes between the samples), so confirm with the
+                # whole file
+                by_hash: Dict[str, List[str]] = {}
+                for filepath in matches:
+                    try:
+                        key = DuplicateFinder.full_hash(filepath, cancelled)
+                    except OSError as e:
+                        logger.warning(f"Could not read {filepath}: {e}")
+                        continue
+                    if key is None:
+                        return groups
+                    by_hash.setdefault(key, []).append(filepath)
+                groups.extend(sorted(same) for same in by_hash.values() if len(same) > 1)
+
+        return groups
@@ -0,0 +1,107 @@
+"""Named encoder settings that trade encoding speed against file size."""
+
+import logging
+from typing import Any, Dict, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class EncodingProfile(NamedTuple):
+    """libx264 and AAC options for conversions that transcode."""
+
+    name: str
+    preset: str  # libx264 -preset
+    crf: int  # libx264 -crf; lower means better quality and bigger files
+    audio_bitrate: str  # AAC -b:a
+    tune: Optional[str] = None  # libx264 -tune, e.g. "film" or "animation"
+    threads: Optional[int] = None  # ffmpeg -threads per video transcode (None = automatic)
+
+    @property
+    def speed(self) -> float:
+        """Encode speed relative to the medium preset, for time estimates."""
+        return EncodingProfiles.PRESET_SPEED.get(self.preset, 1.0)
+
+    def describe(self) -> str:
+        """Short description such as "balanced (medium, CRF 23, AAC 128k)"."""
+        options = [self.preset, f"CRF {self.crf}"]
+        if self.tune:
+            options.append(f"tune {self.tune}")
+        options.append(f"AAC {self.audio_bitrate}")
+        if self.threads:
+            options.append(f"{self.threads} threads")
+        return f"{self.name} ({', '.join(options)})"
+
+
+class EncodingProfiles:
+    """The built-in profiles, and the custom one read from the settings."""
+
+    # Rough libx264 speed of each preset relative to medium
+    PRESET_SPEED = {
+        "ultrafast": 8.0,
+        "superfast": 6.0,
+        "veryfast": 4.0,
+        "faster": 2.2,
+        "fast": 1.5,
+        "medium": 1.0,
+        "slow": 0.6,
+        "slower": 0.3,
+        "veryslow": 0.15,
+    }
+
+    FAST = EncodingProfile("fast", "veryfast", 23, "128k")
+    BALANCED = EncodingProfile("balanced", "medium", 23, "128k")
+    ARCHIVAL = EncodingProfile("archival", "slow", 18, "192k")
+
+    BUILTIN = {profile.name: profile for profile in (FAST, BALANCED, ARCHIVAL)}
+    CUSTOM = "custom"
+    NAMES = list(BUILTIN) + [CUSTOM]
+
+    @staticmethod
+    def custom(options: Optional[Dict[str, Any]]) -> EncodingProfile:
+        """Build the custom profile, falling back to balanced for missing options.
+
+        Args:
+            options: Dict with any of "preset", "crf", "audio_bitrate", "tune"
+                and "threads"
+
+        Returns:
+            EncodingProfile named "custom"
+        """
+        base = EncodingProfiles.BALANCED
+        options = options or {}
+        preset = options.get("preset") or base.preset
+        if preset not in EncodingProfiles.PRESET_SPEED:
+            logger.warning(f"Unknown x264 preset {preset!r}, using {base.preset}")
+            preset = base.preset
+        try:
+            crf = int(options.get("crf", base.crf))
+            threads = int(options["threads"]) if options.get("threads") else None
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Invalid custom encoding option: {e}")
+            crf, threads = base.crf, None
+        return EncodingProfile(
+            EncodingProfiles.CUSTOM,
+            preset,
+            min(51, max(0, crf)),
+            str(options.get("audio_bitrate") or base.audio_bitrate),
+            options.get("tune") or None,
+            threads
+        )
+
+    @staticmethod
+    def from_settings(settings, name: Optional[str] = None) -> EncodingProfile:
+        """Get a profile by name, reading the custom one's options from settings.
+
+        Args:
+            settings: Application settings
+            name: Profile name (defaults to the "encoding_profile" setting)
+
+        Returns:
+            EncodingProfile (balanced if the name is unknown)
+        """
+        name = name or settings.get("encoding_profile")
+        if name == EncodingProfiles.CUSTOM:
+            return EncodingProfiles.custom(settings.get("custom_encoding"))
+        if name not in EncodingProfiles.BUILTIN:
+            logger.warning(f"Unknown encoding profile {name!r}, using balanced")
+        return EncodingProfiles.BUILTIN.get(name, EncodingProfiles.BALANCED)
@@ -7,11 +7,87 @@ import logging
 import shutil
 import sys
 import os
-from typing import Optional, Dict, Any
+import threading
+from typing import Callable, IO, List, NamedTuple, Optional, Dict, Any, Tuple
+
+from .conversion_planner import ConversionPlanner, format_duration
+from .process_output import OutputTail, RotatingLog, drain
 
 logger = logging.getLogger(__name__)
 
 
+class ConversionProgress(NamedTuple):
+    """One update from ffmpeg's -progress output."""
+
+    frame: int  # Frames written so far
+    fps: float  # Current encode rate
+    out_seconds: float  # Output timestamp reached
+    speed: float  # Times realtime (0 if not known yet)
+    total_size: int  # Bytes written so far
+    duration: Optional[float]  # Probed duration of the source
+    done: bool  # ffmpeg's final update
+
+    @property
+    def percent(self) -> Optional[float]:
+        """Progress through the source, or None if its duration is unknown."""
+        if self.done:
+            return 100.0
+        if not self.duration:
+            return None
+        return min(100.0, 100.0 * self.out_seconds / self.duration)
+
+    @property
+    def eta_seconds(self) -> Optional[float]:
+        """Estimated seconds until the conversion finishes, if known."""
+        if self.done:
+            return 0.0
+        if not self.duration or self.speed <= 0:
+            return None
+        return max(0.0, self.duration - self.out_seconds) / self.speed
+
+    def describe(self) -> str:
+        """Short status such as "35% · 40 fps · 1.3x · ~20 s left"."""
+        parts = []
+        if self.percent is not None:
+            parts.append(f"{self.percent:.0f}%")
+        if self.fps:
+            parts.append(f"{self.fps:.0f} fps")
+        if self.speed:
+            parts.append(f"{self.speed:.1f}x")
+        if self.eta_seconds is not None and not self.done:
+            parts.append(f"{format_duration(self.eta_seconds)} left")
+        return " · ".join(parts) or "starting"
+
+    @staticmethod
+    def from_fields(fields: Dict[str, str], duration: Optional[float],
+                    done: bool = False) -> "ConversionProgress":
+        """Build an update from one block of -progress key=value lines.
+
+        Args:
+            fields: Keys and values of the block (values may be "N/A")
+            duration: Probed duration of the source, in seconds
+            done: Whether the block ended with progress=end
+
+        Returns:
+            ConversionProgress
+        """
+        def number(key, convert=float):
+            try:
+                return convert(fields.get(key, "").rstrip("x"))
+            except ValueError:
+                return convert(0)
+
+        return ConversionProgress(
+            frame=number("frame", int),
+            fps=number("fps"),
+            out_seconds=max(0, number("out_time_us", int)) / 1e6,
+            speed=number("speed"),
+            total_size=number("total_size", int),
+            duration=duration,
+            done=done
+        )
+
+
 class FFmpegAnalyzer:
     """Analyzes media files using FFmpeg to extract codec information."""
 
@@ -24,6 +100,21 @@ class FFmpegAnalyzer:
     
     _ffprobe_path = None  # Cached path to ffprobe
     
+    # Fast probe limits: enough to identify codecs in all common containers
+    FAST_PROBESIZE = "1000000"        # bytes
+    FAST_ANALYZEDURATION = "1000000"  # microseconds
+    FAST_PROBE_ENTRIES = (
+        "stream=codec_type,codec_name,profile,level,width,height:"
+        "stream_disposition=attached_pic:"
+        "format=format_name,duration,bit_rate"
+    )
+    
+    # ffmpeg/ffprobe messages kept in memory per process, for error reports
+    ERROR_TAIL_BYTES = 16 * 1024
+    
+    # Seconds before a full probe is given up
+    FULL_PROBE_TIMEOUT = 10
+    
     @staticmethod
     def _find_ffprobe() -> Optional[str]:
         """Find ffprobe executable in PATH or common locations.
@@ -104,14 +195,18 @@ class FFmpegAnalyzer:
         return extension in FFmpegAnalyzer.VIDEO_EXTENSIONS
 
     @staticmethod
-    def get_codec_info(filepath: str) -> Optional[Dict[str, Any]]:
+    def get_codec_info(filepath: str, fast: bool = True) -> Optional[Dict[str, Any]]:
         """Extract codec information from a video file using FFprobe.
         
         Args:
             filepath: Path to the video file
+            fast: Try a bounded JSON probe first, falling back to a full
+                probe when its result is ambiguous
             
         Returns:
-            Dictionary with 'video_codec' and 'audio_codec' keys, or None if error
+            Dictionary with 'video_codec' and 'audio_codec' keys (plus
+            'container', 'duration', 'width', 'height', 'video_profile',
+            'video_level' and 'bit_rate' where known), or None if error
         """
         # Find ffprobe executable
         ffprobe_path = FFmpegAnalyzer._find_ffprobe()
@@ -119,49 +214,175 @@ class FFmpegAnalyzer:
             logger.error("FFprobe not found. Ensure FFmpeg is installed and in PATH.")
             return None
         
+        if fast:
+            codec_info = FFmpegAnalyzer._fast_probe(ffprobe_path, filepath)
+            if codec_info:
+                return codec_info
+            logger.debug(f"Fast probe inconclusive for {filepath}, running full probe")
+        
+        return FFmpegAnalyzer._full_probe(ffprobe_path, filepath)
+    
+    @staticmethod
+    def _fast_probe(ffprobe_path: str, filepath: str) -> Optional[Dict[str, Any]]:
+        """Probe only the stream fields we need, as JSON, with bounded probing.
+        
+        Args:
+            ffprobe_path: Path to ffprobe executable
+            filepath: Path to the video file
+            
+        Returns:
+            Codec info dictionary, or None if the result is ambiguous
+            (no video or audio stream found, or a codec left unidentified)
+        """
+        cmd = [
+            ffprobe_path,
+            "-v", "error",
+            "-probesize", FFmpegAnalyzer.FAST_PROBESIZE,
+            "-analyzeduration", FFmpegAnalyzer.FAST_ANALYZEDURATION,
+            "-show_entries", FFmpegAnalyzer.FAST_PROBE_ENTRIES,
+            "-of", "json",
+            filepath
+        ]
+        
         try:
-            # Run ffprobe to get full output
-            cmd = [ffprobe_path, filepath]
             result = subprocess.run(
-                cmd, 
-                capture_output=True, 
-                text=True, 
+                cmd,
+                capture_output=True,
+                text=True,
                 timeout=10
             )
+            if result.returncode != 0:
+                return None
+            data = json.loads(result.stdout or "{}")
+        except subprocess.TimeoutExpired:
+            logger.warning(f"Fast probe timeout analyzing {filepath}")
+            return None
+        except (ValueError, OSError) as e:
+            logger.warning(f"Fast probe failed for {filepath}: {e}")
+            return None
+        
+        streams = data.get("streams") or []
+        video = next((st for st in streams if st.get("codec_type") == "video"
+                      and not st.get("disposition", {}).get("attached_pic")), None)
+        audio = next((st for st in streams if st.get("codec_type") == "audio"), None)
+        
+        # A short probe window can miss late-starting streams (MPEG-TS, VOB)
+        # or leave codecs unidentified; let the full probe decide those
+        if not video or not audio:
+            return None
+        if not video.get("codec_name") or not audio.get("codec_name"):
+            return None
+        
+        fmt = data.get("format") or {}
+        video_codec = FFmpegAnalyzer._clean_codec_name(video["codec_name"])
+        audio_codec = FFmpegAnalyzer._clean_codec_name(audio["codec_name"])
+        
+        logger.info(f"Analyzed {filepath}: video={video_codec}, audio={audio_codec}")
+        
+        return {
+            "video_codec": video_codec,
+            "audio_codec": audio_codec,
+            "container": fmt.get("format_name"),
+            "duration": FFmpegAnalyzer._to_number(fmt.get("duration"), float),
+            "width": video.get("width"),
+            "height": video.get("height"),
+            "video_profile": video.get("profile"),
+            "video_level": video.get("level"),
+            "bit_rate": FFmpegAnalyzer._to_number(fmt.get("bit_rate"), int),
+        }
+    
+    @staticmethod
+    def _to_number(value, kind):
+        """Convert an ffprobe JSON string field to a number.
+        
+        Args:
+            value: Field value (ffprobe reports most numbers as strings)
+            kind: int or float
+            
+        Returns:
+            Converted number, or None if missing or 'N/A'
+        """
+        try:
+            return kind(value)
+        except (TypeError, ValueError):
+            return None
+    
+    @staticmethod
+    def _full_probe(ffprobe_path: str, filepath: str) -> Optional[Dict[str, Any]]:
+        """Run a default ffprobe and parse its human-readable stream banner.
+        
+        Args:
+            ffprobe_path: Path to ffprobe executable
+            filepath: Path to the video file
+            
+        Returns:
+            Codec info dictionary, or None if error
+        """
+        # Patterns for lines like "Stream #0:0: Video: h264 ...",
+        # "Stream #0:1: Audio: aac ...", "Input #0, matroska,webm, from ..."
+        # and "Duration: 00:28:05.15, ..."
+        patterns = {
+            "video": re.compile(r'Stream\s+#\d+:\d+.*?Video:\s+([^\s,\[]+)'),
+            "audio": re.compile(r'Stream\s+#\d+:\d+.*?Audio:\s+([^\s,\[]+)'),
+            "container": re.compile(r'Input\s+#\d+,\s+(.+?),\s+from'),
+            "duration": re.compile(r'Duration:\s+(\d+):(\d+):(\d+(?:\.\d+)?)'),
+        }
+        matches = {}
+        
+        def match_line(line: str):
+            # Only the first match of each pattern counts
+            for name, pattern in patterns.items():
+                if name not in matches:
+                    match = pattern.search(line)
+                    if match:
+                        matches[name] = match
+        
+        try:
+            # The stream banner goes to stderr; read it line by line rather
+            # than holding all of it (metadata, chapters...) in memory
+            process = subprocess.Popen(
+                [ffprobe_path, filepath],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                text=True,
+                errors="replace"
+            )
+            timed_out = threading.Event()
             
-            # Combine stdout and stderr (ffprobe outputs to both)
-            output = result.stdout + result.stderr
+            def expire():
+                timed_out.set()
+                process.kill()
+            
+            timer = threading.Timer(FFmpegAnalyzer.FULL_PROBE_TIMEOUT, expire)
+            timer.start()
+            try:
+                drain(process.stderr, on_line=match_line)
+                process.wait()
+            finally:
+                timer.cancel()
+            if timed_out.is_set():
+                raise subprocess.TimeoutExpired(process.args, FFmpegAnalyzer.FULL_PROBE_TIMEOUT)
             
             video_codec = "Unknown"
             audio_codec = "Unknown"
+            if "video" in matches:
+                video_codec = FFmpegAnalyzer._clean_codec_name(matches["video"].group(1).strip())
+            if "audio" in matches:
+                audio_codec = FFmpegAnalyzer._clean_codec_name(matches["audio"].group(1).strip())
             
-            # Parse output for video codec
-            # Look for lines like "Stream #0:0: Video: h264 ..." or "Stream #0:0: Video: h.264 ..."
-            video_match = re.search(
-                r'Stream\s+#\d+:\d+.*?Video:\s+([^\s,\[]+)',
-                output
-            )
-            if video_match:
-                video_codec = video_match.group(1).strip()
-                # Clean up codec names
-                video_codec = FFmpegAnalyzer._clean_codec_name(video_codec)
-            
-            # Parse output for audio codec
-            # Look for lines like "Stream #0:1: Audio: aac ..." or "Stream #0:1: Audio: vorbis ..."
-            audio_match = re.search(
-                r'Stream\s+#\d+:\d+.*?Audio:\s+([^\s,\[]+)',
-                output
-            )
-            if audio_match:
-                audio_codec = audio_match.group(1).strip()
-                # Clean up codec names
-                audio_codec = FFmpegAnalyzer._clean_codec_name(audio_codec)
+            duration = None
+            if "duration" in matches:
+                hours, minutes, seconds = matches["duration"].groups()
+                duration = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+            container_match = matches.get("container")
             
             logger.info(f"Analyzed {filepath}: video={video_codec}, audio={audio_codec}")
             
             return {
                 "video_codec": video_codec,
-                "audio_codec": audio_codec
+                "audio_codec": audio_codec,
+                "container": container_match.group(1) if container_match else None,
+                "duration": duration,
             }
             
         except subprocess.TimeoutExpired:
@@ -207,49 +428,113 @@ class FFmpegAnalyzer:
 
     @staticmethod
     def convert_to_compatible_format(input_filepath: str, output_filepath: str, 
-                                      on_progress=None) -> bool:
+                                      on_progress=None, plan=None,
+                                      threads: Optional[int] = None,
+                                      duration: Optional[float] = None,
+                                      on_process=None, segments: int = 0,
+                                      log_path: Optional[str] = None,
+                                      extra_outputs: Optional[List[Tuple[str, Any]]] = None) -> bool:
         """Convert video to Samsung TV compatible format (H.264 + AAC).
         
+        ffmpeg writes to a temporary file next to the output, which is renamed
+        to the output path only if the conversion succeeds, so a failed,
+        cancelled or interrupted conversion never leaves a partial output.
+        
         Args:
             input_filepath: Path to input video file
             output_filepath: Path to output video file
-            on_progress: Optional callback function for progress updates
+            on_progress: Optional callback taking a ConversionProgress; called
+                about twice a second while ffmpeg runs, and once at the end
+            plan: ConversionPlan choosing which streams to copy; without one
+                both streams are transcoded
+            threads: Decoder/encoder thread limit for this conversion
+                (defaults to the plan's; ffmpeg picks one thread per core
+                if neither is given)
+            duration: Source duration in seconds, for percentages and ETAs
+                (taken from the plan if not given)
+            on_process: Optional callback taking each ffmpeg subprocess.Popen
+                as soon as it starts, so callers can suspend or terminate it
+            segments: Split a video transcode into this many keyframe-aligned
+                segments encoded by parallel ffmpeg processes (0 or 1 = off;
+                needs a plan and a known duration)
+            log_path: Optional file that receives ffmpeg's full output
+                (rotated when it grows past RotatingLog.max_bytes)
+            extra_outputs: (output path, ConversionPlan) of more copies for
+                other targets, written by the same ffmpeg process from one
+                decode of the source (needs a plan; segments are not used)
             
         Returns:
-            True if conversion successful, False otherwise
+            True if conversion successful (of every output), False otherwise
         """
+        temp_filepath = FFmpegAnalyzer.partial_output_path(output_filepath)
+        extra_outputs = extra_outputs if plan else None
+        temp_extras = [(FFmpegAnalyzer.partial_output_path(path), path)
+                       for path, _ in extra_outputs or []]
+        log = None
         try:
+            if log_path:
+                try:
+                    log = RotatingLog(log_path)
+                except OSError as e:
+                    logger.warning(f"Could not open conversion log {log_path}: {e}")
+            
             # Get ffmpeg path (similar logic to ffprobe)
             ffmpeg_path = shutil.which("ffmpeg")
             if not ffmpeg_path:
                 logger.error("FFmpeg not found in PATH")
                 return False
             
-            cmd = [
-                ffmpeg_path,
-                "-i", input_filepath,
-                "-c:v", "libx264",
-                "-preset", "medium",
-                "-c:a", "aac",
-                "-b:a", "128k",
-                "-y",
-                output_filepath
-            ]
-            
-            # Run conversion
-            process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
+            if plan:
+                output_args = plan.ffmpeg_args()
+                duration = duration or plan.duration
+                threads = threads or plan.threads
+            else:
+                # Both streams transcoded with the default encoding profile;
+                # the muxer follows the output file's extension
+                default_plan = ConversionPlanner.plan(None)
+                output_args = default_plan.video_args() + default_plan.audio_args()
             
-            stdout, stderr = process.communicate()
+            if extra_outputs:
+                outputs = [(temp_filepath, plan)] + [
+                    (temp_path, extra_plan)
+                    for (temp_path, _), (_, extra_plan) in zip(temp_extras, extra_outputs)
+                ]
+                returncode, stderr = FFmpegAnalyzer.run_ffmpeg(
+                    FFmpegAnalyzer._multi_output_command(ffmpeg_path, input_filepath,
+                                                         outputs, threads),
+                    duration, on_progress, on_process, log
+                )
+                success = returncode == 0
+            elif segments > 1 and plan and plan.video == "transcode" and duration:
+                from .segmented_encoder import SegmentedEncoder
+                encoder = SegmentedEncoder(ffmpeg_path, input_filepath, plan, segments,
+                                           threads, duration)
+                success, stderr = encoder.encode(temp_filepath, on_progress, on_process, log)
+            else:
+                thread_args = ["-threads", str(threads)] if threads else []
+                cmd = [
+                    ffmpeg_path,
+                    *thread_args,
+                    "-i", input_filepath,
+                    *thread_args,
+                    *output_args,
+                    "-y",
+                    temp_filepath
+                ]
+                returncode, stderr = FFmpegAnalyzer.run_ffmpeg(
+                    cmd, duration, on_progress, on_process, log
+                )
+                success = returncode == 0
             
-            if process.returncode == 0:
+            if success:
+                for temp_path, path in temp_extras:
+                    os.replace(temp_path, path)
+                os.replace(temp_filepath, output_filepath)
                 logger.info(f"Successfully converted {input_filepath} to {output_filepath}")
                 return True
             else:
+                if log:
+                    stderr += f"\n(full ffmpeg output in {log_path})"
                 logger.error(f"Conversion failed: {stderr}")
                 return False
                 
@@ -259,3 +544,184 @@ class FFmpegAnalyzer:
         except Exception as e:
             logger.error(f"Error converting {input_filepath}: {e}")
             return False
+        finally:
+            if log:
+                log.close()
+            for temp_path in [temp_filepath] + [temp_path for temp_path, _ in temp_extras]:
+                if os.path.exists(temp_path):
+                    try:
+                        os.remove(temp_path)
+                    except OSError as e:
+                        logger.warning(f"Could not remove partial output {temp_path}: {e}")
+    
+    @staticmethod
+    def _multi_output_command(ffmpeg_path: str, input_filepath: str,
+                              outputs: List[Tuple[str, Any]],
+                              threads: Optional[int]) -> List[str]:
+        """Build an ffmpeg command writing several outputs from one decode.
+        
+        Outputs that transcode video take their frames from one split
+        filter, so the source is decoded once however many renditions are
+        made, and each branch is scaled as its plan asks. Outputs that copy
+        video map the input stream directly and need no decoding at all.
+        
+        Args:
+            ffmpeg_path: Path to the ffmpeg executable
+            input_filepath: Path to input video file
+            outputs: (output path, ConversionPlan) for each output
+            threads: Thread limit for the whole conversion (None = automatic)
+            
+        Returns:
+            ffmpeg command line
+        """
+        # "V" skips cover art, which ffmpeg lists as a video stream
+        transcoded = [index for index, (_, plan) in enumerate(outputs)
+                      if plan.video == "transcode"]
+        graph = []
+        video_maps = {}
+        if transcoded:
+            graph.append(f"[0:V:0]split={len(transcoded)}" +
+                         "".join(f"[split{index}]" for index in transcoded))
+            for index in transcoded:
+                video_filter = outputs[index][1].video_filter()
+                if video_filter:
+                    graph.append(f"[split{index}]{video_filter}[video{index}]")
+                    video_maps[index] = f"[video{index}]"
+                else:
+                    video_maps[index] = f"[split{index}]"
+        
+        cmd = [ffmpeg_path]
+        if threads:
+            cmd += ["-threads", str(threads)]
+        cmd += ["-i", input_filepath]
+        if graph:
+            cmd += ["-filter_complex", ";".join(graph)]
+        
+        # The encoders share the conversion's threads
+        encoder_threads = max(1, threads // max(1, len(transcoded))) if threads else None
+        for index, (path, plan) in enumerate(outputs):
+            cmd += ["-map", video_maps.get(index, "0:V:0"), "-map", "0:a:0?"]
+            cmd += plan.video_codec_args() + plan.audio_args()
+            if plan.container == "matroska":
+                cmd += ["-map", "0:s?", "-c:s", "copy"]
+            if encoder_threads and plan.video == "transcode":
+                cmd += ["-threads", str(encoder_threads)]
+            cmd += ["-f", plan.container, "-y", path]
+        return cmd
+    
+    @staticmethod
+    def run_ffmpeg(cmd: List[str], duration: Optional[float] = None,
+                   on_progress: Optional[Callable[[ConversionProgress], None]] = None,
+                   on_process=None,
+                   log: Optional[RotatingLog] = None,
+                   on_line: Optional[Callable[[str], None]] = None,
+                   low_priority: bool = False) -> Tuple[int, str]:
+        """Run an ffmpeg command, reporting its progress as it goes.
+        
+        Only the last ERROR_TAIL_BYTES of ffmpeg's messages are kept in
+        memory, however long it runs.
+        
+        Args:
+            cmd: ffmpeg command line (the executable first, then options);
+                progress options are added here
+            duration: Duration being processed in seconds, for percentages
+            on_progress: Optional callback taking a ConversionProgress
+            on_process: Optional callback taking the subprocess.Popen
+            log: Optional log for the command line and all of its messages
+            on_line: Optional callback for each line ffmpeg prints on stderr
+            low_priority: Run ffmpeg at idle CPU (and, on Linux, I/O)
+                priority so it doesn't slow down anything else
+            
+        Returns:
+            Tuple of (exit code, end of the stderr output)
+        """
+        creationflags = 0
+        prefix = []
+        if low_priority:
+            if sys.platform == "win32":
+                creationflags = subprocess.IDLE_PRIORITY_CLASS
+            else:
+                if shutil.which("ionice"):
+                    prefix += ["ionice", "-c", "3"]
+                if shutil.which("nice"):
+                    prefix += ["nice", "-n", "19"]
+        cmd = prefix + [
+            cmd[0],
+            "-nostdin",
+            # Machine-readable key=value progress on stdout instead of
+            # the human-readable status line on stderr
+            "-progress", "pipe:1",
+            "-nostats",
+            *cmd[1:]
+        ]
+        if log:
+            log.write("$ " + subprocess.list2cmdline(cmd) + "\n")
+        process = subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            errors="replace",
+            creationflags=creationflags
+        )
+        # Drain stderr on the side so ffmpeg never blocks on a full pipe
+        stderr_tail = OutputTail(FFmpegAnalyzer.ERROR_TAIL_BYTES)
+        stderr_reader = threading.Thread(
+            target=drain, args=(process.stderr, stderr_tail, log, on_line), daemon=True
+        )
+        stderr_reader.start()
+        
+        try:
+            if on_process:
+                on_process(process)
+            FFmpegAnalyzer._read_progress(process.stdout, duration, on_progress)
+            process.wait()
+        except BaseException:
+            # A failing callback: nobody reads the progress pipe any more,
+            # so ffmpeg would block on it forever
+            process.kill()
+            process.wait()
+            stderr_reader.join()
+            raise
+        stderr_reader.join()
+        if log:
+            log.write(f"[exit code {process.returncode}]\n")
+        return process.returncode, stderr_tail.text()
+    
+    @staticmethod
+    def partial_output_path(output_filepath: str) -> str:
+        """Get the temporary path a conversion writes to before it succeeds.
+        
+        The extension is kept so ffmpeg still picks the right muxer.
+        
+        Args:
+            output_filepath: Final output path
+            
+        Returns:
+            Path such as "movie_converted.part.mp4" in the same folder
+        """
+        stem, extension = os.path.splitext(output_filepath)
+        return f"{stem}.part{extension}"
+    
+    @staticmethod
+    def _read_progress(stream: IO[str], duration: Optional[float],
+                       on_progress: Optional[Callable[[ConversionProgress], None]]):
+        """Parse ffmpeg's -progress output as it arrives.
+        
+        Each update is a block of key=value lines ending with
+        progress=continue (or progress=end for the last one).
+        
+        Args:
+            stream: ffmpeg's stdout, read until it closes
+            duration: Source duration in seconds (None if unknown)
+            on_progress: Callback for each complete update
+        """
+        fields = {}
+        for line in stream:
+            key, _, value = line.strip().partition("=")
+            if key == "progress":
+                if on_progress:
+                    on_progress(ConversionProgress.from_fields(fields, duration, value == "end"))
+                fields = {}
+            elif key:
+                fields[key] = value
@@ -1,14 +1,256 @@
 """File scanner for recursively finding video files in folders."""
 
 import os
+import queue
+import threading
+from collections import deque
 from pathlib import Path
-from typing import List, Callable, Optional
+from typing import Dict, Iterator, List, Callable, NamedTuple, Optional, Tuple
 from .ffmpeg_analyzer import FFmpegAnalyzer
+from .scan_index import DirectoryRecord, ScanIndex
+
+
+class ScanEntry(NamedTuple):
+    """A video file found during a scan, with the stat data read while walking."""
+
+    path: str
+    size: int
+    mtime_ns: int
+    device: int
+    inode: int
+
+
+class ScanDelta(NamedTuple):
+    """Changes found by an incremental rescan."""
+
+    added: List[ScanEntry]
+    changed: List[ScanEntry]  # Same path, different size/mtime/inode
+    removed: List[str]
+    total: int  # Video files now present
+    directories_listed: int
+    directories_reused: int
 
 
 class FileScanner:
     """Recursively scans folders for video files."""
 
+    @staticmethod
+    def iter_video_files(folder_path: str,
+                         is_cancelled: Optional[Callable[[], bool]] = None,
+                         records: Optional[Dict[str, DirectoryRecord]] = None
+                         ) -> Iterator[ScanEntry]:
+        """Recursively scan a folder, yielding video files as they are found.
+        
+        Uses os.scandir so directory listings come with file type information,
+        and records each file's size, mtime and device/inode during the walk
+        so later stages never need to stat it again. Files are yielded in
+        name order within each directory, before its subdirectories.
+        
+        Args:
+            folder_path: Root folder path to scan
+            is_cancelled: Optional function polled between directories; the
+                walk stops once it returns True
+            records: Optional dict that receives each listed directory's
+                record, for saving to a ScanIndex
+        
+        Yields:
+            ScanEntry for each video file found
+        """
+        if not os.path.isdir(folder_path):
+            return
+        
+        stack = [str(folder_path)]
+        while stack:
+            if is_cancelled and is_cancelled():
+                return
+            
+            entries, subdirs = FileScanner._scan_directory(stack.pop(), records)
+            yield from entries
+            
+            # Depth-first, visiting subdirectories in name order
+            stack.extend(reversed(subdirs))
+    
+    @staticmethod
+    def _scan_directory(directory: str,
+                        records: Optional[Dict[str, DirectoryRecord]] = None
+                        ) -> Tuple[List[ScanEntry], List[str]]:
+        """List one directory's video files and subdirectories.
+        
+        Args:
+            directory: Directory to list
+            records: Optional dict that receives the directory's mtime and
+                listing (unreadable directories are left out)
+            
+        Returns:
+            (video file entries, subdirectory paths), both in name order;
+            empty lists if the directory can't be read
+        """
+        try:
+            if records is not None:
+                # Read before listing, so a change made during the listing
+                # leaves a stale mtime and is picked up by the next rescan
+                mtime_ns = os.stat(directory).st_mtime_ns
+            with os.scandir(directory) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            # Unreadable directory (permissions, vanished mount) - skip it
+            return [], []
+        
+        video_files = []
+        subdirs = []
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    # Skip hidden directories
+                    if not entry.name.startswith('.'):
+                        subdirs.append(entry.path)
+                    continue
+                
+                # Skip macOS metadata files (._filename)
+                if entry.name.startswith('._'):
+                    continue
+                
+                if not FFmpegAnalyzer.is_video_file(entry.name):
+                    continue
+                
+                st = entry.stat()
+            except OSError:
+                # Broken symlink or file removed mid-scan
+                continue
+            
+            video_files.append(
+                ScanEntry(entry.path, st.st_size, st.st_mtime_ns, st.st_dev, st.st_ino)
+            )
+        
+        if records is not None:
+            records[directory] = (mtime_ns, subdirs, [
+                [os.path.basename(e.path), e.size, e.mtime_ns, e.device, e.inode]
+                for e in video_files
+            ])
+        
+        return video_files, subdirs
+    
+    @staticmethod
+    def rescan_folder(folder_path: str, index: ScanIndex,
+                      is_cancelled: Optional[Callable[[], bool]] = None
+                      ) -> Optional[ScanDelta]:
+        """Rescan a folder, re-reading only directories that changed.
+        
+        Every directory is still stat'ed, but one whose mtime matches the
+        index reuses its stored listing instead of being read again. Files
+        modified in place (which doesn't touch the directory's mtime) are
+        only noticed by a full scan. The index is updated afterwards.
+        
+        Args:
+            folder_path: Root folder to rescan
+            index: Directory index from previous scans of this folder
+            is_cancelled: Optional function polled between directories
+            
+        Returns:
+            ScanDelta against the previous scan (every file counts as added
+            if the folder was never indexed), or None if cancelled
+        """
+        root = os.path.abspath(folder_path)
+        previous = index.load(root)
+        records: Dict[str, DirectoryRecord] = {}
+        current: Dict[str, ScanEntry] = {}
+        listed = reused = 0
+        
+        stack = [root] if os.path.isdir(root) else []
+        while stack:
+            if is_cancelled and is_cancelled():
+                return None
+            
+            directory = stack.pop()
+            cached = previous.get(directory)
+            try:
+                mtime_ns = os.stat(directory).st_mtime_ns
+            except OSError:
+                continue  # Removed since its parent was listed
+            
+            if cached and cached[0] == mtime_ns:
+                records[directory] = cached
+                subdirs = cached[1]
+                entries = [ScanEntry(os.path.join(directory, row[0]), *row[1:])
+                           for row in cached[2]]
+                reused += 1
+            else:
+                entries, subdirs = FileScanner._scan_directory(directory, records)
+                listed += 1
+            
+            for entry in entries:
+                current[entry.path] = entry
+            stack.extend(reversed(subdirs))
+        
+        known = {
+            os.path.join(directory, row[0]): tuple(row[1:])
+            for directory, (_, _, rows) in previous.items()
+            for row in rows
+        }
+        added = [entry for path, entry in current.items() if path not in known]
+        changed = [entry for path, entry in current.items()
+                   if path in known and known[path] != tuple(entry[1:])]
+        removed = sorted(path for path in known if path not in current)
+        
+        index.replace([root], records)
+        return ScanDelta(added, changed, removed, len(current), listed, reused)
+    
+    @staticmethod
+    def iter_video_files_parallel(roots: List[str], threads: int,
+                                  is_cancelled: Optional[Callable[[], bool]] = None,
+                                  records: Optional[Dict[str, DirectoryRecord]] = None
+                                  ) -> Iterator[ScanEntry]:
+        """Scan one or more folders with several directory-reading threads.
+        
+        Meant for network mounts and other high-latency storage, where each
+        directory listing and stat costs a round trip. Results arrive in no
+        particular order; use scan_folders() for a sorted list.
+        
+        Args:
+            roots: Folders or drives to scan into one result stream
+            threads: Number of directory-reading threads
+            is_cancelled: Optional function polled by the readers; the scan
+                stops once it returns True
+            records: Optional dict that receives each listed directory's
+                record, for saving to a ScanIndex
+            
+        Yields:
+            ScanEntry for each video file found
+        """
+        roots = FileScanner._distinct_roots(roots)
+        if not roots:
+            return
+        
+        walker = _ParallelWalker(roots, max(1, int(threads)), is_cancelled, records)
+        yield from walker.run()
+    
+    @staticmethod
+    def _distinct_roots(roots: List[str]) -> List[str]:
+        """Drop missing roots and roots nested inside another root."""
+        result = []
+        for root in sorted({os.path.abspath(r) for r in roots if os.path.isdir(r)}):
+            if not any(root == r or root.startswith(os.path.join(r, "")) for r in result):
+                result.append(root)
+        return result
+    
+    @staticmethod
+    def scan_folders(roots: List[str], threads: int = 1) -> List[ScanEntry]:
+        """Scan several folders and return every video file, sorted by path.
+        
+        Args:
+            roots: Folders or drives to scan
+            threads: Number of directory-reading threads (1 scans sequentially)
+            
+        Returns:
+            ScanEntry list sorted by path
+        """
+        if threads > 1:
+            entries = list(FileScanner.iter_video_files_parallel(roots, threads))
+        else:
+            entries = [entry for root in FileScanner._distinct_roots(roots)
+                       for entry in FileScanner.iter_video_files(root)]
+        return sorted(entries, key=lambda entry: entry.path)
+    
     @staticmethod
     def scan_folder(folder_path: str, on_file_found: Optional[Callable[[str], None]] = None) -> List[str]:
         """Recursively scan folder for video files.
@@ -16,7 +258,7 @@ class FileScanner:
         Args:
             folder_path: Root folder path to scan
             on_file_found: Optional callback function called for each file found
-            
+        
         Returns:
             List of full paths to video files found
         """
@@ -30,25 +272,12 @@ class FileScanner:
             return video_files
         
         try:
-            # Recursively walk through all directories
-            for root, dirs, files in os.walk(folder_path):
-                # Skip hidden directories
-                dirs[:] = [d for d in dirs if not d.startswith('.')]
+            for entry in FileScanner.iter_video_files(str(folder_path)):
+                video_files.append(entry.path)
                 
-                for file in sorted(files):
-                    # Skip macOS metadata files (._filename)
-                    if file.startswith('._'):
-                        continue
-                    
-                    filepath = os.path.join(root, file)
-                    
-                    # Check if it's a video file
-                    if FFmpegAnalyzer.is_video_file(filepath):
-                        video_files.append(filepath)
-                        
-                        # Call callback if provided
-                        if on_file_found:
-                            on_file_found(filepath)
+                # Call callback if provided
+                if on_file_found:
+                    on_file_found(entry.path)
         
         except PermissionError:
             pass
@@ -56,3 +285,118 @@ class FileScanner:
             print(f"Error scanning folder: {e}")
         
         return video_files
+
+
+class _ParallelWalker:
+    """Work-stealing pool of directory readers.
+    
+    Each reader keeps its own deque of directories to visit, taking the most
+    recently found one (depth-first, good locality) and, when it runs dry,
+    stealing the oldest directory from another reader's deque (large
+    unexplored subtrees). The walk ends when no directory is queued or being
+    read.
+    """
+    
+    _DONE = object()
+    
+    def __init__(self, roots: List[str], threads: int,
+                 is_cancelled: Optional[Callable[[], bool]],
+                 records: Optional[Dict[str, DirectoryRecord]] = None):
+        self.threads = threads
+        self.is_cancelled = is_cancelled or (lambda: False)
+        self.records = records  # Each key is written by one reader only
+        self.deques = [deque() for _ in range(threads)]
+        for i, root in enumerate(roots):
+            self.deques[i % threads].append(root)
+        self.outstanding = len(roots)  # Directories queued or being read
+        self.condition = threading.Condition()
+        # Bounded so readers pause when the consumer falls behind
+        self.results = queue.Queue(maxsize=4096)
+        # Set when the consumer stops reading (finished, cancelled or closed)
+        self.stopped = threading.Event()
+    
+    def run(self) -> Iterator[ScanEntry]:
+        """Start the readers and yield entries until they all finish."""
+        workers = [
+            threading.Thread(target=self._reader, args=(i,), name=f"scan-{i}", daemon=True)
+            for i in range(self.threads)
+        ]
+        for worker in workers:
+            worker.start()
+        
+        running = len(workers)
+        try:
+            while running:
+                item = self.results.get()
+                if item is _ParallelWalker._DONE:
+                    running -= 1
+                elif not self.is_cancelled():
+                    yield item
+        finally:
+            # The consumer may have stopped early; wake readers blocked on a
+            # full queue so they notice and exit
+            self.stopped.set()
+            self._drain()
+    
+    def _stopping(self) -> bool:
+        """Whether readers should give up (scan cancelled or consumer gone)."""
+        return self.stopped.is_set() or self.is_cancelled()
+    
+    def _drain(self):
+        """Discard everything waiting in the results queue."""
+        try:
+            while True:
+                self.results.get_nowait()
+        except queue.Empty:
+            pass
+    
+    def _next_directory(self, index: int) -> Optional[str]:
+        """Take a directory from our own deque or steal one; None when the walk is over."""
+        own = self.deques[index]
+        with self.condition:
+            while True:
+                if self.outstanding == 0 or self._stopping():
+                    self.condition.notify_all()
+                    return None
+                if own:
+                    return own.pop()
+                for offset in range(1, self.threads):
+                    victim = self.deques[(index + offset) % self.threads]
+                    if victim:
+                        return victim.popleft()
+                self.condition.wait(timeout=0.1)
+    
+    def _reader(self, index: int):
+        """Reader thread: list directories until the walk is complete."""
+        try:
+            while True:
+                directory = self._next_directory(index)
+                if directory is None:
+                    return
+                
+                entries, subdirs = FileScanner._scan_directory(directory, self.records)
+                for entry in entries:
+                    if not self._put(entry):
+                        return
+                
+                with self.condition:
+                    # Reversed so pop() continues with the first subdirectory by name
+                    self.deques[index].extend(reversed(subdirs))
+                    self.outstanding += len(subdirs) - 1
+                    self.condition.notify_all()
+        finally:
+            self._put(_ParallelWalker._DONE, always=True)
+    
+    def _put(self, entry, always: bool = False) -> bool:
+        """Hand an entry to the consumer, giving up if the scan is cancelled.
+        
+        With always set, only a consumer that has stopped reading makes it
+        give up (used for _DONE, which a cancelled consumer still waits for).
+        """
+        while not (self.stopped.is_set() if always else self._stopping()):
+            try:
+                self.results.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
@@ -0,0 +1,135 @@
+"""Decode check for corrupt or truncated media files."""
+
+import logging
+import shutil
+from typing import Any, Dict, NamedTuple, Optional
+
+from .conversion_planner import format_duration
+from .ffmpeg_analyzer import FFmpegAnalyzer
+
+logger = logging.getLogger(__name__)
+
+
+class IntegrityResult(NamedTuple):
+    """Outcome of decoding a whole file."""
+
+    errors: int  # Messages ffmpeg printed at -v error while decoding
+    decoded_seconds: Optional[float]  # Last timestamp that decoded (None if nothing did)
+    duration: Optional[float]  # Duration the container claims
+    exit_code: int  # ffmpeg's exit code
+
+    @property
+    def truncated(self) -> bool:
+        """Whether decoding stopped well before the expected end."""
+        if not self.duration:
+            return False
+        if self.decoded_seconds is None:
+            return True
+        # Only keyframes are decoded, so the end can fall one GOP short
+        tolerance = max(IntegrityChecker.END_TOLERANCE, self.duration * 0.01)
+        return self.decoded_seconds < self.duration - tolerance
+
+    @property
+    def ok(self) -> bool:
+        """Whether the file decoded cleanly to the end."""
+        return self.errors == 0 and self.exit_code == 0 and not self.truncated
+
+    def describe(self) -> str:
+        """Short status such as "Truncated at ~52 min of ~1 h 30 min, 3 decode errors"."""
+        if self.ok:
+            return "Decodes cleanly"
+        parts = []
+        if self.truncated:
+            parts.append(
+                f"Truncated at {format_duration(self.decoded_seconds or 0)} "
+                f"of {format_duration(self.duration)}"
+            )
+        if self.errors:
+            parts.append(f"{self.errors} decode error{'s' if self.errors != 1 else ''}")
+        elif self.exit_code:
+            parts.append(f"ffmpeg exit code {self.exit_code}")
+        return ", ".join(parts)
+
+
+class IntegrityChecker:
+    """Finds damaged files by decoding them as cheaply as possible.
+
+    A file can probe fine and still stop playing halfway: the headers are
+    intact but the data behind them is truncated or corrupt. Decoding only
+    the video keyframes (-skip_frame nokey) plus the audio, into the null
+    muxer, reads the whole file at a fraction of the cost of a full decode.
+    Every message at -v error counts as a decode error, and the last output
+    timestamp shows how far the file actually plays.
+    """
+
+    # Seconds a keyframe-only decode may end before the container's duration
+    END_TOLERANCE = 15.0
+
+    @staticmethod
+    def command(ffmpeg_path: str, filepath: str) -> list:
+        """Build the ffmpeg command that decode-checks a file.
+
+        Args:
+            ffmpeg_path: Path to the ffmpeg executable
+            filepath: File to check
+
+        Returns:
+            ffmpeg command line
+        """
+        return [
+            ffmpeg_path,
+            "-v", "error",
+            "-threads", "1",
+            "-skip_frame", "nokey",
+            "-i", filepath,
+            # "V" skips cover art, which ffmpeg lists as a video stream
+            "-map", "0:V?",
+            "-map", "0:a?",
+            "-f", "null", "-"
+        ]
+
+    @staticmethod
+    def check(filepath: str, media_info: Optional[Dict[str, Any]] = None,
+              on_process=None) -> Optional[IntegrityResult]:
+        """Decode a file at low priority and report how well it went.
+
+        Args:
+            filepath: File to check
+            media_info: Its probe result (gives the expected duration)
+            on_process: Optional callback taking the ffmpeg subprocess.Popen
+
+        Returns:
+            IntegrityResult, or None if ffmpeg could not be run
+        """
+        ffmpeg_path = shutil.which("ffmpeg")
+        if not ffmpeg_path:
+            logger.error("ffmpeg not found for integrity check")
+            return None
+
+        duration = (media_info or {}).get("duration")
+        errors = 0
+        decoded_seconds = None
+
+        def on_line(line: str):
+            nonlocal errors
+            if line.strip():
+                errors += 1
+
+        def on_progress(progress):
+            nonlocal decoded_seconds
+            if progress.out_seconds:
+                decoded_seconds = max(decoded_seconds or 0.0, progress.out_seconds)
+
+        try:
+            exit_code, output = FFmpegAnalyzer.run_ffmpeg(
+                IntegrityChecker.command(ffmpeg_path, filepath),
+                duration, on_progress, on_process, on_line=on_line, low_priority=True
+            )
+        except OSError as e:
+            logger.error(f"Could not run integrity check of {filepath}: {e}")
+            return None
+
+        result = IntegrityResult(errors, decoded_seconds, duration, exit_code)
+        if not result.ok:
+            logger.info(f"Integrity check of {filepath}: {result.describe()}\n{output}")
+        return result
@@ -0,0 +1,287 @@
+"""Throttling of batch conversions around other work on the machine."""
+
+import logging
+import math
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class ConversionWindows:
+    """Times of day when batch conversions may run, such as "22:00-07:00".
+
+    A window whose end is before its start runs past midnight. Without any
+    windows, conversions may run at any time.
+    """
+
+    def __init__(self, windows: Optional[Iterable[str]] = None):
+        """Initialize windows.
+
+        Args:
+            windows: Windows as "HH:MM-HH:MM" strings; invalid ones are
+                logged and ignored
+        """
+        self.windows: List[Tuple[int, int]] = []  # (start, end) in minutes after midnight
+        for text in windows or []:
+            try:
+                self.windows.append(ConversionWindows.parse(text))
+            except ValueError as e:
+                logger.warning(f"Ignoring conversion window {text!r}: {e}")
+
+    @staticmethod
+    def parse(text: str) -> Tuple[int, int]:
+        """Parse a "HH:MM-HH:MM" window into minutes after midnight.
+
+        Raises:
+            ValueError: If the text is not a valid window
+        """
+        start, separator, end = str(text).partition("-")
+        if not separator:
+            raise ValueError("expected HH:MM-HH:MM")
+
+        def minutes(part: str) -> int:
+            hours, _, mins = part.strip().partition(":")
+            value = int(hours) * 60 + int(mins or 0)
+            if not 0 <= value <= 24 * 60:
+                raise ValueError(f"{part.strip()} is not a time of day")
+            return value
+
+        return minutes(start), minutes(end)
+
+    def allows(self, now: datetime) -> bool:
+        """Whether conversions may run at the given time."""
+        if not self.windows:
+            return True
+        minute = now.hour * 60 + now.minute
+        for start, end in self.windows:
+            if start <= end:
+                if start <= minute < end:
+                    return True
+            elif minute >= start or minute < end:
+                return True
+        return False
+
+    def next_start(self, now: datetime) -> Optional[datetime]:
+        """When the next window opens after the given time (None without windows)."""
+        if not self.windows:
+            return None
+        midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        starts = [midnight + timedelta(days=day, minutes=start)
+                  for day in (0, 1) for start, _ in self.windows]
+        return min(start for start in starts if start > now)
+
+
+class LoadSample(NamedTuple):
+    """How busy the machine is, apart from the conversions themselves."""
+
+    load: Optional[float]  # Load average per CPU of other processes (None if not available)
+    iowait: Optional[float]  # Percent of CPU time spent waiting for I/O since the last sample
+
+    def describe(self) -> str:
+        """Short text such as "load 0.4/CPU, I/O wait 3%"."""
+        parts = []
+        if self.load is not None:
+            parts.append(f"load {self.load:.1f}/CPU")
+        if self.iowait is not None:
+            parts.append(f"I/O wait {self.iowait:.0f}%")
+        return ", ".join(parts)
+
+
+class LoadGovernor:
+    """Keeps batch conversions out of the way of other work on the machine.
+
+    Conversion processes run at a lower CPU (nice) and I/O (ionice)
+    priority. Every few seconds the governor also looks at the load average
+    and the share of time CPUs wait for I/O; when either is over its limit,
+    something else (such as a media server streaming a film) needs the
+    machine, and the conversions are held until it has been quiet again
+    for a while. Outside the configured conversion windows they are held
+    too.
+
+    The load average counts the conversions' own threads. The governor
+    keeps its own average of them, decayed the way the kernel's 1-minute
+    load average is, and subtracts it, so a batch doesn't hold itself.
+    """
+
+    DEFAULTS: Dict[str, Any] = {
+        "nice": 10,  # CPU priority of conversions (0 = unchanged, 19 = lowest)
+        "ionice_class": 2,  # Linux I/O class (1 realtime, 2 best-effort, 3 idle, 0 = unchanged)
+        "ionice_level": 7,  # Priority within the best-effort class (7 = lowest)
+        "max_load": 1.0,  # Load per CPU from other processes that holds conversions (None = ignore)
+        "max_iowait": 25.0,  # Percent I/O wait that holds conversions (None = ignore)
+        "check_seconds": 10,  # Time between checks
+        "min_pause_seconds": 60,  # Shortest hold because of load
+    }
+
+    # Held conversions resume once the load is below this share of its limit
+    RESUME_FRACTION = 0.75
+
+    # Time constant of the kernel's 1-minute load average
+    LOAD_PERIOD = 60.0
+
+    def __init__(self, options: Optional[Dict[str, Any]] = None,
+                 windows: Optional[Iterable[str]] = None):
+        """Initialize governor.
+
+        Args:
+            options: Overrides for DEFAULTS
+            windows: Times of day conversions may run (see ConversionWindows)
+        """
+        self.options = dict(LoadGovernor.DEFAULTS)
+        self.options.update(options or {})
+        self.windows = ConversionWindows(windows)
+        self.cpus = os.cpu_count() or 1
+        self._own_load = 0.0  # Decayed average of the conversions' running threads
+        self._last_sample: Optional[float] = None
+        self._cpu_times = LoadGovernor._read_cpu_times()
+        self._held_since: Optional[float] = None  # When a hold because of load began
+
+    def apply_priority(self, process: subprocess.Popen):
+        """Lower a conversion process's CPU and I/O priority.
+
+        Args:
+            process: Started ffmpeg (or ffprobe) process
+        """
+        nice = int(self.options.get("nice") or 0)
+        io_class = int(self.options.get("ionice_class") or 0)
+        try:
+            if sys.platform == "win32":
+                if nice > 0:
+                    import ctypes
+
+                    priority = (subprocess.IDLE_PRIORITY_CLASS if nice >= 15
+                                else subprocess.BELOW_NORMAL_PRIORITY_CLASS)
+                    ctypes.windll.kernel32.SetPriorityClass(int(process._handle), priority)
+                return
+            if nice > 0:
+                os.setpriority(os.PRIO_PROCESS, process.pid, min(19, nice))
+        except OSError as e:
+            logger.debug(f"Could not lower priority of process {process.pid}: {e}")
+            return
+
+        ionice = shutil.which("ionice") if sys.platform.startswith("linux") else None
+        if io_class and ionice:
+            cmd = [ionice, "-c", str(io_class)]
+            if io_class in (1, 2):
+                cmd += ["-n", str(int(self.options.get("ionice_level") or 0))]
+            try:
+                subprocess.run(cmd + ["-p", str(process.pid)], stdout=subprocess.DEVNULL,
+                               stderr=subprocess.DEVNULL, timeout=5)
+            except (OSError, subprocess.TimeoutExpired) as e:
+                logger.debug(f"Could not set I/O priority of process {process.pid}: {e}")
+
+    @staticmethod
+    def _read_cpu_times() -> Optional[Tuple[int, int]]:
+        """Read (I/O wait, total) CPU time from /proc/stat (Linux only)."""
+        try:
+            with open("/proc/stat", "r") as f:
+                fields = f.readline().split()
+        except OSError:
+            return None
+        if not fields or fields[0] != "cpu" or len(fields) < 6:
+            return None
+        # user nice system idle iowait irq softirq steal (guest time is
+        # already included in user)
+        times = [int(value) for value in fields[1:9]]
+        return times[4], sum(times)
+
+    def sample(self, own_threads: int) -> LoadSample:
+        """Measure the load from other processes since the last sample.
+
+        Args:
+            own_threads: Threads of the conversions running right now
+                (suspended ones don't count)
+
+        Returns:
+            LoadSample
+        """
+        now = time.monotonic()
+        if self._last_sample is not None:
+            decay = math.exp(-(now - self._last_sample) / LoadGovernor.LOAD_PERIOD)
+            self._own_load = self._own_load * decay + own_threads * (1 - decay)
+        self._last_sample = now
+
+        load = None
+        if hasattr(os, "getloadavg"):
+            try:
+                load = max(0.0, os.getloadavg()[0] - self._own_load) / self.cpus
+            except OSError:
+                pass
+
+        iowait = None
+        cpu_times = LoadGovernor._read_cpu_times()
+        if cpu_times and self._cpu_times:
+            waited = cpu_times[0] - self._cpu_times[0]
+            total = cpu_times[1] - self._cpu_times[1]
+            if total > 0:
+                iowait = 100.0 * waited / total
+        self._cpu_times = cpu_times
+        return LoadSample(load, iowait)
+
+    def check(self, own_threads: int, now: Optional[datetime] = None
+              ) -> Tuple[Optional[str], str]:
+        """Decide whether conversions should be held right now.
+
+        Args:
+            own_threads: Threads of the conversions running right now
+            now: Current time (for the conversion windows)
+
+        Returns:
+            (reason to hold or None to run, status text for the user)
+        """
+        now = now or datetime.now()
+        sample = self.sample(own_threads)
+        if not self.windows.allows(now):
+            self._held_since = None
+            reason = f"Outside conversion hours, resuming at {self.windows.next_start(now):%H:%M}"
+            return reason, reason
+
+        held = self._held_since is not None
+        scale = LoadGovernor.RESUME_FRACTION if held else 1.0
+        max_load = self.options.get("max_load")
+        max_iowait = self.options.get("max_iowait")
+        busy = []
+        if max_load is not None and sample.load is not None and sample.load > max_load * scale:
+            busy.append("load")
+        if (max_iowait is not None and sample.iowait is not None
+                and sample.iowait > max_iowait * scale):
+            busy.append("I/O wait")
+
+        measured = sample.describe()
+        if held and not busy:
+            if time.monotonic() - self._held_since >= self.options.get("min_pause_seconds", 0):
+                self._held_since = None
+                logger.info(f"Resuming conversions ({measured})")
+            else:
+                busy.append("settling")
+        if busy:
+            if self._held_since is None:
+                self._held_since = time.monotonic()
+                logger.info(f"Holding conversions, system busy ({measured})")
+            reason = f"Held, system busy ({measured})"
+            return reason, reason
+        status = f"Running at low priority ({measured})" if measured else "Running at low priority"
+        return None, status
+
+    def watch(self, own_threads: Callable[[], int],
+              on_check: Callable[[Optional[str], str], None],
+              stop: threading.Event):
+        """Check the load every few seconds until stopped.
+
+        Args:
+            own_threads: Returns the threads of the running conversions
+            on_check: Called after each check with the result of check()
+            stop: Set to end the watch
+        """
+        interval = max(1.0, float(self.options.get("check_seconds") or 10))
+        while True:
+            on_check(*self.check(own_threads()))
+            if stop.wait(interval):
+                break
@@ -0,0 +1,59 @@
+"""Playback targets a conversion can produce a copy for."""
+
+from typing import FrozenSet, Iterable, List, NamedTuple, Optional
+
+
+class OutputTarget(NamedTuple):
+    """A device class the converted file has to play on."""
+
+    name: str  # Identifier used in settings and conversion plans
+    label: str  # Shown in the target picker
+    suffix: str  # Added to the output file name, e.g. "_converted"
+    max_height: Optional[int] = None  # Taller video is scaled down to this
+    container: Optional[str] = None  # ffmpeg muxer to always use (None = planner's choice)
+    crf: Optional[int] = None  # Overrides the encoding profile's CRF
+    audio_bitrate: Optional[str] = None  # Overrides the encoding profile's AAC bitrate
+    # Codecs the target plays, so their streams are copied (None = the
+    # rules of the active device profile)
+    video_codecs: Optional[FrozenSet[str]] = None
+    audio_codecs: Optional[FrozenSet[str]] = None
+
+
+class OutputTargets:
+    """The targets Moovy can convert for."""
+
+    TV = OutputTarget("tv", "TV (device profile, original size)", "_converted")
+    MOBILE = OutputTarget(
+        "mobile", "Mobile (H.264/AAC MP4, up to 720p)", "_mobile",
+        max_height=720,
+        container="mp4",
+        crf=26,
+        audio_bitrate="96k",
+        video_codecs=frozenset({"h264"}),
+        audio_codecs=frozenset({"aac"})
+    )
+
+    DEFAULT = TV.name
+    ALL = {target.name: target for target in (TV, MOBILE)}
+
+    @staticmethod
+    def get(name: Optional[str]) -> OutputTarget:
+        """Get a target by name (the default target if unknown)."""
+        return OutputTargets.ALL.get(name, OutputTargets.TV)
+
+    @staticmethod
+    def from_names(names: Iterable[str]) -> List[OutputTarget]:
+        """Get the known targets among names, in order and without repeats.
+
+        Args:
+            names: Target names, e.g. from the "conversion_targets" setting
+
+        Returns:
+            Targets (the default target if none of the names is known)
+        """
+        targets = []
+        for name in names or []:
+            target = OutputTargets.ALL.get(name)
+            if target and target not in targets:
+                targets.append(target)
+        return targets or [OutputTargets.TV]
@@ -0,0 +1,73 @@
+"""Bounded hand-off queue between the scan and probe stages."""
+
+import queue
+import threading
+from typing import Any, Callable, Iterator, Optional
+
+
+class PipelineQueue:
+    """Bounded queue that one stage fills and the next consumes.
+
+    put() blocks while the queue is full, so a fast producer (the folder
+    walker) can only run a fixed number of items ahead of the consumer
+    (the probe pool). Iterating the queue yields items until close().
+    """
+
+    # Queued by close() to wake a waiting consumer; never yielded
+    _CLOSED = object()
+
+    def __init__(self, maxsize: int):
+        """Initialize queue.
+
+        Args:
+            maxsize: Maximum number of items waiting to be consumed
+        """
+        self._queue = queue.Queue(maxsize=max(1, int(maxsize)))
+        self._closed = threading.Event()
+        self.maxsize = self._queue.maxsize
+
+    @property
+    def depth(self) -> int:
+        """Number of items waiting to be consumed."""
+        return self._queue.qsize()
+
+    def put(self, item: Any, is_cancelled: Optional[Callable[[], bool]] = None) -> bool:
+        """Add an item, waiting while the queue is full.
+
+        Args:
+            item: Item to hand to the next stage
+            is_cancelled: Optional function polled while waiting; the put is
+                abandoned once it returns True
+
+        Returns:
+            True if the item was queued, False if cancelled while waiting
+        """
+        while True:
+            if is_cancelled and is_cancelled():
+                return False
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+
+    def close(self):
+        """Signal that no more items will be added."""
+        self._closed.set()
+        try:
+            self._queue.put_nowait(PipelineQueue._CLOSED)
+        except queue.Full:
+            pass  # The consumer notices the closed flag on its next timeout
+
+    def __iter__(self) -> Iterator[Any]:
+        """Yield items in order until the queue is closed and drained."""
+        while True:
+            try:
+                item = self._queue.get(timeout=0.1)
+            except queue.Empty:
+                if self._closed.is_set() and self._queue.empty():
+                    return
+                continue
+            if item is PipelineQueue._CLOSED:
+                return
+            yield item
@@ -0,0 +1,242 @@
+"""Persistent cache of codec probe results."""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (size, mtime_ns, device, inode) - changes whenever the file is replaced or modified
+FileIdentity = Tuple[int, int, int, int]
+
+
+class ProbeCache:
+    """Stores get_codec_info results in SQLite, keyed by file identity.
+
+    A cached result is only returned while the file's size, mtime and
+    device/inode still match the values recorded when it was probed.
+    Integrity check results are kept the same way in a table of their own.
+    """
+
+    # Bump when the table layout or the stored result format changes
+    SCHEMA_VERSION = 3
+
+    TABLES = ("probe_results", "integrity_results")
+
+    def __init__(self, db_path: str):
+        """Open (or create) the cache database.
+
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        self.db_path = db_path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Shared between the analysis threads; access is serialized by _lock
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._init_schema()
+
+    def _init_schema(self):
+        """Create tables, discarding the cache if it has an older schema."""
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != ProbeCache.SCHEMA_VERSION:
+            if version:
+                logger.info(f"Probe cache schema {version} is outdated, rebuilding")
+            for table in ProbeCache.TABLES:
+                self._conn.execute(f"DROP TABLE IF EXISTS {table}")
+
+        for table in ProbeCache.TABLES:
+            self._conn.execute(
+                f"""
+                CREATE TABLE IF NOT EXISTS {table} (
+                    path TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    device INTEGER NOT NULL,
+                    inode INTEGER NOT NULL,
+                    result TEXT NOT NULL
+                )
+                """
+            )
+        self._conn.execute(f"PRAGMA user_version={ProbeCache.SCHEMA_VERSION}")
+        self._conn.commit()
+
+    @staticmethod
+    def identity(filepath: str) -> Optional[FileIdentity]:
+        """Get the identity of a file on disk.
+
+        Args:
+            filepath: Path to the file
+
+        Returns:
+            (size, mtime_ns, device, inode), or None if the file can't be read
+        """
+        try:
+            st = os.stat(filepath)
+        except OSError:
+            return None
+        return (st.st_size, st.st_mtime_ns, st.st_dev, st.st_ino)
+
+    def get(self, filepath: str, identity: Optional[FileIdentity] = None
+            ) -> Optional[Dict[str, Any]]:
+        """Look up a cached probe result.
+
+        Args:
+            filepath: Path to the video file
+            identity: File identity if already known (stat is skipped)
+
+        Returns:
+            Cached codec info, or None if missing or the file has changed
+        """
+        identity = identity or ProbeCache.identity(filepath)
+
+        with self._lock:
+            row = None
+            if identity:
+                row = self._conn.execute(
+                    "SELECT size, mtime_ns, device, inode, result "
+                    "FROM probe_results WHERE path = ?",
+                    (filepath,)
+                ).fetchone()
+
+            if row and tuple(row[:4]) == tuple(identity):
+                self.hits += 1
+                return json.loads(row[4])
+
+            self.misses += 1
+            return None
+
+    def put(self, filepath: str, result: Dict[str, Any],
+            identity: Optional[FileIdentity] = None):
+        """Store a probe result.
+
+        Args:
+            filepath: Path to the video file
+            result: Codec info returned by the probe
+            identity: File identity if already known (stat is skipped)
+        """
+        identity = identity or ProbeCache.identity(filepath)
+        if not identity:
+            return
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO probe_results "
+                "(path, size, mtime_ns, device, inode, result) VALUES (?, ?, ?, ?, ?, ?)",
+                (filepath, *identity, json.dumps(result))
+            )
+            self._conn.commit()
+
+    def get_integrity(self, filepath: str, identity: Optional[FileIdentity] = None
+                      ) -> Optional[Dict[str, Any]]:
+        """Look up a cached integrity check result.
+
+        Unlike get(), this doesn't count towards the hit/miss statistics.
+
+        Args:
+            filepath: Path to the video file
+            identity: File identity if already known (stat is skipped)
+
+        Returns:
+            Cached result (IntegrityResult fields), or None if missing or the
+            file has changed since it was checked
+        """
+        identity = identity or ProbeCache.identity(filepath)
+        if not identity:
+            return None
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size, mtime_ns, device, inode, result "
+                "FROM integrity_results WHERE path = ?",
+                (filepath,)
+            ).fetchone()
+        if row and tuple(row[:4]) == tuple(identity):
+            return json.loads(row[4])
+        return None
+
+    def put_integrity(self, filepath: str, result: Dict[str, Any],
+                      identity: Optional[FileIdentity] = None):
+        """Store an integrity check result.
+
+        Args:
+            filepath: Path to the video file
+            result: IntegrityResult fields
+            identity: File identity if already known (stat is skipped)
+        """
+        identity = identity or ProbeCache.identity(filepath)
+        if not identity:
+            return
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO integrity_results "
+                "(path, size, mtime_ns, device, inode, result) VALUES (?, ?, ?, ?, ?, ?)",
+                (filepath, *identity, json.dumps(result))
+            )
+            self._conn.commit()
+
+    def evict_missing(self, root: str, present_paths: Iterable[str]) -> int:
+        """Remove entries under a scanned folder for files that no longer exist.
+
+        Args:
+            root: Folder that was scanned
+            present_paths: Every video file path found under root
+
+        Returns:
+            Number of entries removed
+        """
+        present = set(present_paths)
+        prefix = os.path.join(root, "")
+
+        with self._lock:
+            stale = []
+            for table in ProbeCache.TABLES:
+                rows = self._conn.execute(
+                    f"SELECT path FROM {table} WHERE substr(path, 1, ?) = ?",
+                    (len(prefix), prefix)
+                ).fetchall()
+                table_stale = [(path,) for (path,) in rows if path not in present]
+                if table_stale:
+                    self._conn.executemany(f"DELETE FROM {table} WHERE path = ?", table_stale)
+                if table == "probe_results":
+                    stale = table_stale
+            self._conn.commit()
+
+        if stale:
+            logger.info(f"Evicted {len(stale)} deleted files from probe cache")
+        return len(stale)
+
+    def remove(self, paths: Iterable[str]):
+        """Remove entries for specific files, e.g. ones a rescan found deleted.
+
+        Args:
+            paths: Video file paths to forget
+        """
+        paths = [(path,) for path in paths]
+        with self._lock:
+            for table in ProbeCache.TABLES:
+                self._conn.executemany(f"DELETE FROM {table} WHERE path = ?", paths)
+            self._conn.commit()
+
+    def reset_counters(self):
+        """Reset the hit/miss counters."""
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
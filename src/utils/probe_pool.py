@@ -0,0 +1,222 @@
+"""Bounded worker pool for running codec probes concurrently."""
+
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from .device_limits import DeviceLimits, DeviceQueue
+from .ffmpeg_analyzer import FFmpegAnalyzer
+
+logger = logging.getLogger(__name__)
+
+
+class ProbePool:
+    """Runs codec probes on a bounded thread pool.
+
+    Each probe spends nearly all its time waiting on an ffprobe subprocess,
+    so threads are enough to keep many probes in flight at once.
+
+    With device limits, items are also spread across storage devices:
+    each device gets at most its own cap of probes at a time, and the
+    devices take turns, so every disk stays busy without being thrashed.
+    """
+
+    _FEED_DONE = object()
+
+    def __init__(self, workers: int,
+                 probe_fn: Optional[Callable[[str], Optional[Dict[str, Any]]]] = None,
+                 device_limits: Optional[DeviceLimits] = None,
+                 device_of: Optional[Callable[[Any], Optional[int]]] = None,
+                 order_key: Optional[Callable[[Any], tuple]] = None,
+                 lookahead: int = 256):
+        """Initialize probe pool.
+
+        Args:
+            workers: Number of probes to run concurrently (at least 1)
+            probe_fn: Function taking a file path and returning codec info
+                (defaults to FFmpegAnalyzer.get_codec_info)
+            device_limits: Optional caps per storage device
+            device_of: Function returning an item's device (st_dev), e.g.
+                as recorded by the scan; the file is stat()ed if it gives
+                None or 0
+            order_key: Optional function returning an item's sort key (such
+                as LocalityOrder.key); each device's read-ahead items are
+                probed in key order (needs device_limits)
+            lookahead: Items read ahead to find work for idle devices and
+                to sort
+        """
+        self.workers = max(1, int(workers))
+        self.probe_fn = probe_fn or FFmpegAnalyzer.get_codec_info
+        self.device_limits = device_limits
+        self.device_of = device_of
+        self.order_key = order_key
+        self.lookahead = lookahead
+        self._cancelled = threading.Event()
+        self.submitted = 0
+        self.completed = 0
+
+    def cancel(self):
+        """Stop submitting new probes. Probes already running are allowed to finish."""
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether cancel() has been called."""
+        return self._cancelled.is_set()
+
+    @property
+    def in_flight(self) -> int:
+        """Number of probes submitted but not yet returned to the caller."""
+        return self.submitted - self.completed
+
+    def imap_unordered(self, items: Iterable[Any],
+                       path_of: Callable[[Any], str] = lambda item: item
+                       ) -> Iterator[Tuple[Any, Optional[Dict[str, Any]]]]:
+        """Probe items concurrently, yielding results as they complete.
+
+        Items are pulled from the iterable lazily on a feeder thread, so at
+        most twice the worker count are queued at any time, and an iterable
+        that blocks (such as a PipelineQueue still being filled by a scan)
+        never holds back results that are already finished.
+
+        Args:
+            items: Items to probe (file paths or objects holding one)
+            path_of: Function returning the file path for an item
+
+        Yields:
+            (item, codec_info) tuples in completion order
+        """
+        results = queue.Queue()
+        slots = threading.Semaphore(self.workers * 2)
+        feed_error = []
+        self.submitted = 0
+        self.completed = 0
+
+        with ThreadPoolExecutor(max_workers=self.workers,
+                                thread_name_prefix="probe") as executor:
+
+            devices = None
+            source = ((None, item) for item in items)
+            if self.device_limits:
+                devices = DeviceQueue(self.lookahead)
+                source = self._interleave(items, path_of, devices, feed_error)
+
+            def on_done(future, item, device):
+                if devices:
+                    devices.done(device)
+                results.put((item, future.result()))
+
+            def feed():
+                try:
+                    for device, item in source:
+                        # Wait for a free slot, giving up if cancelled
+                        while not slots.acquire(timeout=0.1):
+                            if self.cancelled:
+                                return
+                        if self.cancelled:
+                            return
+                        future = executor.submit(self._probe, path_of(item))
+                        self.submitted += 1
+                        future.add_done_callback(
+                            lambda f, item=item, device=device: on_done(f, item, device)
+                        )
+                except Exception as e:
+                    feed_error.append(e)
+                finally:
+                    results.put(ProbePool._FEED_DONE)
+
+            feeder = threading.Thread(target=feed, name="probe-feeder", daemon=True)
+            feeder.start()
+
+            try:
+                feeding = True
+                while feeding or self.completed < self.submitted:
+                    entry = results.get()
+                    if entry is ProbePool._FEED_DONE:
+                        feeding = False
+                        continue
+                    self.completed += 1
+                    slots.release()
+                    yield entry
+            finally:
+                # Stop the feeder if the caller abandons the results early
+                if feeding:
+                    self.cancel()
+                feeder.join()
+
+        if feed_error:
+            raise feed_error[0]
+
+    def _interleave(self, items: Iterable[Any], path_of: Callable[[Any], str],
+                    devices: DeviceQueue, errors: list) -> Iterator[Tuple[Any, Any]]:
+        """Reorder items so each device stays within its cap and devices take turns.
+
+        A reader thread sorts items into per-device queues (in order_key
+        order), so a blocking iterable doesn't stop the devices that still
+        have work queued.
+
+        Args:
+            items: Items to probe
+            path_of: Function returning the file path for an item
+            devices: Queue handing out the items
+            errors: List receiving an exception raised by the iterable
+
+        Yields:
+            (device, item) tuples
+        """
+        def read():
+            try:
+                for item in items:
+                    path = path_of(item)
+                    path = getattr(path, "filepath", path)
+                    device = self.device_of(item) if self.device_of else None
+                    # Windows scans record no st_dev (it reads as 0)
+                    if not device:
+                        device = DeviceLimits.device_of(path)
+                    limit = self.device_limits.limit(device, path)
+                    key = self.order_key(item) if self.order_key else None
+                    while True:
+                        if self.cancelled:
+                            return
+                        try:
+                            devices.put(device, item, limit, timeout=0.1, key=key)
+                            break
+                        except queue.Full:
+                            pass
+            except Exception as e:
+                errors.append(e)
+            finally:
+                devices.close()
+
+        reader = threading.Thread(target=read, name="probe-reader", daemon=True)
+        reader.start()
+        try:
+            while not self.cancelled:
+                try:
+                    entry = devices.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if entry is None:
+                    return
+                yield entry
+        finally:
+            if reader.is_alive() and not self.cancelled:
+                self.cancel()
+            reader.join()
+
+    def _probe(self, filepath: str) -> Optional[Dict[str, Any]]:
+        """Run the probe function, turning unexpected errors into None.
+
+        Args:
+            filepath: Path to the video file
+
+        Returns:
+            Codec info dictionary, or None if the probe failed
+        """
+        try:
+            return self.probe_fn(filepath)
+        except Exception as e:
+            logger.error(f"Error probing {filepath}: {e}")
+            return None
@@ -0,0 +1,168 @@
+"""Bounded capture of subprocess output, with optional rotating log files."""
+
+import glob
+import logging
+import os
+import threading
+from collections import deque
+from typing import IO, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class OutputTail:
+    """Keeps only the last max_bytes of a process's output lines.
+
+    A multi-hour encode can print warnings the whole way through; holding
+    all of it in memory for an error message nobody reads past the last
+    screenful would make memory grow with every running job.
+    """
+
+    def __init__(self, max_bytes: int = 16 * 1024):
+        """Initialize buffer.
+
+        Args:
+            max_bytes: Characters of output to keep (at least the last line)
+        """
+        self.max_bytes = max_bytes
+        self._lines = deque()
+        self._size = 0
+        self.dropped = 0  # Lines discarded to stay within max_bytes
+
+    def append(self, line: str):
+        """Add a line, dropping the oldest ones beyond the limit."""
+        if len(line) > self.max_bytes:
+            line = line[-self.max_bytes:]
+        self._lines.append(line)
+        self._size += len(line)
+        while self._size > self.max_bytes and len(self._lines) > 1:
+            self._size -= len(self._lines.popleft())
+            self.dropped += 1
+
+    def text(self) -> str:
+        """The kept output, noting how much came before it."""
+        kept = "".join(self._lines)
+        if self.dropped:
+            return f"[{self.dropped} earlier lines omitted]\n{kept}"
+        return kept
+
+
+class RotatingLog:
+    """Append-only log file that rolls over to path.1, path.2... when full.
+
+    Safe to write from several threads, e.g. the processes of a segmented
+    encode sharing one job's log.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 1024 * 1024, backups: int = 2):
+        """Open (or create) the log.
+
+        Args:
+            path: Log file path; its folder is created if needed
+            max_bytes: Size at which the file is rotated
+            backups: Rotated files to keep
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._lock = threading.Lock()
+        self._file: Optional[IO[str]] = None
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8", errors="replace")
+
+    def write(self, line: str):
+        """Append a line (with its newline), rotating first if the file is full."""
+        with self._lock:
+            if self._file is None:
+                return
+            try:
+                if self._file.tell() + len(line) > self.max_bytes:
+                    self._rotate()
+                self._file.write(line)
+                self._file.flush()
+            except OSError as e:
+                logger.warning(f"Could not write log {self.path}: {e}; logging stopped")
+                self._close()
+
+    def _rotate(self):
+        """Shift path -> path.1 -> path.2... and start a new file (lock held)."""
+        self._file.close()
+        for index in range(self.backups, 0, -1):
+            source = self.path if index == 1 else f"{self.path}.{index - 1}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index}")
+        if not self.backups:
+            os.remove(self.path)
+        self._file = open(self.path, "w", encoding="utf-8", errors="replace")
+
+    def _close(self):
+        """Close the file (lock held)."""
+        if self._file is not None:
+            try:
+                self._file.close()
+            except OSError:
+                pass
+            self._file = None
+
+    def close(self):
+        """Close the file; later writes are ignored."""
+        with self._lock:
+            self._close()
+
+    @staticmethod
+    def prune(directory: str, keep: int):
+        """Delete all but the newest keep logs (with their rotated files) in a folder.
+
+        Args:
+            directory: Folder of *.log files
+            keep: Logs to keep
+        """
+        def modified(path):
+            try:
+                return os.path.getmtime(path)
+            except OSError:
+                return 0.0
+
+        logs = sorted(glob.glob(os.path.join(glob.escape(directory), "*.log")),
+                      key=modified, reverse=True)
+        for path in logs[keep:]:
+            for old in [path] + glob.glob(glob.escape(path) + ".*"):
+                try:
+                    os.remove(old)
+                except OSError as e:
+                    logger.warning(f"Could not remove old log {old}: {e}")
+
+
+def job_log_path(directory: str, input_path: str, job_id: str) -> str:
+    """Log file for one conversion, e.g. "Movie.3f2a9c1e.log".
+
+    Args:
+        directory: Folder for conversion logs
+        input_path: File being converted
+        job_id: Unique job identifier (its start keeps the name unique)
+    """
+    name = os.path.splitext(os.path.basename(input_path))[0]
+    return os.path.join(directory, f"{name}.{job_id[:8]}.log")
+
+
+def drain(stream: IO[str], tail: Optional[OutputTail] = None,
+          log: Optional[RotatingLog] = None,
+          on_line: Optional[Callable[[str], None]] = None):
+    """Read a stream line by line until it closes, without keeping all of it.
+
+    Args:
+        stream: Text stream of a subprocess
+        tail: Optional buffer for the last lines (for error messages)
+        log: Optional log every line is also written to
+        on_line: Optional callback for each line
+    """
+    for line in stream:
+        if tail:
+            tail.append(line)
+        if log:
+            log.write(line)
+        if on_line:
+            on_line(line)
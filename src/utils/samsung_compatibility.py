@@ -1,26 +1,16 @@
 """Samsung TV compatibility checker for video codecs."""
 
-from typing import Tuple
+from typing import Any, Dict, Optional
 
+from .device_profiles import DeviceProfile, DeviceProfiles
 
-class SamsungTVCompatibility:
-    """Checks if a video/audio codec combination is compatible with Samsung TVs."""
 
-    # Compatible video codecs for Samsung TVs
-    COMPATIBLE_VIDEO_CODECS = {
-        "h264", "avc", "h.264",  # H.264 / AVC
-        "h265", "hevc", "h.265"   # H.265 / HEVC
-    }
+class SamsungTVCompatibility:
+    """Checks if a file plays on the TV or player being converted for.
 
-    # Compatible audio codecs for Samsung TVs
-    COMPATIBLE_AUDIO_CODECS = {
-        "aac",
-        "mp3",
-        "ac3",
-        "eac3",
-        "flac",
-        "pcm"
-    }
+    The rules come from the active device profile (see DeviceProfiles),
+    which is the Samsung TV profile unless another one is chosen.
+    """
 
     @staticmethod
     def normalize_codec_name(codec: str) -> str:
@@ -32,51 +22,55 @@ class SamsungTVCompatibility:
         Returns:
             Normalized codec name (lowercase, cleanup)
         """
-        if not codec:
-            return ""
-        
-        # Clean up and normalize codec names
-        codec_lower = codec.lower().strip()
-        
-        # Handle specific cases
-        replacements = {
-            "mpeg2video": "mpeg2",
-            "libx264": "h264",
-            "libx265": "h265",
-            "libfdk_aac": "aac",
-        }
-        
-        for old, new in replacements.items():
-            if codec_lower.startswith(old):
-                codec_lower = codec_lower.replace(old, new)
-        
-        return codec_lower
+        return DeviceProfile.normalize_codec_name(codec)
+
+    @staticmethod
+    def _info(video_codec: str, audio_codec: str,
+              media_info: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Probe fields to check: the full probe result if there is one."""
+        return media_info or {"video_codec": video_codec, "audio_codec": audio_codec}
 
     @staticmethod
-    def is_compatible(video_codec: str, audio_codec: str) -> bool:
-        """Check if video and audio codec combination is Samsung TV compatible.
+    def is_compatible(video_codec: str, audio_codec: str,
+                      media_info: Optional[Dict[str, Any]] = None) -> bool:
+        """Check if a file plays on the device as it is.
         
         Args:
             video_codec: Video codec name from FFmpeg
             audio_codec: Audio codec name from FFmpeg
+            media_info: Full probe result, so container, resolution,
+                profile/level and bitrate rules apply too (codecs only if
+                not given)
             
         Returns:
-            True if both codecs are compatible for Samsung TV
+            True if the file is compatible with the active device profile
         """
-        # Normalize codec names
-        video_normalized = SamsungTVCompatibility.normalize_codec_name(video_codec)
-        audio_normalized = SamsungTVCompatibility.normalize_codec_name(audio_codec)
-        
-        # Check video codec
-        video_compatible = any(
-            compat in video_normalized 
-            for compat in SamsungTVCompatibility.COMPATIBLE_VIDEO_CODECS
-        )
+        info = SamsungTVCompatibility._info(video_codec, audio_codec, media_info)
+        return DeviceProfiles.active().evaluate(info).compatible
+
+    @staticmethod
+    def is_video_compatible(video_codec: str) -> bool:
+        """Check if a video codec plays on the device.
         
-        # Check audio codec
-        audio_compatible = audio_normalized in SamsungTVCompatibility.COMPATIBLE_AUDIO_CODECS
+        Args:
+            video_codec: Video codec name from FFmpeg
+            
+        Returns:
+            True if the video stream can be kept as is
+        """
+        return DeviceProfiles.active().is_video_compatible(video_codec)
+
+    @staticmethod
+    def is_audio_compatible(audio_codec: str) -> bool:
+        """Check if an audio codec plays on the device.
         
-        return video_compatible and audio_compatible
+        Args:
+            audio_codec: Audio codec name from FFmpeg
+            
+        Returns:
+            True if the audio stream can be kept as is
+        """
+        return DeviceProfiles.active().is_audio_compatible(audio_codec)
 
     @staticmethod
     def get_compatibility_icon(is_compatible: bool) -> str:
@@ -91,32 +85,18 @@ class SamsungTVCompatibility:
         return "✓" if is_compatible else "✗"
 
     @staticmethod
-    def get_incompatible_reason(video_codec: str, audio_codec: str) -> str:
+    def get_incompatible_reason(video_codec: str, audio_codec: str,
+                                media_info: Optional[Dict[str, Any]] = None) -> str:
         """Get reason why a file is not compatible.
         
         Args:
             video_codec: Video codec name
             audio_codec: Audio codec name
+            media_info: Full probe result (codecs only if not given)
             
         Returns:
             String describing incompatibility
         """
-        video_normalized = SamsungTVCompatibility.normalize_codec_name(video_codec)
-        audio_normalized = SamsungTVCompatibility.normalize_codec_name(audio_codec)
-        
-        reasons = []
-        
-        # Check video codec
-        video_compatible = any(
-            compat in video_normalized 
-            for compat in SamsungTVCompatibility.COMPATIBLE_VIDEO_CODECS
-        )
-        if not video_compatible:
-            reasons.append(f"Video codec '{video_codec}' not compatible")
-        
-        # Check audio codec
-        audio_compatible = audio_normalized in SamsungTVCompatibility.COMPATIBLE_AUDIO_CODECS
-        if not audio_compatible:
-            reasons.append(f"Audio codec '{audio_codec}' not compatible")
-        
+        info = SamsungTVCompatibility._info(video_codec, audio_codec, media_info)
+        reasons = DeviceProfiles.active().evaluate(info).reasons
         return "; ".join(reasons) if reasons else "Unknown issue"
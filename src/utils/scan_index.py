@@ -0,0 +1,110 @@
+"""Persistent index of directory listings for incremental rescans."""
+
+import json
+import os
+import sqlite3
+import threading
+from typing import Dict, List, Tuple
+
+# (mtime_ns, subdirectory paths, video file rows [name, size, mtime_ns, device, inode])
+DirectoryRecord = Tuple[int, List[str], List[list]]
+
+
+class ScanIndex:
+    """Stores each scanned directory's mtime and listing in SQLite.
+
+    A directory's mtime changes whenever an entry is added, removed or
+    renamed in it, so a rescan can reuse the stored listing of every
+    directory whose mtime is unchanged instead of reading it again.
+    """
+
+    # Bump when the table layout or the stored listing format changes
+    SCHEMA_VERSION = 1
+
+    def __init__(self, db_path: str):
+        """Open (or create) the index database.
+
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        self.db_path = db_path
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._init_schema()
+
+    def _init_schema(self):
+        """Create tables, discarding the index if it has an older schema."""
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != ScanIndex.SCHEMA_VERSION:
+            self._conn.execute("DROP TABLE IF EXISTS directories")
+
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS directories (
+                path TEXT PRIMARY KEY,
+                mtime_ns INTEGER NOT NULL,
+                subdirs TEXT NOT NULL,
+                files TEXT NOT NULL
+            )
+            """
+        )
+        self._conn.execute(f"PRAGMA user_version={ScanIndex.SCHEMA_VERSION}")
+        self._conn.commit()
+
+    def load(self, root: str) -> Dict[str, DirectoryRecord]:
+        """Load every indexed directory at or below a root folder.
+
+        Args:
+            root: Scanned root folder
+
+        Returns:
+            Mapping of directory path to its stored record
+        """
+        prefix = os.path.join(root, "")
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path, mtime_ns, subdirs, files FROM directories "
+                "WHERE path = ? OR substr(path, 1, ?) = ?",
+                (root, len(prefix), prefix)
+            ).fetchall()
+        return {
+            path: (mtime_ns, json.loads(subdirs), json.loads(files))
+            for path, mtime_ns, subdirs, files in rows
+        }
+
+    def replace(self, roots: List[str], records: Dict[str, DirectoryRecord]):
+        """Replace the stored directories under some roots with a fresh set.
+
+        Args:
+            roots: Root folders that were scanned completely
+            records: Directories listed (or reused) under those roots
+        """
+        with self._lock:
+            for root in roots:
+                prefix = os.path.join(root, "")
+                self._conn.execute(
+                    "DELETE FROM directories WHERE path = ? OR substr(path, 1, ?) = ?",
+                    (root, len(prefix), prefix)
+                )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO directories (path, mtime_ns, subdirs, files) "
+                "VALUES (?, ?, ?, ?)",
+                (
+                    (path, mtime_ns, json.dumps(subdirs), json.dumps(files))
+                    for path, (mtime_ns, subdirs, files) in records.items()
+                )
+            )
+            self._conn.commit()
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
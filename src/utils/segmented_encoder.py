@@ -0,0 +1,326 @@
+"""Parallel encoding of one video as keyframe-aligned segments."""
+
+import bisect
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .conversion_planner import ConversionPlan
+from .ffmpeg_analyzer import ConversionProgress, FFmpegAnalyzer
+from .process_output import RotatingLog
+
+logger = logging.getLogger(__name__)
+
+
+class SegmentedEncoder:
+    """Encodes a file's video stream in segments on parallel ffmpeg processes.
+
+    A single libx264 process leaves many cores idle on large machines. This
+    splits the video at keyframes into a few segments, encodes each one in
+    its own process, then joins them with the concat demuxer (a stream copy,
+    so nothing is re-encoded). Because every segment starts on a keyframe,
+    it decodes on its own and no frames are lost or repeated at the joins.
+
+    Audio is never cut: it is taken from the source in one piece while the
+    segments are joined, so there are no gaps or clicks at the boundaries.
+    """
+
+    # Segments shorter than this aren't worth a process of their own
+    MIN_SEGMENT_SECONDS = 10.0
+
+    # Seek this far before a keyframe so rounding can't skip past it
+    SEEK_MARGIN = 0.0005
+
+    # Prefix of the work folders made next to the output
+    WORK_DIR_PREFIX = ".moovy_segments_"
+
+    def __init__(self, ffmpeg_path: str, input_path: str, plan: ConversionPlan,
+                 segments: int, threads: Optional[int], duration: float):
+        """Initialize encoder.
+
+        Args:
+            ffmpeg_path: Path to the ffmpeg executable
+            input_path: File to convert
+            plan: Conversion plan (its video must be transcoded)
+            segments: Number of segments to aim for
+            threads: Threads shared by the segment processes (defaults to
+                the number of CPUs)
+            duration: Source duration in seconds
+        """
+        self.ffmpeg_path = ffmpeg_path
+        self.input_path = input_path
+        self.plan = plan
+        self.segments = max(1, segments)
+        self.threads = threads or os.cpu_count() or 1
+        self.duration = duration
+        self._processes: List[subprocess.Popen] = []
+        self._lock = threading.Lock()
+
+    def probe_frames(self, on_process=None) -> Tuple[float, List[float], List[float]]:
+        """Find the video frames and which of them are keyframes.
+
+        Reads packet timestamps and flags only, so no frames are decoded,
+        and parses them as they arrive (a long film has hundreds of
+        thousands of packets).
+
+        Args:
+            on_process: Optional callback taking the ffprobe subprocess.Popen
+
+        Returns:
+            Tuple of (video start offset, keyframe times, all frame times),
+            in seconds from the start of the file; the times are sorted
+        """
+        ffprobe_path = FFmpegAnalyzer._find_ffprobe() or "ffprobe"
+        process = subprocess.Popen(
+            [
+                ffprobe_path, "-v", "error",
+                "-select_streams", "v:0",
+                "-show_entries", "packet=pts_time,flags:format=start_time",
+                "-of", "compact=nokey=1",
+                self.input_path
+            ],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            errors="replace"
+        )
+        if on_process:
+            on_process(process)
+
+        file_start = 0.0
+        frames = []
+        keyframes = []
+        for line in process.stdout:
+            fields = line.rstrip("\n").split("|")
+            try:
+                if fields[0] == "format":
+                    file_start = float(fields[1])
+                elif fields[0] == "packet":
+                    pts = float(fields[1])
+                    frames.append(pts)
+                    if "K" in fields[2]:
+                        keyframes.append(pts)
+            except (IndexError, ValueError):
+                # N/A timestamps and sections without values
+                continue
+        process.wait()
+
+        frames = sorted(pts - file_start for pts in frames)
+        video_start = frames[0] if frames else 0.0
+        return video_start, sorted(pts - file_start for pts in keyframes), frames
+
+    def split_points(self, keyframes: List[float]) -> List[float]:
+        """Choose where segments start (after the first one).
+
+        Args:
+            keyframes: Keyframe times in seconds from the start of the file
+
+        Returns:
+            Ascending start times, each on a keyframe
+        """
+        count = min(self.segments, int(self.duration // SegmentedEncoder.MIN_SEGMENT_SECONDS))
+        points = []
+        previous = 0.0
+        for index in range(1, count):
+            target = self.duration * index / count
+            nearest = min(keyframes, key=lambda pts: abs(pts - target), default=None)
+            if nearest is None:
+                break
+            if nearest - previous >= SegmentedEncoder.MIN_SEGMENT_SECONDS and \
+                    self.duration - nearest >= SegmentedEncoder.MIN_SEGMENT_SECONDS:
+                points.append(nearest)
+                previous = nearest
+        return points
+
+    def _segment_command(self, start: float, frame_count: Optional[int],
+                         threads: int, segment_path: str) -> List[str]:
+        """ffmpeg command encoding frame_count frames from the keyframe at start."""
+        seek = ["-ss", f"{max(0.0, start - SegmentedEncoder.SEEK_MARGIN):.6f}"] if start else []
+        # A frame count rather than -t: with and without -ss, ffmpeg measures
+        # -t from different origins, and a frame too many repeats at the join
+        limit = ["-frames:v", str(frame_count)] if frame_count is not None else []
+        return [
+            self.ffmpeg_path,
+            "-threads", str(threads),
+            *seek,
+            "-i", self.input_path,
+            *limit,
+            "-map", "0:v:0", "-an", "-sn", "-dn",
+            "-threads", str(threads),
+            *self.plan.video_args(),
+            # Matroska has no edit lists, so the segments join without gaps
+            "-f", "matroska",
+            "-y",
+            segment_path
+        ]
+
+    def _join_command(self, list_path: str, video_start: float, output_path: str) -> List[str]:
+        """ffmpeg command joining the segments and adding the source's audio."""
+        # Keep the source's offset between the video and audio starts
+        offset = ["-itsoffset", f"{video_start:.6f}"] if video_start > 0.001 else []
+        subtitles = ["-map", "1:s:0?", "-c:s", "copy"] if self.plan.container == "matroska" else []
+        return [
+            self.ffmpeg_path,
+            *offset,
+            "-f", "concat", "-safe", "0", "-i", list_path,
+            "-i", self.input_path,
+            "-map", "0:v:0",
+            "-map", "1:a:0?",
+            *subtitles,
+            "-c:v", "copy",
+            *self.plan.audio_args(),
+            "-f", self.plan.container,
+            "-y",
+            output_path
+        ]
+
+    @staticmethod
+    def remove_stale_work_dirs(folders: List[str]) -> int:
+        """Delete segment work folders left behind by a crash.
+
+        Only call this while no segmented encode is running, since running
+        ones keep their segments in the same kind of folder.
+
+        Args:
+            folders: Output folders to look in
+
+        Returns:
+            Number of work folders deleted
+        """
+        removed = 0
+        for folder in set(folders):
+            try:
+                with os.scandir(folder) as entries:
+                    stale = [entry.path for entry in entries
+                             if entry.name.startswith(SegmentedEncoder.WORK_DIR_PREFIX)
+                             and entry.is_dir(follow_symlinks=False)]
+            except OSError:
+                continue
+            for path in stale:
+                logger.info(f"Removing stale segment folder {path}")
+                shutil.rmtree(path, ignore_errors=True)
+                removed += 1
+        return removed
+
+    def _kill_all(self):
+        """Stop every running segment process."""
+        with self._lock:
+            for process in self._processes:
+                if process.poll() is None:
+                    process.kill()
+
+    def encode(self, output_path: str,
+               on_progress: Optional[Callable[[ConversionProgress], None]] = None,
+               on_process=None, log: Optional[RotatingLog] = None) -> Tuple[bool, str]:
+        """Encode the file into output_path.
+
+        Args:
+            output_path: Where to write the converted file
+            on_progress: Optional callback taking the combined progress of
+                all segments
+            on_process: Optional callback taking each ffmpeg subprocess.Popen
+            log: Optional log shared by all the ffmpeg processes
+
+        Returns:
+            Tuple of (success, ffmpeg error output if it failed)
+        """
+        video_start, keyframes, frames = self.probe_frames(on_process)
+        starts = [0.0] + self.split_points(keyframes)
+        ends = starts[1:] + [None]
+        # Frames shown from each segment's keyframe up to the next one's
+        counts = [bisect.bisect_left(frames, end - SegmentedEncoder.SEEK_MARGIN) -
+                  bisect.bisect_left(frames, start - SegmentedEncoder.SEEK_MARGIN)
+                  if end is not None else None
+                  for start, end in zip(starts, ends)]
+        threads = max(1, self.threads // len(starts))
+        logger.info(f"Encoding {self.input_path} as {len(starts)} segments, "
+                    f"{threads} thread(s) each")
+
+        work_dir = tempfile.mkdtemp(prefix=SegmentedEncoder.WORK_DIR_PREFIX,
+                                    dir=os.path.dirname(os.path.abspath(output_path)))
+        latest: Dict[int, ConversionProgress] = {}
+        errors: List[str] = []
+
+        def report():
+            with self._lock:
+                updates = list(latest.values())
+            if on_progress and updates:
+                on_progress(ConversionProgress(
+                    frame=sum(update.frame for update in updates),
+                    fps=sum(update.fps for update in updates),
+                    out_seconds=sum(update.out_seconds for update in updates),
+                    speed=sum(update.speed for update in updates),
+                    total_size=sum(update.total_size for update in updates),
+                    duration=self.duration,
+                    done=False
+                ))
+
+        def track(process):
+            with self._lock:
+                self._processes.append(process)
+            if on_process:
+                on_process(process)
+
+        def encode_segment(index: int, start: float, end: Optional[float],
+                           frame_count: Optional[int], path: str):
+            def update(progress: ConversionProgress):
+                with self._lock:
+                    latest[index] = progress._replace(done=False)
+                report()
+
+            length = (end if end is not None else self.duration) - start
+            returncode, stderr = FFmpegAnalyzer.run_ffmpeg(
+                self._segment_command(start, frame_count, threads, path),
+                length, update, track, log
+            )
+            if returncode != 0:
+                errors.append(stderr)
+                self._kill_all()
+
+        try:
+            paths = [os.path.join(work_dir, f"segment_{index:03d}.mkv")
+                     for index in range(len(starts))]
+            workers = [
+                threading.Thread(target=encode_segment,
+                                 args=(index, start, end, frame_count, path),
+                                 name="segment", daemon=True)
+                for index, (start, end, frame_count, path)
+                in enumerate(zip(starts, ends, counts, paths))
+            ]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            if errors:
+                return False, errors[0]
+
+            list_path = os.path.join(work_dir, "segments.txt")
+            with open(list_path, "w", encoding="utf-8") as f:
+                for path in paths:
+                    escaped = path.replace("'", "'\\''")
+                    f.write(f"file '{escaped}'\n")
+
+            returncode, stderr = FFmpegAnalyzer.run_ffmpeg(
+                self._join_command(list_path, video_start, output_path),
+                on_process=track, log=log
+            )
+            if returncode != 0:
+                return False, stderr
+
+            if on_progress:
+                on_progress(ConversionProgress(
+                    frame=sum(update.frame for update in latest.values()),
+                    fps=0.0,
+                    out_seconds=self.duration,
+                    speed=0.0,
+                    total_size=os.path.getsize(output_path),
+                    duration=self.duration,
+                    done=True
+                ))
+            return True, ""
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
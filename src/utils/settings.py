@@ -0,0 +1,144 @@
+"""Application settings loaded from a JSON file in the user config folder."""
+
+import json
+import logging
+import os
+import sys
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Settings:
+    """Stores user-tunable settings with defaults for every key."""
+
+    # Default values for every supported setting
+    DEFAULTS: Dict[str, Any] = {
+        "probe_workers": min(8, (os.cpu_count() or 1) * 2),
+        "probe_cache_enabled": True,
+        "fast_probe": True,
+        "native_probe": True,
+        "pipeline_backlog": 256,
+        "scan_threads": 1,
+        "conversion_threads": os.cpu_count() or 1,
+        "conversion_jobs": max(1, (os.cpu_count() or 1) // 4),
+        "conversion_light_jobs": 2,
+        # Overrides of DeviceLimits.DEFAULT_LIMITS (probes and conversions at
+        # once per storage device)
+        "device_concurrency": {},
+        "locality_order": True,
+        "integrity_check": False,
+        "integrity_workers": 2,
+        "encode_segments": 0,
+        "encoding_profile": "balanced",
+        # Device the library is checked against (see DeviceProfiles)
+        "device_profile": "samsung_tv",
+        "conversion_targets": ["tv"],
+        # Overrides of LoadGovernor.DEFAULTS (batch priority and when batches
+        # are held); None turns the governor off
+        "load_governor": {},
+        # Times of day batch conversions may run, e.g. ["22:00-07:00"] (empty = any time)
+        "conversion_windows": [],
+        # Convert files on slow storage from and to local copies (see StagingCache)
+        "staging": False,
+        "staging_folder": None,  # None = the system temp folder
+        "staging_max_gb": 50,
+        "staging_devices": ["network"],
+        "conversion_logs": False,
+        "conversion_logs_kept": 200,
+        # Options of the "custom" encoding profile (see EncodingProfiles.custom)
+        "custom_encoding": {"preset": "medium", "crf": 23, "audio_bitrate": "128k",
+                            "tune": None, "threads": None},
+    }
+
+    def __init__(self, values: Optional[Dict[str, Any]] = None):
+        """Initialize settings.
+
+        Args:
+            values: Optional overrides for the default values
+        """
+        self.values = dict(Settings.DEFAULTS)
+        if values:
+            self.values.update(values)
+
+    @staticmethod
+    def config_dir() -> str:
+        """Get the per-user folder used for settings and cached data.
+
+        Returns:
+            Path to the Moovy config folder (not guaranteed to exist)
+        """
+        if sys.platform == "win32":
+            base = os.environ.get("APPDATA") or os.path.expanduser("~")
+            return os.path.join(base, "Moovy")
+        if sys.platform == "darwin":
+            return os.path.expanduser("~/Library/Application Support/Moovy")
+        base = os.environ.get("XDG_CONFIG_HOME") or os.path.expanduser("~/.config")
+        return os.path.join(base, "moovy")
+
+    @staticmethod
+    def default_path() -> str:
+        """Get the default settings file path.
+
+        Returns:
+            Path to settings.json in the config folder
+        """
+        return os.path.join(Settings.config_dir(), "settings.json")
+
+    @staticmethod
+    def load(path: Optional[str] = None) -> "Settings":
+        """Load settings from a JSON file, falling back to defaults.
+
+        Args:
+            path: Settings file path (defaults to default_path())
+
+        Returns:
+            Settings object
+        """
+        path = path or Settings.default_path()
+        values = {}
+
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    loaded = json.load(f)
+                # Ignore unknown keys so old files don't break newer versions
+                values = {k: v for k, v in loaded.items() if k in Settings.DEFAULTS}
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not read settings from {path}: {e}")
+
+        return Settings(values)
+
+    def save(self, path: Optional[str] = None):
+        """Save settings to a JSON file.
+
+        Args:
+            path: Settings file path (defaults to default_path())
+        """
+        path = path or Settings.default_path()
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(self.values, f, indent=2)
+        except OSError as e:
+            logger.warning(f"Could not save settings to {path}: {e}")
+
+    def get(self, key: str) -> Any:
+        """Get a setting value.
+
+        Args:
+            key: Setting name
+
+        Returns:
+            Setting value, or the default if not set
+        """
+        return self.values.get(key, Settings.DEFAULTS.get(key))
+
+    def set(self, key: str, value: Any):
+        """Set a setting value.
+
+        Args:
+            key: Setting name
+            value: New value
+        """
+        self.values[key] = value
@@ -0,0 +1,410 @@
+"""Local scratch copies of files on slow storage, for conversions to work on."""
+
+import hashlib
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .device_limits import DeviceLimits
+from .ffmpeg_analyzer import FFmpegAnalyzer
+
+logger = logging.getLogger(__name__)
+
+
+class _StagedFile:
+    """A source copied (or being copied) into the staging folder."""
+
+    __slots__ = ("local_path", "size", "mtime_ns", "ready", "ok", "users", "last_used")
+
+    def __init__(self, local_path: str, size: int, mtime_ns: int):
+        self.local_path = local_path
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.ready = threading.Event()  # Set once the copy has ended
+        self.ok = False  # Whether the copy succeeded
+        self.users = 0  # Conversions reading it (pinned while > 0)
+        self.last_used = time.monotonic()
+
+
+class StagingCache:
+    """Copies sources on slow storage to a local folder for conversion.
+
+    ffmpeg reads its input with many small, scattered reads and writes
+    its output in small pieces, which a network share serves far slower
+    than a local disk. A staged conversion copies the source to the
+    staging folder in large sequential blocks, converts the local copy
+    into the staging folder, then copies the result back the same way.
+
+    Staged sources stay until room is needed for others, least recently
+    used first, so the folder never grows past its limit; outputs count
+    against the limit only until they have been copied back. prefetch()
+    copies the sources of upcoming conversions in the background, one at
+    a time, while the current ones encode.
+    """
+
+    # Read and write size of staging copies
+    BLOCK_BYTES = 16 * 1024 * 1024
+
+    # Subfolder of the configured folder that the cache owns (and empties)
+    SUBFOLDER = "moovy-staging"
+
+    def __init__(self, folder: str, max_bytes: int,
+                 device_limits: Optional[DeviceLimits] = None,
+                 kinds: Iterable[str] = (DeviceLimits.NETWORK,),
+                 block_bytes: int = BLOCK_BYTES):
+        """Initialize the cache, removing files left by an earlier session.
+
+        Args:
+            folder: Local folder for staged files (a subfolder is created)
+            max_bytes: Most bytes staged at once
+            device_limits: Classifies storage devices (a new one if not given)
+            kinds: Device kinds whose files are staged (see DeviceLimits)
+            block_bytes: Read and write size of copies
+
+        Raises:
+            OSError: If the staging folder can't be created
+        """
+        self.folder = os.path.join(folder, StagingCache.SUBFOLDER)
+        self.max_bytes = max(0, int(max_bytes))
+        self.device_limits = device_limits or DeviceLimits()
+        self.kinds = frozenset(kinds)
+        self.block_bytes = max(64 * 1024, int(block_bytes))
+        shutil.rmtree(self.folder, ignore_errors=True)
+        os.makedirs(self.folder, exist_ok=True)
+        self.device = DeviceLimits.device_of(self.folder)
+        self._condition = threading.Condition()
+        self._entries: Dict[str, _StagedFile] = {}  # Source path -> staged copy
+        self._used = 0  # Bytes of staged sources plus reserved output space
+        self._queued: deque = deque()  # Sources waiting to be prefetched
+        self._prefetcher: Optional[threading.Thread] = None
+        self._closed = False
+
+    def wants(self, path: str) -> bool:
+        """Whether a file or folder is on storage slow enough to stage.
+
+        Args:
+            path: Source file, or the folder an output goes to
+        """
+        if not self.max_bytes:
+            return False
+        device = DeviceLimits.device_of(path)
+        if device is None or device == self.device:
+            return False
+        return self.device_limits.kind(device, path) in self.kinds
+
+    @staticmethod
+    def copy_file(source: str, destination: str,
+                  cancelled: Callable[[], bool] = lambda: False,
+                  block_bytes: int = BLOCK_BYTES) -> bool:
+        """Copy a file in large sequential blocks.
+
+        Args:
+            source: File to read
+            destination: File to write (replaced if it exists)
+            cancelled: Checked between blocks; copying stops if it returns True
+            block_bytes: Read and write size
+
+        Returns:
+            True if the whole file was copied, False if cancelled
+
+        Raises:
+            OSError: If either file can't be read or written
+        """
+        buffer = bytearray(block_bytes)
+        view = memoryview(buffer)
+        with open(source, "rb", buffering=0) as src, open(destination, "wb", buffering=0) as dst:
+            if hasattr(os, "posix_fadvise"):
+                os.posix_fadvise(src.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            while True:
+                if cancelled():
+                    return False
+                count = src.readinto(buffer)
+                if not count:
+                    return True
+                written = 0
+                while written < count:
+                    written += dst.write(view[written:count])
+
+    def _local_path(self, source: str) -> str:
+        """Staging path for a source (its name is kept for ffmpeg's format guess)."""
+        digest = hashlib.blake2b(os.path.abspath(source).encode("utf-8", "surrogateescape"),
+                                 digest_size=8).hexdigest()
+        return os.path.join(self.folder, f"{digest}-{os.path.basename(source)}")
+
+    def _make_room(self, size: int) -> bool:
+        """Evict idle staged sources, least recently used first, until size fits (lock held)."""
+        if size > self.max_bytes:
+            return False
+        idle = sorted(
+            ((entry.last_used, source) for source, entry in self._entries.items()
+             if entry.ready.is_set() and not entry.users),
+        )
+        for _, source in idle:
+            if self._used + size <= self.max_bytes:
+                break
+            self._remove(source)
+        return self._used + size <= self.max_bytes
+
+    def _remove(self, source: str):
+        """Drop a staged source and delete its copy (lock held)."""
+        entry = self._entries.pop(source)
+        self._used -= entry.size
+        try:
+            os.remove(entry.local_path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Could not remove staged copy {entry.local_path}: {e}")
+
+    def _begin(self, source: str) -> Tuple[Optional[_StagedFile], bool]:
+        """Find a source's staged copy, or reserve room for a new one (lock held).
+
+        Returns:
+            (entry or None if it can't be staged, whether the caller must copy it)
+        """
+        try:
+            stat = os.stat(source)
+        except OSError:
+            return None, False
+        entry = self._entries.get(source)
+        if entry and (entry.size, entry.mtime_ns) != (stat.st_size, stat.st_mtime_ns):
+            if entry.users or not entry.ready.is_set():
+                return None, False  # Changed while in use; read it directly
+            self._remove(source)
+            entry = None
+        if entry:
+            return entry, False
+        if not self._make_room(stat.st_size):
+            return None, False
+        entry = _StagedFile(self._local_path(source), stat.st_size, stat.st_mtime_ns)
+        self._entries[source] = entry
+        self._used += entry.size
+        return entry, True
+
+    def _copy_in(self, source: str, entry: _StagedFile, cancelled: Callable[[], bool]):
+        """Copy a source into its reserved entry, dropping the entry if it fails."""
+        started = time.monotonic()
+        try:
+            entry.ok = StagingCache.copy_file(
+                source, entry.local_path, lambda: cancelled() or self._closed, self.block_bytes
+            )
+        except OSError as e:
+            logger.warning(f"Could not stage {source}: {e}")
+        with self._condition:
+            if entry.ok:
+                seconds = time.monotonic() - started
+                logger.info(f"Staged {source} ({entry.size / 1e6:.0f} MB in {seconds:.1f} s)")
+            elif self._entries.get(source) is entry:
+                self._remove(source)
+            entry.ready.set()
+            self._condition.notify_all()
+
+    def stage(self, source: str, cancelled: Callable[[], bool] = lambda: False
+              ) -> Optional[str]:
+        """Get a local copy of a source, copying it now unless it is staged already.
+
+        A copy that is returned stays until release() is called for it.
+
+        Args:
+            source: File to stage
+            cancelled: Checked while copying or waiting for a prefetch
+
+        Returns:
+            Local path, or None if the file can't be staged (too big for
+            the folder, unreadable, or cancelled); convert the original then
+        """
+        with self._condition:
+            entry, copy_here = self._begin(source)
+            if entry is None:
+                return None
+            entry.users += 1
+        if copy_here:
+            self._copy_in(source, entry, cancelled)
+        else:
+            while not entry.ready.wait(0.5):
+                if cancelled():
+                    break
+        with self._condition:
+            if entry.ok and entry.ready.is_set():
+                entry.last_used = time.monotonic()
+                return entry.local_path
+            entry.users -= 1
+            return None
+
+    def release(self, source: str):
+        """Let a staged source be evicted again once no conversion uses it."""
+        with self._condition:
+            entry = self._entries.get(source)
+            if entry and entry.users:
+                entry.users -= 1
+                entry.last_used = time.monotonic()
+            self._condition.notify_all()
+
+    def prefetch(self, source: str):
+        """Stage a source in the background if it is on slow storage.
+
+        Returns at once (the storage is checked on the prefetch thread).
+
+        Args:
+            source: File a conversion will read soon
+        """
+        with self._condition:
+            if self._closed or source in self._entries or source in self._queued:
+                return
+            self._queued.append(source)
+            if self._prefetcher is None:
+                self._prefetcher = threading.Thread(
+                    target=self._prefetch_loop, name="staging", daemon=True
+                )
+                self._prefetcher.start()
+            self._condition.notify_all()
+
+    def _prefetch_loop(self):
+        """Copy queued sources one at a time, so the slow device reads sequentially."""
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._queued or self._closed)
+                if self._closed:
+                    return
+                source = self._queued.popleft()
+            if not self.wants(source):
+                continue
+            with self._condition:
+                if self._closed:
+                    return
+                entry, copy_here = self._begin(source)
+            if copy_here:
+                self._copy_in(source, entry, lambda: False)
+
+    def reserve(self, size: int) -> bool:
+        """Reserve room for conversion outputs written to the staging folder.
+
+        Args:
+            size: Bytes to reserve (evicting idle staged sources if needed)
+
+        Returns:
+            Whether there was room; call unreserve() with the same size after
+        """
+        with self._condition:
+            if not self._make_room(size):
+                return False
+            self._used += size
+            return True
+
+    def unreserve(self, size: int):
+        """Return room taken by reserve()."""
+        with self._condition:
+            self._used -= size
+            self._condition.notify_all()
+
+    def output_path(self, output_path: str) -> str:
+        """Pick a staging path for a conversion output.
+
+        Args:
+            output_path: Final output path (its name is kept)
+        """
+        return os.path.join(self.folder, f"out-{uuid.uuid4().hex[:8]}-{os.path.basename(output_path)}")
+
+    def publish(self, local_path: str, output_path: str,
+                cancelled: Callable[[], bool] = lambda: False) -> bool:
+        """Copy a staged output to its final path and remove the staged one.
+
+        The copy goes to a partial file that is renamed only once complete,
+        as conversions themselves do.
+
+        Args:
+            local_path: Output written in the staging folder
+            output_path: Final output path
+            cancelled: Checked between blocks
+
+        Returns:
+            True if the output is in place
+        """
+        temp_path = FFmpegAnalyzer.partial_output_path(output_path)
+        try:
+            if StagingCache.copy_file(local_path, temp_path, cancelled, self.block_bytes):
+                os.replace(temp_path, output_path)
+                return True
+        except OSError as e:
+            logger.error(f"Could not copy {local_path} to {output_path}: {e}")
+        finally:
+            for path in (temp_path, local_path):
+                if os.path.exists(path):
+                    try:
+                        os.remove(path)
+                    except OSError as e:
+                        logger.warning(f"Could not remove {path}: {e}")
+        return False
+
+    def convert(self, convert_fn: Callable[..., bool], input_path: str, output_path: str,
+                extra_outputs: Optional[List[Tuple[str, object]]] = None,
+                cancelled: Callable[[], bool] = lambda: False, **kwargs) -> bool:
+        """Run a conversion, staging whichever of its files are on slow storage.
+
+        Args:
+            convert_fn: Conversion function with the signature of
+                FFmpegAnalyzer.convert_to_compatible_format
+            input_path: File to convert
+            output_path: Where the converted file goes
+            extra_outputs: (output path, plan) of more outputs from the same decode
+            cancelled: Checked while copying
+            **kwargs: Passed on to convert_fn
+
+        Returns:
+            True if every output was converted and is in place
+        """
+        extra_outputs = list(extra_outputs or [])
+        finals = [output_path] + [path for path, _ in extra_outputs]
+        staged_input = self.stage(input_path, cancelled) if self.wants(input_path) else None
+
+        # Outputs are at most about as big as the source; keep room for that
+        reserved = 0
+        write_paths = {path: path for path in finals}  # Final path -> where ffmpeg writes it
+        slow_outputs = [path for path in finals
+                        if self.wants(os.path.dirname(os.path.abspath(path)))]
+        if slow_outputs:
+            try:
+                size = os.path.getsize(input_path) * len(slow_outputs)
+            except OSError:
+                size = 0
+            if size and self.reserve(size):
+                reserved = size
+                write_paths.update((path, self.output_path(path)) for path in slow_outputs)
+
+        try:
+            success = bool(convert_fn(
+                staged_input or input_path, write_paths[output_path],
+                extra_outputs=[(write_paths[path], plan) for path, plan in extra_outputs],
+                **kwargs
+            ))
+            for path in finals:
+                if write_paths[path] == path:
+                    continue
+                if success:
+                    success = self.publish(write_paths[path], path, cancelled)
+                elif os.path.exists(write_paths[path]):
+                    os.remove(write_paths[path])
+            return success
+        finally:
+            if staged_input:
+                self.release(input_path)
+            if reserved:
+                self.unreserve(reserved)
+
+    def close(self):
+        """Stop prefetching and delete every staged file."""
+        with self._condition:
+            self._closed = True
+            self._queued.clear()
+            self._condition.notify_all()
+        if self._prefetcher:
+            self._prefetcher.join(timeout=5)
+        with self._condition:
+            self._entries.clear()
+            self._used = 0
+        shutil.rmtree(self.folder, ignore_errors=True)
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""Test that the samsung_tv profile gives the verdicts of the old hard-coded checks."""
+
+from src.utils.device_profiles import DeviceProfiles
+from src.utils.samsung_compatibility import SamsungTVCompatibility
+
+# Rules of SamsungTVCompatibility before device profiles, kept as the reference
+OLD_VIDEO_CODECS = {"h264", "avc", "h.264", "h265", "hevc", "h.265"}
+OLD_AUDIO_CODECS = {"aac", "mp3", "ac3", "eac3", "flac", "pcm"}
+OLD_REPLACEMENTS = {
+    "mpeg2video": "mpeg2",
+    "libx264": "h264",
+    "libx265": "h265",
+    "libfdk_aac": "aac",
+}
+
+
+def old_normalize(codec):
+    if not codec:
+        return ""
+    codec_lower = codec.lower().strip()
+    for old, new in OLD_REPLACEMENTS.items():
+        if codec_lower.startswith(old):
+            codec_lower = codec_lower.replace(old, new)
+    return codec_lower
+
+
+def old_is_video_compatible(codec):
+    normalized = old_normalize(codec)
+    return any(compat in normalized for compat in OLD_VIDEO_CODECS)
+
+
+def old_is_audio_compatible(codec):
+    return old_normalize(codec) in OLD_AUDIO_CODECS
+
+
+VIDEO_CODECS = [
+    "h264", "H264", " h264 ", "h.264", "H.264", "avc", "avc1", "avc3", "h264 (High)",
+    "h264 (High 4:4:4 Predictive)", "libx264", "libx264rgb", "h264_cuvid", "h264_qsv",
+    "hevc", "HEVC", "h265", "h.265", "hevc (Main 10)", "libx265", "hevc_nvenc",
+    "hev1", "hvc1", "mpeg4", "mpeg2video", "mpeg1video", "vp8", "vp9", "av1", "wmv3",
+    "vc1", "theora", "prores", "mjpeg", "Unknown", "", None,
+]
+AUDIO_CODECS = [
+    "aac", "AAC", " aac ", "aac (LC)", "libfdk_aac", "mp3", "mp2", "ac3", "eac3", "ac-3",
+    "flac", "pcm", "pcm_s16le", "pcm_s24le", "dts", "truehd", "opus", "vorbis", "alac",
+    "wmav2", "Unknown", "", None,
+]
+
+
+def samsung_profile():
+    DeviceProfiles.load()
+    DeviceProfiles.set_active("samsung_tv")
+    return DeviceProfiles.get("samsung_tv")
+
+
+def test_samsung_video_verdicts_match_old_rules():
+    profile = samsung_profile()
+    for codec in VIDEO_CODECS:
+        assert profile.is_video_compatible(codec) == old_is_video_compatible(codec), codec
+
+
+def test_samsung_audio_verdicts_match_old_rules():
+    profile = samsung_profile()
+    for codec in AUDIO_CODECS:
+        assert profile.is_audio_compatible(codec) == old_is_audio_compatible(codec), codec
+
+
+def test_samsung_file_verdicts_match_old_rules():
+    samsung_profile()
+    for video in VIDEO_CODECS:
+        for audio in AUDIO_CODECS:
+            expected = old_is_video_compatible(video) and old_is_audio_compatible(audio)
+            assert SamsungTVCompatibility.is_compatible(video, audio) == expected, (video, audio)
+
+
+def test_exact_profiles_do_not_match_substrings():
+    DeviceProfiles.load()
+    chromecast = DeviceProfiles.get("chromecast")
+    assert chromecast.is_video_compatible("h264")
+    assert not chromecast.is_video_compatible("h264 (High)")
+
+
+def test_matroska_is_not_taken_for_webm():
+    DeviceProfiles.load()
+    chromecast = DeviceProfiles.get("chromecast")
+    info = {"container": "matroska,webm", "width": 1920, "height": 1080}
+    mkv = dict(info, video_codec="h264", audio_codec="aac", video_profile="High", video_level=41)
+    webm = dict(info, video_codec="vp8", audio_codec="vorbis")
+    assert not chromecast.evaluate(mkv).container_ok
+    assert chromecast.evaluate(webm).compatible